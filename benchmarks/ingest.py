@@ -0,0 +1,293 @@
+import argparse
+import json
+import os
+import subprocess
+import tempfile
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from time import perf_counter
+from types import SimpleNamespace
+
+from src.message_parser import parse_message, parse_messages
+from src.metadata import update_channel
+from src.serialization import DECODERS, dumps_line, get_backend, loads, set_backend
+from src.storage import clear_message_id_index, save_message, save_messages
+
+PRESETS = {
+    "small": {"messages": 1_000, "channels": 1, "lines_per_file": 1_000},
+    "medium": {"messages": 100_000, "channels": 100, "lines_per_file": 10_000},
+    "large": {"messages": 1_000_000, "channels": 1_000, "lines_per_file": 100_000},
+}
+BATCH_SIZE = 100
+BASE_DATE = datetime(2026, 2, 11, tzinfo=timezone.utc)
+
+
+def make_messages(count, channels, lines_per_file):
+    # tests/conftest.py의 mock_message와 같은 속성을 가진 가벼운 객체 (MagicMock은 대량 생성에 너무 느리다)
+    messages = []
+    for i in range(count):
+        channel_index = i % channels
+        day = (i // channels) // lines_per_file
+        messages.append(SimpleNamespace(
+            id=i + 1,
+            chat_id=-1001000000000 - channel_index,
+            text=f"삼성전자 목표주가 상향 조정 #{i}",
+            date=BASE_DATE + timedelta(days=day, seconds=i % 86400),
+            media=None,
+            views=100 + i % 1000,
+            forwards=i % 50,
+            edit_date=None,
+        ))
+    return messages
+
+
+def _channel_alias(message):
+    return f"ch_{-1001000000000 - message.chat_id}"
+
+
+def _batches(parsed):
+    by_channel = {}
+    for msg in parsed:
+        by_channel.setdefault(msg["channel_alias"], []).append(msg)
+    for alias, msgs in by_channel.items():
+        for start in range(0, len(msgs), BATCH_SIZE):
+            yield alias, msgs[start:start + BATCH_SIZE]
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _io_counters():
+    try:
+        with open("/proc/self/io", "r", encoding="ascii") as f:
+            fields = dict(line.split(": ") for line in f.read().splitlines())
+        return int(fields["syscr"]), int(fields["syscw"])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _measure(stage, message_count, run):
+    io_before = _io_counters()
+    started = perf_counter()
+    latencies = run()
+    elapsed = perf_counter() - started
+    io_after = _io_counters()
+
+    latencies.sort()
+    result = {
+        "stage": stage,
+        "messages": message_count,
+        "seconds": round(elapsed, 6),
+        "messages_per_sec": round(message_count / elapsed, 1) if elapsed else None,
+        "p50_us": round(_percentile(latencies, 50) * 1e6, 2) if latencies else None,
+        "p99_us": round(_percentile(latencies, 99) * 1e6, 2) if latencies else None,
+        "read_syscalls": None,
+        "write_syscalls": None,
+        "peak_alloc_kb": None,
+    }
+    if io_before and io_after:
+        result["read_syscalls"] = io_after[0] - io_before[0]
+        result["write_syscalls"] = io_after[1] - io_before[1]
+    return result
+
+
+def _peak_alloc_kb(run):
+    # ru_maxrss는 프로세스 전체 최고치라 단계별로 구분되지 않으므로, 이 단계가 새로 잡은 메모리의 최고치만 잰다
+    tracemalloc.start()
+    try:
+        run()
+        return tracemalloc.get_traced_memory()[1] // 1024
+    finally:
+        tracemalloc.stop()
+
+
+def _bench_parse(source, parsed, stage_dir):
+    latencies = []
+    for message in source:
+        started = perf_counter()
+        parse_message(message, _channel_alias(message))
+        latencies.append(perf_counter() - started)
+    return latencies
+
+
+def _bench_parse_messages(source, parsed, stage_dir):
+    by_channel = {}
+    for message in source:
+        by_channel.setdefault(_channel_alias(message), []).append(message)
+    latencies = []
+    for alias, messages in by_channel.items():
+        for start in range(0, len(messages), BATCH_SIZE):
+            batch = messages[start:start + BATCH_SIZE]
+            started = perf_counter()
+            parse_messages(batch, alias)
+            per_message = (perf_counter() - started) / len(batch)
+            latencies.extend([per_message] * len(batch))
+    return latencies
+
+
+def _bench_encode(source, parsed, stage_dir):
+    latencies = []
+    for msg in parsed:
+        started = perf_counter()
+        dumps_line(msg)
+        latencies.append(perf_counter() - started)
+    return latencies
+
+
+def _bench_decode(source, parsed, stage_dir):
+    lines = [dumps_line(msg).encode("utf-8") for msg in parsed]
+    latencies = []
+    for line in lines:
+        started = perf_counter()
+        loads(line)
+        latencies.append(perf_counter() - started)
+    return latencies
+
+
+def _bench_save_message(source, parsed, stage_dir):
+    latencies = []
+    for msg in parsed:
+        started = perf_counter()
+        save_message(msg, msg["channel_alias"], data_dir=stage_dir)
+        latencies.append(perf_counter() - started)
+    return latencies
+
+
+def _bench_save_messages(source, parsed, stage_dir):
+    latencies = []
+    for alias, batch in _batches(parsed):
+        started = perf_counter()
+        save_messages(batch, alias, data_dir=stage_dir)
+        per_message = (perf_counter() - started) / len(batch)
+        latencies.extend([per_message] * len(batch))
+    return latencies
+
+
+def _bench_metadata(source, parsed, stage_dir):
+    metadata_path = os.path.join(stage_dir, "_metadata.json")
+    latencies = []
+    for alias, batch in _batches(parsed):
+        started = perf_counter()
+        update_channel(
+            metadata_path, alias,
+            increments={"total_collected": len(batch)},
+            last_message_id=batch[-1]["message_id"],
+            last_collected_at=batch[-1]["collected_at"],
+        )
+        per_message = (perf_counter() - started) / len(batch)
+        latencies.extend([per_message] * len(batch))
+    return latencies
+
+
+STAGES = {
+    "parse": _bench_parse,
+    "parse_messages": _bench_parse_messages,
+    "encode": _bench_encode,
+    "decode": _bench_decode,
+    "save_message": _bench_save_message,
+    "save_messages": _bench_save_messages,
+    "metadata": _bench_metadata,
+}
+
+
+def run_benchmarks(messages=1_000, channels=1, lines_per_file=1_000, stages=None, work_dir=None):
+    stages = stages or list(STAGES)
+    source = make_messages(messages, channels, lines_per_file)
+    parsed = [parse_message(message, _channel_alias(message)) for message in source]
+    results = []
+
+    with tempfile.TemporaryDirectory(dir=work_dir) as tmp:
+        for stage in stages:
+            bench = STAGES[stage]
+            stage_dir = os.path.join(tmp, stage)
+            os.makedirs(stage_dir)
+            clear_message_id_index()
+            result = _measure(stage, messages, lambda: bench(source, parsed, stage_dir))
+
+            # tracemalloc은 처리량을 떨어뜨리므로 빈 디렉토리에서 같은 단계를 한 번 더 돌려 메모리만 잰다
+            memory_dir = os.path.join(tmp, f"{stage}_memory")
+            os.makedirs(memory_dir)
+            clear_message_id_index()
+            result["peak_alloc_kb"] = _peak_alloc_kb(lambda: bench(source, parsed, memory_dir))
+            results.append(result)
+
+    return results
+
+
+def compare_reports(baseline, current):
+    baseline_by_stage = {result["stage"]: result for result in baseline["results"]}
+    comparison = {}
+    for result in current["results"]:
+        before = baseline_by_stage.get(result["stage"])
+        if not before or not before["messages_per_sec"] or not result["messages_per_sec"]:
+            continue
+        comparison[result["stage"]] = {
+            "baseline_messages_per_sec": before["messages_per_sec"],
+            "messages_per_sec": result["messages_per_sec"],
+            "speedup": round(result["messages_per_sec"] / before["messages_per_sec"], 3),
+        }
+    return comparison
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark parse/storage/metadata ingest hot paths.")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="small")
+    parser.add_argument("--messages", type=int, default=None)
+    parser.add_argument("--channels", type=int, default=None)
+    parser.add_argument("--lines-per-file", type=int, default=None)
+    parser.add_argument("--stage", action="append", choices=sorted(STAGES), dest="stages")
+    parser.add_argument("--json-decoder", choices=sorted(DECODERS), default=None,
+                        help="JSON decoder backend (default: fastest installed)")
+    parser.add_argument("--work-dir", default=None, help="Directory for temporary benchmark data")
+    parser.add_argument("--output", default=None, help="Write JSON report to this path")
+    parser.add_argument("--compare", default=None, help="Baseline JSON report to compare against")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    scale = dict(PRESETS[args.preset])
+    for key in ("messages", "channels", "lines_per_file"):
+        if getattr(args, key) is not None:
+            scale[key] = getattr(args, key)
+
+    if args.json_decoder:
+        set_backend(args.json_decoder)
+
+    report = {
+        "commit": _git_commit(),
+        "json_decoder": get_backend(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "scale": scale,
+        "results": run_benchmarks(stages=args.stages, work_dir=args.work_dir, **scale),
+    }
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            report["comparison"] = compare_reports(json.load(f), report)
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,34 +1,239 @@
 import asyncio
 import logging
+import random
+import time
+from datetime import datetime, timezone
+from time import monotonic
 
-from src.batch_collector import collect_batch
+from src.batch_collector import (
+    DEFAULT_MAX_PAGES,
+    DEFAULT_TIME_BUDGET_SEC,
+    collect_batch,
+    fetch_dialog_heads,
+)
+from src.entity_cache import is_invalid_peer_error, resolve_entity
+from src.metadata import load_metadata
 
 logger = logging.getLogger(__name__)
 
+# 대화 목록 조회도 요청 몇 번이 들므로 채널이 이보다 적으면 바로 조회하는 편이 싸다
+DIALOGS_PREPASS_MIN_CHANNELS = 3
 
-async def run_batch(client, channels, metadata_path, data_dir="data"):
-    results = {}
-    for ch in channels:
-        if not ch.get("enabled", False):
-            continue
 
-        alias = ch["alias"]
-        identifier = ch.get("username") or ch.get("id")
+def _now_iso():
+    return datetime.now(timezone.utc).isoformat()
+
+
+async def _collect_channel(client, ch, metadata, semaphore, entity_cache, deadline=None, report=None,
+                           **collect_kwargs):
+    alias = ch["alias"]
+    identifier = ch.get("username") or ch.get("id")
+
+    async with semaphore:
+        # 주기 마감이 지나면 새 채널은 시작하지 않고 다음 주기로 넘긴다
+        if deadline is not None and monotonic() >= deadline:
+            if report is not None:
+                report["skipped"].append(alias)
+            return 0
 
+        started = monotonic()
+        count = 0
+        progress = {"reached_head": False}
         try:
-            entity = await client.get_entity(identifier)
-            count = await collect_batch(client, entity, alias, metadata_path=metadata_path, data_dir=data_dir)
-            results[alias] = count
+            entity = await resolve_entity(client, identifier, cache=entity_cache, key=alias)
+            last_message_id = metadata.get(alias, {}).get("last_message_id", 0)
+            count = await collect_batch(
+                client, entity, alias, last_message_id=last_message_id, report=progress, **collect_kwargs
+            )
             logger.info("Batch collected %d messages from %s", count, alias)
         except Exception as e:
             logger.error("Batch collection failed for %s: %s", alias, e)
-            results[alias] = 0
+            if entity_cache is not None and is_invalid_peer_error(e):
+                entity_cache.invalidate(alias)
+            if report is not None:
+                report["failed"].append(alias)
+        if report is not None:
+            report["channels"][alias] = {
+                "count": count,
+                "duration_sec": round(monotonic() - started, 3),
+                "reached_head": progress["reached_head"],
+            }
+        return count
+
+
+def _peer_id(ch, entity_cache):
+    peer_id = entity_cache.peer_id(ch["alias"]) if entity_cache is not None else None
+    if peer_id is None and isinstance(ch.get("id"), int):
+        peer_id = ch["id"]
+    return peer_id
+
+
+async def _filter_moved_channels(client, channels, metadata, entity_cache):
+    try:
+        heads = await fetch_dialog_heads(client)
+    except Exception as e:
+        logger.error("Dialogs pre-pass failed, collecting all channels: %s", e)
+        return channels
+
+    moved = []
+    for ch in channels:
+        head = heads.get(_peer_id(ch, entity_cache))
+        # 대화 목록에 없거나 peer id를 모르는 채널은 판단할 수 없으므로 그대로 조회한다
+        if head is None or head > metadata.get(ch["alias"], {}).get("last_message_id", 0):
+            moved.append(ch)
+    logger.info("Dialogs pre-pass: %d of %d channels have new messages", len(moved), len(channels))
+    return moved
+
+
+async def run_batch(
+    client, channels, metadata_path, data_dir="data", concurrency=1,
+    max_pages=DEFAULT_MAX_PAGES, time_budget_sec=DEFAULT_TIME_BUDGET_SEC, entity_cache=None,
+    media_scheduler=None, storage=None, dialogs_prepass=False, deadline=None, report=None, backfill=False,
+):
+    enabled = [ch for ch in channels if ch.get("enabled", False)]
+    metadata = load_metadata(metadata_path)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    if report is not None:
+        report.update({"started_at": _now_iso(), "channels": {}, "skipped": [], "failed": []})
+
+    targets = enabled
+    if dialogs_prepass and len(enabled) >= DIALOGS_PREPASS_MIN_CHANNELS:
+        targets = await _filter_moved_channels(client, enabled, metadata, entity_cache)
 
-    return results
+    counts = await asyncio.gather(*[
+        _collect_channel(
+            client, ch, metadata, semaphore, entity_cache,
+            deadline=deadline,
+            report=report,
+            metadata_path=metadata_path,
+            data_dir=data_dir,
+            max_pages=max_pages,
+            time_budget_sec=time_budget_sec,
+            media_scheduler=media_scheduler,
+            storage=storage,
+            backfill=backfill,
+        )
+        for ch in targets
+    ])
+    if entity_cache is not None:
+        entity_cache.save()
+    rate_limiter = getattr(client, "rate_limiter", None)
+    if rate_limiter is not None:
+        logger.info("Rate limiter stats: %s", rate_limiter.stats())
 
+    if report is not None:
+        report["finished_at"] = _now_iso()
 
-async def run_periodic_batch(client, channels, metadata_path, data_dir="data", interval_sec=300):
+    result = {ch["alias"]: 0 for ch in enabled}
+    result.update({ch["alias"]: count for ch, count in zip(targets, counts)})
+    return result
+
+
+async def run_adaptive_batch(client, scheduler, metadata_path, max_pages=DEFAULT_MAX_PAGES, **batch_kwargs):
+    while True:
+        due = scheduler.pop_due()
+        if due:
+            # 한 주기가 가장 짧은 조회 주기를 넘기면 활발한 채널의 다음 조회가 밀리므로 그 시점을 마감으로 둔다
+            report = {}
+            counts = await run_batch(
+                client, due, metadata_path=metadata_path, max_pages=max_pages,
+                deadline=monotonic() + scheduler.min_interval_sec, report=report, **batch_kwargs
+            )
+            logger.info("Batch cycle report: %s", report)
+            polled_at = time.time()
+            skipped = set(report["skipped"])
+            failed = set(report["failed"])
+            if skipped:
+                logger.warning("Batch cycle hit its deadline, deferring %d channels", len(skipped))
+            for alias, count in counts.items():
+                if alias in skipped:
+                    scheduler.requeue(alias, now=polled_at)
+                    continue
+                if alias in failed:
+                    # 실패한 조회를 0건으로 기록하면 게시 속도가 낮아지므로 기록하지 않고 최소 주기 뒤에 다시 조회한다
+                    scheduler.requeue(alias, now=polled_at + scheduler.min_interval_sec)
+                    continue
+                # 페이지 한도나 시간 예산에 걸려 최신 메시지까지 못 따라잡았으면 밀린 채널로 본다
+                channel = report["channels"].get(alias, {})
+                scheduler.record(alias, count, now=polled_at, backlog=not channel.get("reached_head", True))
+
+        next_due = scheduler.next_due()
+        if next_due is None:
+            return
+        delay = max(0, next_due - time.time())
+        logger.info("Next channel poll in %d seconds", delay)
+        await asyncio.sleep(delay)
+
+
+async def run_fixed_rate_batch(client, channels, metadata_path, interval_sec=300, jitter_sec=0, **batch_kwargs):
+    # 주기 시작 시각을 origin + n * interval로 고정해 수집 시간만큼 주기가 밀리지 않게 한다
+    origin = monotonic()
+    tick = 0
+    order = list(channels)
     while True:
-        await run_batch(client, channels, metadata_path=metadata_path, data_dir=data_dir)
-        logger.info("Next batch in %d seconds", interval_sec)
-        await asyncio.sleep(interval_sec)
+        tick_end = origin + (tick + 1) * interval_sec
+        report = {}
+        await run_batch(client, order, metadata_path=metadata_path, deadline=tick_end, report=report, **batch_kwargs)
+        report["tick"] = tick
+        logger.info("Batch cycle report: %s", report)
+
+        # 마감에 걸려 건너뛴 채널은 다음 주기 맨 앞에서 시작한다
+        skipped = set(report["skipped"])
+        order = [ch for ch in order if ch["alias"] in skipped] + [ch for ch in order if ch["alias"] not in skipped]
+
+        tick += 1
+        now = monotonic()
+        overrun = now - (origin + tick * interval_sec)
+        if overrun > 0:
+            # 다음 주기의 절반 이상이 남았으면 곧바로 짧아진 주기를 돌고, 아니면 그 주기는 건너뛴다
+            late_ticks = int(overrun // interval_sec)
+            if overrun % interval_sec > interval_sec / 2:
+                late_ticks += 1
+            logger.warning("Batch cycle overran by %.1f seconds, skipped %d cycles", overrun, late_ticks)
+            tick += late_ticks
+            if origin + tick * interval_sec <= now:
+                continue
+
+        start_at = origin + tick * interval_sec + random.uniform(0, max(0, jitter_sec))
+        delay = max(0, start_at - monotonic())
+        logger.info("Next batch in %d seconds", delay)
+        await asyncio.sleep(delay)
+
+
+async def run_periodic_batch(
+    client, channels, metadata_path, data_dir="data", interval_sec=300, concurrency=1,
+    max_pages=DEFAULT_MAX_PAGES, time_budget_sec=DEFAULT_TIME_BUDGET_SEC, entity_cache=None,
+    media_scheduler=None, storage=None, scheduler=None, dialogs_prepass=False, jitter_sec=0, backfill=False,
+):
+    if scheduler is not None:
+        # 채널마다 게시 속도에 맞춘 주기로 조회한다
+        await run_adaptive_batch(
+            client, scheduler,
+            metadata_path=metadata_path,
+            data_dir=data_dir,
+            concurrency=concurrency,
+            max_pages=max_pages,
+            time_budget_sec=time_budget_sec,
+            entity_cache=entity_cache,
+            media_scheduler=media_scheduler,
+            storage=storage,
+            dialogs_prepass=dialogs_prepass,
+            backfill=backfill,
+        )
+        return
+
+    await run_fixed_rate_batch(
+        client, channels,
+        metadata_path=metadata_path,
+        interval_sec=interval_sec,
+        jitter_sec=jitter_sec,
+        data_dir=data_dir,
+        concurrency=concurrency,
+        max_pages=max_pages,
+        time_budget_sec=time_budget_sec,
+        entity_cache=entity_cache,
+        media_scheduler=media_scheduler,
+        storage=storage,
+        dialogs_prepass=dialogs_prepass,
+        backfill=backfill,
+    )
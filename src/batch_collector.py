@@ -1,8 +1,11 @@
+import asyncio
 import logging
+from datetime import datetime, timezone
+from time import monotonic
 
-from src.metadata import load_metadata, update_channel, increment_collected
-from src.message_parser import parse_message
-from src.storage import save_message
+from src.metadata import load_metadata, update_channel
+from src.message_parser import parse_messages
+from src.storage import save_messages
 
 logger = logging.getLogger(__name__)
 
@@ -14,40 +17,151 @@ def get_last_message_id(metadata_path, channel_alias):
 
 
 MAX_MESSAGES = 100
+DEFAULT_MAX_PAGES = 10
+DEFAULT_TIME_BUDGET_SEC = 60
 
 
 async def fetch_messages(client, channel_entity, min_id=0):
+    # reverse=True: min_id 바로 다음(가장 오래된) 메시지부터 오름차순으로 한 페이지
     messages = await client.get_messages(
         channel_entity,
         limit=MAX_MESSAGES,
         min_id=min_id,
+        reverse=True,
     )
     return messages
 
 
-async def collect_batch(client, channel_entity, channel_alias, metadata_path, data_dir="data"):
-    min_id = get_last_message_id(metadata_path, channel_alias)
-    messages = await fetch_messages(client, channel_entity, min_id=min_id)
+async def fetch_latest_messages(client, channel_entity, limit=MAX_MESSAGES):
+    # 최신 메시지부터 내림차순으로 limit개
+    return await client.get_messages(channel_entity, limit=limit)
 
-    saved_count = 0
-    max_msg_id = min_id
 
-    for msg in messages:
-        parsed = parse_message(msg, channel_alias)
-        result = save_message(parsed, channel_alias, data_dir=data_dir)
-        if result:
-            saved_count += 1
-            if msg.id > max_msg_id:
-                max_msg_id = msg.id
+async def fetch_dialog_heads(client):
+    # 대화 목록은 100개씩 한 요청으로 오므로 채널 수와 무관하게 몇 번의 호출로 끝난다
+    heads = {}
+    for dialog in await client.get_dialogs(limit=None):
+        message = getattr(dialog, "message", None)
+        if message is not None:
+            heads[dialog.id] = message.id
+    return heads
 
-    if max_msg_id > min_id:
-        from datetime import datetime, timezone
+
+def _store_page(messages, channel_alias, metadata_path, data_dir, cursor, storage=None):
+    # 파싱, 저장, 체크포인트 기록은 파일 I/O라 이벤트 루프 밖(asyncio.to_thread)에서 돈다
+    parsed_batch = parse_messages(messages, channel_alias)
+
+    if storage is not None:
+        stored = storage.save_messages(parsed_batch, channel_alias)
+    else:
+        stored = save_messages(parsed_batch, channel_alias, data_dir=data_dir)
+    stored_ids = {parsed["message_id"] for parsed in stored}
+
+    # 저장 실패한 메시지를 건너뛰지 않도록 연속으로 저장된 구간까지만 체크포인트 전진
+    checkpoint = cursor
+    complete = True
+    for msg_id in sorted(parsed["message_id"] for parsed in parsed_batch):
+        if msg_id not in stored_ids:
+            complete = False
+            break
+        checkpoint = msg_id
+
+    if checkpoint > cursor:
         update_channel(
             metadata_path, channel_alias,
-            last_message_id=max_msg_id,
+            increments={"total_collected": len(stored)},
+            last_message_id=checkpoint,
             last_collected_at=datetime.now(timezone.utc).isoformat(),
         )
-        for _ in range(saved_count):
-            increment_collected(metadata_path, channel_alias)
 
-    return saved_count
+    return stored, checkpoint, complete
+
+
+async def _store_page_off_loop(messages, channel_alias, metadata_path, data_dir, cursor,
+                               media_scheduler=None, storage=None):
+    stored, checkpoint, complete = await asyncio.to_thread(
+        _store_page, messages, channel_alias, metadata_path, data_dir, cursor, storage,
+    )
+    # 다운로드 작업은 이벤트 루프에서 만들어야 한다
+    if media_scheduler is not None:
+        stored_ids = {parsed["message_id"] for parsed in stored}
+        for msg in messages:
+            if msg.id in stored_ids:
+                media_scheduler.schedule(msg, channel_alias)
+    return len(stored), checkpoint, complete
+
+
+async def catch_up_channel(
+    client, channel_entity, channel_alias, metadata_path, data_dir="data",
+    last_message_id=None, max_pages=DEFAULT_MAX_PAGES, time_budget_sec=DEFAULT_TIME_BUDGET_SEC,
+    media_scheduler=None, storage=None, backfill=False,
+):
+    cursor = last_message_id
+    if cursor is None:
+        cursor = get_last_message_id(metadata_path, channel_alias)
+
+    result = {"saved": 0, "pages": 0, "last_message_id": cursor, "reached_head": False}
+    started = monotonic()
+
+    if not cursor and not backfill:
+        # 체크포인트가 없는 채널은 전체 이력을 받지 않고 최신 한 페이지만 저장한 뒤 head부터 이어 간다
+        messages = await fetch_latest_messages(client, channel_entity)
+        result["pages"] = 1
+        result["reached_head"] = True
+        if messages:
+            saved, cursor, _ = await _store_page_off_loop(
+                list(messages), channel_alias, metadata_path, data_dir, cursor,
+                media_scheduler=media_scheduler,
+                storage=storage,
+            )
+            result["saved"] = saved
+            result["last_message_id"] = cursor
+        return result
+
+    while result["pages"] < max_pages:
+        if result["pages"] and monotonic() - started >= time_budget_sec:
+            logger.info("Catch-up time budget spent for %s at message %d", channel_alias, cursor)
+            break
+
+        messages = await fetch_messages(client, channel_entity, min_id=cursor)
+        result["pages"] += 1
+        page = [msg for msg in messages if msg.id > cursor]
+        if not page:
+            result["reached_head"] = True
+            break
+
+        saved, cursor, complete = await _store_page_off_loop(
+            page, channel_alias, metadata_path, data_dir, cursor,
+            media_scheduler=media_scheduler,
+            storage=storage,
+        )
+        result["saved"] += saved
+        result["last_message_id"] = cursor
+        if not complete:
+            break
+        if len(messages) < MAX_MESSAGES:
+            result["reached_head"] = True
+            break
+
+    return result
+
+
+async def collect_batch(
+    client, channel_entity, channel_alias, metadata_path, data_dir="data",
+    last_message_id=None, max_pages=DEFAULT_MAX_PAGES, time_budget_sec=DEFAULT_TIME_BUDGET_SEC,
+    media_scheduler=None, storage=None, backfill=False, report=None,
+):
+    result = await catch_up_channel(
+        client, channel_entity, channel_alias,
+        metadata_path=metadata_path,
+        data_dir=data_dir,
+        last_message_id=last_message_id,
+        max_pages=max_pages,
+        time_budget_sec=time_budget_sec,
+        media_scheduler=media_scheduler,
+        storage=storage,
+        backfill=backfill,
+    )
+    if report is not None:
+        report.update(result)
+    return result["saved"]
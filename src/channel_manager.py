@@ -1,5 +1,7 @@
 import logging
 
+from src.entity_cache import resolve_entity
+
 logger = logging.getLogger(__name__)
 
 
@@ -11,14 +13,16 @@ def filter_enabled_channels(channels):
     return [ch for ch in channels if ch.get("enabled", False)]
 
 
-async def resolve_channels(client, channels):
+async def resolve_channels(client, channels, entity_cache=None):
     resolved = []
     for ch in channels:
         identifier = ch.get("username") or ch.get("id")
         try:
-            entity = await client.get_entity(identifier)
+            entity = await resolve_entity(client, identifier, cache=entity_cache, key=ch.get("alias"))
             ch["entity"] = entity
             resolved.append(ch)
         except Exception as e:
             logger.error("Failed to resolve channel %s: %s", identifier, e)
+    if entity_cache is not None:
+        entity_cache.save()
     return resolved
@@ -6,7 +6,7 @@ from src.storage import save_message
 logger = logging.getLogger(__name__)
 
 
-async def handle_new_message(event, channel_map, is_edit=False):
+async def handle_new_message(event, channel_map, is_edit=False, write_queue=None, media_scheduler=None):
     chat_id = event.message.chat_id
     if chat_id not in channel_map:
         return
@@ -15,6 +15,11 @@ async def handle_new_message(event, channel_map, is_edit=False):
     parsed = parse_message(event.message, channel_alias, is_edit=is_edit)
     if parsed is None:
         return
+    if media_scheduler is not None and not is_edit:
+        media_scheduler.schedule(event.message, channel_alias)
+    if write_queue is not None:
+        await write_queue.put(parsed, channel_alias)
+        return
     result = save_message(parsed, channel_alias)
     if result:
         logger.info("Message %s from %s saved", parsed["message_id"], channel_alias)
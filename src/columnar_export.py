@@ -0,0 +1,164 @@
+import json
+import logging
+import os
+import shutil
+from datetime import datetime
+
+from src.storage import iter_day_files, read_records
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "_manifest.json"
+PART_NAME = "part-0.parquet"
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet export requires pyarrow: pip install pyarrow") from e
+    return pa, pq
+
+
+def _schema(pa):
+    dict_string = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ("message_id", pa.int64()),
+        ("channel_id", pa.int64()),
+        ("channel_alias", dict_string),
+        ("date", pa.timestamp("us", tz="UTC")),
+        ("text", dict_string),
+        ("has_media", pa.bool_()),
+        ("media_type", dict_string),
+        ("media_file", pa.string()),
+        ("views", pa.int64()),
+        ("forwards", pa.int64()),
+        ("edit_date", pa.timestamp("us", tz="UTC")),
+        ("is_edit", pa.bool_()),
+        ("collected_at", pa.timestamp("us", tz="UTC")),
+    ])
+
+
+def _parse_timestamp(value):
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_row(record):
+    return {
+        "message_id": record.get("message_id"),
+        "channel_id": record.get("channel_id"),
+        "channel_alias": record.get("channel_alias"),
+        "date": _parse_timestamp(record.get("date")),
+        "text": record.get("text"),
+        "has_media": record.get("has_media"),
+        "media_type": record.get("media_type"),
+        "media_file": record.get("media_file"),
+        "views": record.get("views"),
+        "forwards": record.get("forwards"),
+        "edit_date": _parse_timestamp(record.get("edit_date")),
+        "is_edit": record.get("is_edit"),
+        "collected_at": _parse_timestamp(record.get("collected_at")),
+    }
+
+
+def generate_partition_dir(channel_alias, date_str, output_dir):
+    return os.path.join(output_dir, f"channel={channel_alias}", f"day={date_str}")
+
+
+def load_manifest(output_dir):
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (json.JSONDecodeError, OSError):
+        logger.error(f"Corrupted export manifest, re-exporting all days: {path}")
+        return {}
+
+
+def save_manifest(output_dir, manifest):
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def _source_signature(paths):
+    signature = {}
+    for path in paths:
+        stat = os.stat(path)
+        signature[os.path.basename(path)] = [stat.st_size, stat.st_mtime_ns]
+    return signature
+
+
+def _collect_days(data_dir):
+    days = {}
+    for channel_alias, date_str, path in iter_day_files(data_dir):
+        days.setdefault(f"{channel_alias}/{date_str}", (channel_alias, date_str, []))[2].append(path)
+    return days
+
+
+def _write_partition(pa, pq, schema, channel_alias, date_str, paths, output_dir):
+    rows = []
+    seen_ids = set()
+    for path in paths:
+        for record in read_records(path):
+            msg_id = record.get("message_id")
+            if msg_id in seen_ids:
+                continue
+            seen_ids.add(msg_id)
+            rows.append(_to_row(record))
+
+    table = pa.Table.from_pylist(rows, schema=schema)
+    partition_dir = generate_partition_dir(channel_alias, date_str, output_dir)
+    os.makedirs(partition_dir, exist_ok=True)
+    target = os.path.join(partition_dir, PART_NAME)
+    tmp_path = target + ".tmp"
+    pq.write_table(table, tmp_path, use_dictionary=True, compression="zstd")
+    os.replace(tmp_path, target)
+    return len(rows)
+
+
+def export_parquet(data_dir="data", output_dir=None):
+    pa, pq = _require_pyarrow()
+    schema = _schema(pa)
+    output_dir = output_dir or os.path.join(data_dir, "_parquet")
+    os.makedirs(output_dir, exist_ok=True)
+
+    manifest = load_manifest(output_dir)
+    days = _collect_days(data_dir)
+    result = {"days": len(days), "exported": 0, "skipped": 0, "removed": 0, "rows": 0}
+
+    # 중간에 실패해도 그때까지 내보낸 날짜는 manifest에 남겨 다음 실행이 이어서 처리한다
+    try:
+        for key, (channel_alias, date_str, paths) in days.items():
+            signature = _source_signature(paths)
+            entry = manifest.get(key)
+            target = os.path.join(generate_partition_dir(channel_alias, date_str, output_dir), PART_NAME)
+            if entry is not None and entry["sources"] == signature and os.path.exists(target):
+                result["skipped"] += 1
+                continue
+
+            rows = _write_partition(pa, pq, schema, channel_alias, date_str, paths, output_dir)
+            manifest[key] = {"sources": signature, "rows": rows}
+            result["exported"] += 1
+            result["rows"] += rows
+
+        for key in [key for key in manifest if key not in days]:
+            channel_alias, date_str = key.rsplit("/", 1)
+            shutil.rmtree(generate_partition_dir(channel_alias, date_str, output_dir), ignore_errors=True)
+            del manifest[key]
+            result["removed"] += 1
+    finally:
+        save_manifest(output_dir, manifest)
+
+    logger.info("Parquet export to %s: %s", output_dir, result)
+    return result
@@ -0,0 +1,55 @@
+import asyncio
+import logging
+import os
+from datetime import date, datetime, timedelta, timezone
+
+from src.storage import COMPRESSED_SUFFIX, compact_day_file, iter_day_files
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MIN_AGE_DAYS = 1
+DEFAULT_INTERVAL_SEC = 3600
+
+
+def _today():
+    return datetime.now(timezone.utc).date()
+
+
+def compact_closed_days(data_dir="data", min_age_days=DEFAULT_MIN_AGE_DAYS, today=None):
+    # 파일 날짜는 메시지 UTC 날짜 기준이므로 마감 여부도 UTC로 판단한다
+    cutoff = (today or _today()) - timedelta(days=min_age_days)
+    result = {"files": 0, "messages": 0, "bytes_before": 0, "bytes_after": 0}
+
+    for channel_alias, date_str, filepath in list(iter_day_files(data_dir)):
+        if filepath.endswith(COMPRESSED_SUFFIX) or date.fromisoformat(date_str) > cutoff:
+            continue
+        compressed_path = filepath + COMPRESSED_SUFFIX
+        try:
+            before = os.path.getsize(filepath)
+        except FileNotFoundError:
+            # 다른 프로세스가 방금 압축을 끝낸 날짜
+            continue
+        if os.path.exists(compressed_path):
+            before += os.path.getsize(compressed_path)
+
+        result["messages"] += compact_day_file(channel_alias, date_str, data_dir=data_dir)
+        if os.path.exists(filepath):
+            continue
+        result["files"] += 1
+        result["bytes_before"] += before
+        result["bytes_after"] += os.path.getsize(compressed_path)
+
+    if result["files"]:
+        logger.info("Compacted %d day files in %s (%d -> %d bytes)",
+                    result["files"], data_dir, result["bytes_before"], result["bytes_after"])
+    return result
+
+
+async def run_periodic_compaction(data_dir="data", interval_sec=DEFAULT_INTERVAL_SEC,
+                                  min_age_days=DEFAULT_MIN_AGE_DAYS):
+    while True:
+        try:
+            await asyncio.to_thread(compact_closed_days, data_dir, min_age_days)
+        except Exception as e:
+            logger.error("Compaction failed: %s", e)
+        await asyncio.sleep(interval_sec)
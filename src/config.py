@@ -17,7 +17,31 @@ def load_config():
         "log_level": os.environ.get("LOG_LEVEL", "INFO"),
         "log_dir": os.environ.get("LOG_DIR", "logs"),
         "data_dir": os.environ.get("DATA_DIR", "data"),
+        "storage_backend": os.environ.get("STORAGE_BACKEND", "jsonl").lower(),
+        "sqlite_path": os.environ.get("SQLITE_PATH", "data/messages.db"),
+        "search_index": os.environ.get("SEARCH_INDEX", "true").lower() == "true",
+        "search_index_path": os.environ.get("SEARCH_INDEX_PATH", "data/_search.db"),
+        "compaction_interval_sec": int(os.environ.get("COMPACTION_INTERVAL_SEC", "3600")),
+        "compaction_min_age_days": int(os.environ.get("COMPACTION_MIN_AGE_DAYS", "1")),
         "session_dir": os.environ.get("SESSION_DIR", "session"),
         "media_max_size_mb": int(os.environ.get("MEDIA_MAX_SIZE_MB", "50")),
+        "media_download_concurrency": int(os.environ.get("MEDIA_DOWNLOAD_CONCURRENCY", "4")),
         "batch_interval_sec": int(os.environ.get("BATCH_INTERVAL_SEC", "300")),
+        "batch_concurrency": int(os.environ.get("BATCH_CONCURRENCY", "4")),
+        "batch_max_pages": int(os.environ.get("BATCH_MAX_PAGES", "10")),
+        "batch_channel_budget_sec": int(os.environ.get("BATCH_CHANNEL_BUDGET_SEC", "60")),
+        "batch_backfill": os.environ.get("BATCH_BACKFILL", "false").lower() == "true",
+        "batch_jitter_sec": int(os.environ.get("BATCH_JITTER_SEC", "0")),
+        "batch_dialogs_prepass": os.environ.get("BATCH_DIALOGS_PREPASS", "true").lower() == "true",
+        "batch_adaptive": os.environ.get("BATCH_ADAPTIVE", "true").lower() == "true",
+        "batch_min_interval_sec": int(os.environ.get("BATCH_MIN_INTERVAL_SEC", "60")),
+        "batch_max_interval_sec": int(os.environ.get("BATCH_MAX_INTERVAL_SEC", "3600")),
+        "rate_limit_resolve_per_min": int(os.environ.get("RATE_LIMIT_RESOLVE_PER_MIN", "30")),
+        "rate_limit_history_per_min": int(os.environ.get("RATE_LIMIT_HISTORY_PER_MIN", "300")),
+        "rate_limit_download_per_min": int(os.environ.get("RATE_LIMIT_DOWNLOAD_PER_MIN", "120")),
+        "rate_limit_flood_retries": int(os.environ.get("RATE_LIMIT_FLOOD_RETRIES", "1")),
+        "realtime_catch_up": os.environ.get("REALTIME_CATCH_UP", "true").lower() == "true",
+        "entity_cache_ttl_sec": int(os.environ.get("ENTITY_CACHE_TTL_SEC", "86400")),
+        "write_queue_maxsize": int(os.environ.get("WRITE_QUEUE_MAXSIZE", "1000")),
+        "write_queue_max_latency_ms": int(os.environ.get("WRITE_QUEUE_MAX_LATENCY_MS", "500")),
     }
@@ -0,0 +1,113 @@
+import json
+import logging
+import os
+from datetime import datetime, timezone
+
+from telethon import types, utils
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SEC = 86400
+# 캐시된 peer 자체가 무효임을 뜻하는 오류들 — FloodWait나 네트워크 오류로는 캐시를 버리지 않는다
+INVALID_PEER_ERRORS = ("ChannelInvalidError", "ChannelPrivateError", "PeerIdInvalidError")
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def _build_input_peer(entry):
+    real_id, peer_type = utils.resolve_id(entry["peer_id"])
+    if peer_type is types.PeerChannel:
+        return types.InputPeerChannel(real_id, entry["access_hash"])
+    if peer_type is types.PeerUser:
+        return types.InputPeerUser(real_id, entry["access_hash"])
+    return types.InputPeerChat(real_id)
+
+
+def is_invalid_peer_error(error):
+    return any(cls.__name__ in INVALID_PEER_ERRORS for cls in type(error).__mro__)
+
+
+def entity_id(entity):
+    # 캐시에서 복원한 InputPeer*에는 id 대신 channel_id/user_id/chat_id만 있다
+    value = getattr(entity, "id", None)
+    if value is None:
+        value = utils.get_peer_id(entity, add_mark=False)
+    return value
+
+
+class EntityCache:
+    def __init__(self, path, ttl_sec=DEFAULT_TTL_SEC):
+        self.path = path
+        self.ttl_sec = ttl_sec
+        self._entries = self._load()
+        self._dirty = False
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (json.JSONDecodeError, ValueError):
+            logger.warning("Entity cache %s is corrupted, starting empty", self.path)
+            return {}
+
+    def get(self, key, identifier):
+        entry = self._entries.get(key)
+        if entry is None or entry.get("identifier") != str(identifier):
+            return None
+        age = (_now() - datetime.fromisoformat(entry["resolved_at"])).total_seconds()
+        if age > self.ttl_sec:
+            return None
+        return _build_input_peer(entry)
+
+    def peer_id(self, key):
+        # peer id는 바뀌지 않으므로 TTL이 지난 항목도 그대로 쓴다
+        entry = self._entries.get(key)
+        return entry.get("peer_id") if entry is not None else None
+
+    def put(self, key, identifier, entity):
+        input_peer = utils.get_input_peer(entity)
+        self._entries[key] = {
+            "identifier": str(identifier),
+            "peer_id": utils.get_peer_id(input_peer),
+            "access_hash": getattr(input_peer, "access_hash", None),
+            "resolved_at": _now().isoformat(),
+        }
+        self._dirty = True
+
+    def invalidate(self, key):
+        if self._entries.pop(key, None) is not None:
+            self._dirty = True
+
+    def save(self):
+        if not self._dirty:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+
+async def resolve_entity(client, identifier, cache=None, key=None):
+    if cache is None:
+        return await client.get_entity(identifier)
+
+    key = key or str(identifier)
+    entity = cache.get(key, identifier)
+    if entity is not None:
+        return entity
+
+    try:
+        entity = await client.get_entity(identifier)
+    except Exception:
+        cache.invalidate(key)
+        raise
+    cache.put(key, identifier, entity)
+    return entity
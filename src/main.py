@@ -1,26 +1,75 @@
+import asyncio
+import inspect
 import logging
+from time import monotonic
 
 from telethon import events
 
 from src.collector import handle_new_message
+from src.reconnect import ReconnectManager, extract_flood_wait_seconds, is_flood_wait
 
 logger = logging.getLogger(__name__)
 
 
-def setup_handlers(client, channel_map):
+def setup_handlers(client, channel_map, write_queue=None, media_scheduler=None):
     @client.on(events.NewMessage)
     async def new_message_handler(event):
-        await handle_new_message(event, channel_map)
+        await handle_new_message(event, channel_map, write_queue=write_queue, media_scheduler=media_scheduler)
 
     @client.on(events.MessageEdited)
     async def edited_message_handler(event):
-        await handle_new_message(event, channel_map, is_edit=True)
+        await handle_new_message(event, channel_map, is_edit=True, write_queue=write_queue)
 
 
-async def run_client(client, phone):
-    await client.start(phone=phone)
-    logger.info("Client connected, listening for messages...")
-    await client.run_until_disconnected()
+RETRYABLE_ERRORS = (OSError, asyncio.TimeoutError)
+
+
+def _track_catch_up(result, manager, started):
+    # 재연결 hook이 태스크를 돌려주면 보충 수집이 끝날 때까지 걸린 시간을 기록한다
+    if not inspect.isawaitable(result):
+        return
+
+    def _done(_):
+        manager.metrics["catch_up_sec"] += monotonic() - started
+        logger.info("Gap catch-up finished: %s", manager.metrics)
+
+    asyncio.ensure_future(result).add_done_callback(_done)
+
+
+async def run_client(client, phone, on_connected=None, reconnect=None):
+    manager = reconnect if reconnect is not None else ReconnectManager()
+    disconnected_at = None
+    connected_once = False
+
+    try:
+        while True:
+            try:
+                await client.start(phone=phone)
+                if connected_once:
+                    manager.metrics["disconnected_sec"] += monotonic() - disconnected_at
+                    _track_catch_up(manager.record_success(), manager, monotonic())
+                else:
+                    connected_once = True
+                    manager.attempt = 0
+                    if on_connected is not None:
+                        on_connected()
+                disconnected_at = None
+                logger.info("Client connected, listening for messages...")
+                await client.run_until_disconnected()
+                # 예외 없이 끝나면 의도한 종료(disconnect 호출)로 본다
+                return
+            except Exception as e:
+                if is_flood_wait(e):
+                    delay = manager.record_flood_wait(extract_flood_wait_seconds(e))
+                elif isinstance(e, RETRYABLE_ERRORS):
+                    delay = manager.record_failure()
+                else:
+                    raise
+                if disconnected_at is None:
+                    disconnected_at = monotonic()
+                await asyncio.sleep(delay)
+    finally:
+        logger.info("Realtime client stopped: %s", manager.metrics)
 
 
 if __name__ == "__main__":
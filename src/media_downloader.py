@@ -1,6 +1,9 @@
+import json
 import logging
 import os
 
+from src.media_store import media_key
+
 logger = logging.getLogger(__name__)
 
 
@@ -8,6 +11,39 @@ def generate_media_file_path(channel_alias, message_id, filename, data_dir="data
     return os.path.join(data_dir, channel_alias, "media", f"{message_id}_{filename}")
 
 
+def generate_media_index_path(channel_alias, data_dir="data"):
+    return os.path.join(data_dir, channel_alias, "media", "_index.jsonl")
+
+
+def record_media_file(channel_alias, message_id, file_path, data_dir="data"):
+    index_path = generate_media_index_path(channel_alias, data_dir)
+    os.makedirs(os.path.dirname(index_path), exist_ok=True)
+    media_file = os.path.relpath(file_path, os.path.join(data_dir, channel_alias))
+    # 이미 받아 둔 파일을 다시 돌려받은 경우 같은 줄을 또 쓰지 않는다 (다운로드 뒤 스레드에서만 불린다)
+    if load_media_files(channel_alias, data_dir).get(message_id) == media_file:
+        return media_file
+    with open(index_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"message_id": message_id, "media_file": media_file}, ensure_ascii=False) + "\n")
+    return media_file
+
+
+def load_media_files(channel_alias, data_dir="data"):
+    media_files = {}
+    index_path = generate_media_index_path(channel_alias, data_dir)
+    if not os.path.exists(index_path):
+        return media_files
+    with open(index_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                try:
+                    obj = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                media_files[obj["message_id"]] = obj["media_file"]
+    return media_files
+
+
 def should_skip_media(size_bytes, max_size_mb):
     max_bytes = max_size_mb * 1024 * 1024
     if size_bytes > max_bytes:
@@ -16,7 +52,8 @@ def should_skip_media(size_bytes, max_size_mb):
     return False
 
 
-async def download_media(client, message, channel_alias, download_enabled=True, max_size_mb=50, data_dir="data"):
+async def download_media(client, message, channel_alias, download_enabled=True, max_size_mb=50, data_dir="data",
+                         media_store=None):
     if not download_enabled:
         return None
 
@@ -30,6 +67,18 @@ async def download_media(client, message, channel_alias, download_enabled=True,
     filename = getattr(getattr(message, "file", None), "name", None) or f"{message.id}"
     file_path = generate_media_file_path(channel_alias, message.id, filename, data_dir)
 
+    if os.path.exists(file_path):
+        return file_path
+
+    key = media_key(message) if media_store is not None else None
+    if key is not None:
+        try:
+            blob_path = await media_store.fetch(client, message, key)
+            return media_store.link(blob_path, file_path)
+        except Exception as e:
+            logger.error("Failed to download media for message %s: %s", message.id, e)
+            return None
+
     os.makedirs(os.path.dirname(file_path), exist_ok=True)
 
     try:
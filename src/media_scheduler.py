@@ -0,0 +1,82 @@
+import asyncio
+import logging
+
+from src.media_downloader import download_media, record_media_file
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_PER_CHANNEL_LIMIT = 2
+
+
+class MediaDownloadScheduler:
+    def __init__(self, client, data_dir="data", download_enabled=True, max_size_mb=50,
+                 concurrency=DEFAULT_CONCURRENCY, per_channel_limit=DEFAULT_PER_CHANNEL_LIMIT, media_store=None):
+        self.client = client
+        self.media_store = media_store
+        self.data_dir = data_dir
+        self.download_enabled = download_enabled
+        self.max_size_mb = max_size_mb
+        self.per_channel_limit = per_channel_limit
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self._channel_semaphores = {}
+        self._scheduled = set()
+        self._tasks = set()
+        self.metrics = {"scheduled": 0, "downloaded": 0, "skipped": 0}
+
+    @property
+    def pending(self):
+        return len(self._tasks)
+
+    def schedule(self, message, channel_alias):
+        if not self.download_enabled or not message.media:
+            return None
+
+        key = (channel_alias, message.id)
+        if key in self._scheduled:
+            return None
+        self._scheduled.add(key)
+
+        task = asyncio.create_task(self._download(message, channel_alias))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        self.metrics["scheduled"] += 1
+        return task
+
+    async def _download(self, message, channel_alias):
+        try:
+            return await self._fetch(message, channel_alias)
+        finally:
+            # 끝난 메시지는 잊는다 — 다시 들어와도 download_media가 기존 파일을 그대로 돌려준다
+            self._scheduled.discard((channel_alias, message.id))
+
+    async def _fetch(self, message, channel_alias):
+        # 채널별 한도를 먼저 잡아 한 채널의 폭주가 전체 슬롯을 독점하지 못하게 한다
+        channel_semaphore = self._channel_semaphores.setdefault(
+            channel_alias, asyncio.Semaphore(max(1, self.per_channel_limit)),
+        )
+        async with channel_semaphore:
+            async with self._semaphore:
+                file_path = await download_media(
+                    self.client, message, channel_alias,
+                    download_enabled=True,
+                    max_size_mb=self.max_size_mb,
+                    data_dir=self.data_dir,
+                    media_store=self.media_store,
+                )
+
+        if file_path is None:
+            self.metrics["skipped"] += 1
+            return None
+
+        try:
+            await asyncio.to_thread(record_media_file, channel_alias, message.id, file_path, self.data_dir)
+        except OSError as e:
+            logger.error("Failed to record media file for message %s: %s", message.id, e)
+        self.metrics["downloaded"] += 1
+        return file_path
+
+    async def close(self):
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+        logger.info("Media download scheduler closed: %s", self.metrics)
@@ -0,0 +1,129 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def media_key(message):
+    # 다운로드 전에 알 수 있는 텔레그램 미디어 식별자 (같은 파일은 전달돼도 id/access_hash가 같다)
+    for kind in ("photo", "document"):
+        media = getattr(message, kind, None)
+        media_id = getattr(media, "id", None)
+        if isinstance(media_id, int):
+            return f"{kind}_{media_id}_{getattr(media, 'access_hash', 0)}"
+    return None
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class MediaStore:
+    def __init__(self, data_dir="data"):
+        self.root = os.path.join(data_dir, "_media")
+        self.index_path = os.path.join(self.root, "_index.jsonl")
+        self._by_key = {}
+        self._by_hash = {}
+        self._inflight = {}
+        self.metrics = {"hits": 0, "downloads": 0, "content_dedup": 0, "bytes_saved": 0}
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                self._by_key[entry["key"]] = entry
+                self._by_hash[entry["sha256"]] = entry
+
+    def lookup(self, key):
+        entry = self._by_key.get(key)
+        if entry is None:
+            return None
+        blob_path = os.path.join(self.root, entry["blob"])
+        if not os.path.exists(blob_path):
+            return None
+        return blob_path
+
+    def _record(self, entry):
+        with open(self.index_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._by_key[entry["key"]] = entry
+        self._by_hash.setdefault(entry["sha256"], entry)
+
+    def _ingest(self, key, tmp_path):
+        sha256 = _file_sha256(tmp_path)
+        size = os.path.getsize(tmp_path)
+        existing = self._by_hash.get(sha256)
+
+        if existing is not None and os.path.exists(os.path.join(self.root, existing["blob"])):
+            # 다른 id로 다시 올라온 같은 내용: 새 blob을 만들지 않고 기존 blob을 가리킨다
+            os.remove(tmp_path)
+            blob = existing["blob"]
+            self.metrics["content_dedup"] += 1
+            self.metrics["bytes_saved"] += size
+        else:
+            ext = os.path.splitext(tmp_path)[1]
+            blob = os.path.join(sha256[:2], f"{sha256}{ext}")
+            os.makedirs(os.path.join(self.root, sha256[:2]), exist_ok=True)
+            os.replace(tmp_path, os.path.join(self.root, blob))
+
+        self._record({"key": key, "blob": blob, "sha256": sha256, "size": size})
+        return os.path.join(self.root, blob)
+
+    async def _download(self, client, message, key):
+        tmp_dir = os.path.join(self.root, "tmp")
+        os.makedirs(tmp_dir, exist_ok=True)
+        ext = getattr(getattr(message, "file", None), "ext", None) or ""
+        downloaded = await client.download_media(message, file=os.path.join(tmp_dir, f"{key}{ext}"))
+        self.metrics["downloads"] += 1
+        return await asyncio.to_thread(self._ingest, key, downloaded)
+
+    async def fetch(self, client, message, key):
+        blob_path = self.lookup(key)
+        if blob_path is not None:
+            self.metrics["hits"] += 1
+            size = self._by_key[key]["size"]
+            self.metrics["bytes_saved"] += size
+            return blob_path
+
+        # 같은 미디어를 여러 채널이 동시에 요청하면 한 번만 내려받는다
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.metrics["hits"] += 1
+            return await asyncio.shield(inflight)
+
+        future = asyncio.ensure_future(self._download(client, message, key))
+        self._inflight[key] = future
+        try:
+            return await future
+        finally:
+            self._inflight.pop(key, None)
+
+    def link(self, blob_path, file_path):
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        try:
+            os.link(blob_path, file_path)
+        except FileExistsError:
+            pass
+        except OSError as e:
+            # 하드링크를 못 쓰는 파일시스템이면 저장소 경로 자체를 참조로 돌려준다
+            logger.debug("Hardlink failed for %s, referencing store blob: %s", file_path, e)
+            return blob_path
+        return file_path
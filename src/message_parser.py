@@ -3,6 +3,123 @@ from datetime import datetime, timezone
 
 logger = logging.getLogger(__name__)
 
+FIELDS = (
+    "message_id",
+    "channel_id",
+    "channel_alias",
+    "date",
+    "text",
+    "has_media",
+    "media_type",
+    "media_file",
+    "views",
+    "forwards",
+    "edit_date",
+    "is_edit",
+    "collected_at",
+)
+_FIELD_SET = frozenset(FIELDS)
+
+
+class MessageRecord:
+    # dict 대신 slot에 값을 담고, 날짜 ISO 문자열은 처음 읽을 때 한 번만 만든다
+    __slots__ = (
+        "message_id", "channel_id", "channel_alias", "text", "has_media", "media_type", "media_file",
+        "views", "forwards", "is_edit", "collected_at", "_date", "_date_iso", "_edit_date", "_edit_date_iso",
+    )
+
+    def __init__(self, message_id, channel_id, channel_alias, date, text, has_media, media_type,
+                 views, forwards, edit_date, is_edit, collected_at, media_file=None):
+        self.message_id = message_id
+        self.channel_id = channel_id
+        self.channel_alias = channel_alias
+        self.text = text
+        self.has_media = has_media
+        self.media_type = media_type
+        self.media_file = media_file
+        self.views = views
+        self.forwards = forwards
+        self.is_edit = is_edit
+        self.collected_at = collected_at
+        self._date = date
+        self._date_iso = None
+        self._edit_date = edit_date
+        self._edit_date_iso = None
+
+    @property
+    def date(self):
+        if self._date_iso is None:
+            self._date_iso = self._date.isoformat()
+        return self._date_iso
+
+    @date.setter
+    def date(self, value):
+        self._date_iso = value
+
+    @property
+    def edit_date(self):
+        if self._edit_date_iso is None and self._edit_date is not None:
+            self._edit_date_iso = self._edit_date.isoformat()
+        return self._edit_date_iso
+
+    @edit_date.setter
+    def edit_date(self, value):
+        self._edit_date = None
+        self._edit_date_iso = value
+
+    # 저장/색인 코드가 dict처럼 읽을 수 있도록 최소한의 mapping 인터페이스를 제공한다
+    def __getitem__(self, key):
+        if key not in _FIELD_SET:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in _FIELD_SET:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in _FIELD_SET
+
+    def __iter__(self):
+        return iter(FIELDS)
+
+    def __len__(self):
+        return len(FIELDS)
+
+    def __eq__(self, other):
+        if isinstance(other, (MessageRecord, dict)):
+            return self.to_dict() == dict(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"MessageRecord({self.to_dict()!r})"
+
+    def get(self, key, default=None):
+        if key not in _FIELD_SET:
+            return default
+        return getattr(self, key)
+
+    def keys(self):
+        return FIELDS
+
+    def to_dict(self):
+        return {
+            "message_id": self.message_id,
+            "channel_id": self.channel_id,
+            "channel_alias": self.channel_alias,
+            "date": self.date,
+            "text": self.text,
+            "has_media": self.has_media,
+            "media_type": self.media_type,
+            "media_file": self.media_file,
+            "views": self.views,
+            "forwards": self.forwards,
+            "edit_date": self.edit_date,
+            "is_edit": self.is_edit,
+            "collected_at": self.collected_at,
+        }
+
 
 def _detect_media_type(message):
     if message.media is None:
@@ -16,26 +133,44 @@ def _detect_media_type(message):
     return None
 
 
-def parse_message(message, channel_alias="", is_edit=False):
-    try:
-        edit_date = getattr(message, "edit_date", None)
+def _parse_record(message, channel_alias, is_edit, collected_at):
+    date = message.date
+    edit_date = getattr(message, "edit_date", None)
+    # ISO 변환을 미루므로 잘못된 날짜는 여기서 걸러야 저장 시점에 터지지 않는다
+    if not isinstance(date, datetime):
+        raise TypeError(f"message date is not a datetime: {type(date).__name__}")
+    if edit_date is not None and not isinstance(edit_date, datetime):
+        edit_date = None
 
-        return {
-            "message_id": message.id,
-            "channel_id": message.chat_id,
-            "channel_alias": channel_alias,
-            "date": message.date.isoformat(),
-            "text": message.text or "",
-            "has_media": message.media is not None,
-            "media_type": _detect_media_type(message),
-            "media_file": None,
-            "views": getattr(message, "views", None),
-            "forwards": getattr(message, "forwards", None),
-            "edit_date": edit_date.isoformat() if edit_date else None,
-            "is_edit": is_edit,
-            "collected_at": datetime.now(timezone.utc).isoformat(),
-        }
-    except Exception as e:
-        msg_id = getattr(message, "id", "unknown")
-        logger.error("Failed to parse message %s: %s", msg_id, e)
-        return None
+    return MessageRecord(
+        message_id=message.id,
+        channel_id=message.chat_id,
+        channel_alias=channel_alias,
+        date=date,
+        text=message.text or "",
+        has_media=message.media is not None,
+        media_type=_detect_media_type(message),
+        views=getattr(message, "views", None),
+        forwards=getattr(message, "forwards", None),
+        edit_date=edit_date,
+        is_edit=is_edit,
+        collected_at=collected_at,
+    )
+
+
+def parse_messages(messages, channel_alias="", is_edit=False):
+    # collected_at은 배치마다 한 번만 계산해 모든 레코드가 같은 문자열을 공유한다
+    collected_at = datetime.now(timezone.utc).isoformat()
+    records = []
+    for message in messages:
+        try:
+            records.append(_parse_record(message, channel_alias, is_edit, collected_at))
+        except Exception as e:
+            msg_id = getattr(message, "id", "unknown")
+            logger.error("Failed to parse message %s: %s", msg_id, e)
+    return records
+
+
+def parse_message(message, channel_alias="", is_edit=False):
+    records = parse_messages([message], channel_alias, is_edit=is_edit)
+    return records[0] if records else None
@@ -1,38 +1,192 @@
 import json
+import logging
 import os
 import threading
+from contextlib import contextmanager
 
-_lock = threading.Lock()
+from src.serialization import dumps_line, loads
 
+try:
+    import fcntl
+except ImportError:  # Windows: 프로세스 간 락 없이 프로세스 안의 락만 쓴다
+    fcntl = None
 
-def load_metadata(filepath):
+logger = logging.getLogger(__name__)
+
+JOURNAL_SUFFIX = ".journal"
+LOCK_SUFFIX = ".lock"
+# journal이 이 줄 수를 넘으면 스냅샷으로 합치고 비운다
+COMPACT_EVERY = 1000
+
+_lock = threading.RLock()
+_states = {}
+_held_file_locks = set()
+
+
+def generate_journal_path(filepath):
+    return filepath + JOURNAL_SUFFIX
+
+
+@contextmanager
+def _file_lock(filepath, shared=False):
+    # realtime/batch/CLI 프로세스가 같은 메타데이터를 쓰므로 상태 로드 → append → 압축을 파일 락으로 묶는다.
+    # 항상 _lock을 쥔 채로 부르며, 같은 프로세스 안에서 중첩되면 바깥 락을 그대로 쓴다
+    # 아직 메타데이터가 없으면 읽을 것도 없으므로 락 파일을 만들지 않는다
+    directory = os.path.dirname(filepath)
+    if fcntl is None or filepath in _held_file_locks or (shared and _signature(filepath) == (None, None)):
+        yield
+        return
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    fd = os.open(filepath + LOCK_SUFFIX, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        _held_file_locks.add(filepath)
+        yield
+    finally:
+        _held_file_locks.discard(filepath)
+        os.close(fd)
+
+
+def _file_signature(filepath):
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return None
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+def _signature(filepath):
+    return (_file_signature(filepath), _file_signature(generate_journal_path(filepath)))
+
+
+def _read_snapshot(filepath):
     if not os.path.exists(filepath):
         return {}
     try:
         with open(filepath, "r", encoding="utf-8") as f:
-            return json.load(f)
+            data = json.load(f)
     except (json.JSONDecodeError, ValueError):
+        logger.error(f"Corrupted metadata snapshot, starting from journal only: {filepath}")
         return {}
+    return data if isinstance(data, dict) else {}
 
 
-def save_metadata(filepath, data):
-    with open(filepath, "w", encoding="utf-8") as f:
+def _replay_journal(filepath, data):
+    journal_path = generate_journal_path(filepath)
+    if not os.path.exists(journal_path):
+        return 0
+
+    lines = 0
+    good_offset = 0
+    offset = 0
+    with open(journal_path, "rb") as f:
+        for raw in f:
+            offset += len(raw)
+            if not raw.endswith(b"\n"):
+                break
+            try:
+                record = loads(raw)
+                data[record["alias"]] = record["entry"]
+            except (json.JSONDecodeError, UnicodeDecodeError, KeyError, TypeError):
+                logger.error(f"Skipping corrupted metadata journal line at offset {good_offset}: {journal_path}")
+            else:
+                lines += 1
+            good_offset = offset
+
+    if good_offset < offset:
+        # 쓰다 만 마지막 줄은 잘라내야 다음 append가 깨진 줄에 이어 붙지 않는다
+        logger.warning(f"Truncating torn metadata journal tail ({offset - good_offset} bytes): {journal_path}")
+        with open(journal_path, "r+b") as f:
+            f.truncate(good_offset)
+    return lines
+
+
+def _get_state(filepath):
+    signature = _signature(filepath)
+    state = _states.get(filepath)
+    if state is not None and state["signature"] == signature:
+        return state
+
+    # 처음 보거나 다른 프로세스가 파일을 바꾼 경우에만 스냅샷 + journal을 다시 읽는다
+    data = _read_snapshot(filepath)
+    lines = _replay_journal(filepath, data)
+    state = {"data": data, "journal_lines": lines, "signature": _signature(filepath)}
+    _states[filepath] = state
+    return state
+
+
+def load_metadata(filepath):
+    with _lock, _file_lock(filepath, shared=True):
+        data = _get_state(filepath)["data"]
+        return {alias: dict(entry) for alias, entry in data.items()}
+
+
+def _write_snapshot(filepath, data):
+    tmp_path = f"{filepath}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, filepath)
+
+    # 스냅샷 교체 후 journal이 남아 있어도 재생 결과는 같다 (줄마다 채널 전체 상태를 기록)
+    journal_path = generate_journal_path(filepath)
+    if os.path.exists(journal_path):
+        os.remove(journal_path)
+
+
+def save_metadata(filepath, data):
+    with _lock, _file_lock(filepath):
+        _write_snapshot(filepath, data)
+        _states[filepath] = {
+            "data": {alias: dict(entry) for alias, entry in data.items()},
+            "journal_lines": 0,
+            "signature": _signature(filepath),
+        }
+
+
+def compact_metadata(filepath):
+    with _lock, _file_lock(filepath):
+        state = _get_state(filepath)
+        if state["journal_lines"] or not os.path.exists(filepath):
+            _write_snapshot(filepath, state["data"])
+            state["journal_lines"] = 0
+            state["signature"] = _signature(filepath)
+
+
+def _append_journal(filepath, channel_alias, entry):
+    directory = os.path.dirname(filepath)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    line = dumps_line({"alias": channel_alias, "entry": entry})
+    with open(generate_journal_path(filepath), "a", encoding="utf-8") as f:
+        f.write(line)
+
+
+@contextmanager
+def channel_transaction(filepath, channel_alias):
+    # 본문에 await가 없으므로 asyncio 태스크끼리는 섞이지 않는다. _lock은 스레드 간, 파일 락은 프로세스 간 보호용.
+    with _lock, _file_lock(filepath):
+        state = _get_state(filepath)
+        entry = dict(state["data"].get(channel_alias, {}))
+        yield entry
+
+        # 채널 하나의 상태만 한 줄로 append — 채널 수와 무관하게 O(1)
+        _append_journal(filepath, channel_alias, entry)
+        state["data"][channel_alias] = entry
+        state["journal_lines"] += 1
+        state["signature"] = _signature(filepath)
+        if state["journal_lines"] >= COMPACT_EVERY:
+            compact_metadata(filepath)
 
 
-def update_channel(filepath, channel_alias, **kwargs):
-    with _lock:
-        data = load_metadata(filepath)
-        if channel_alias not in data:
-            data[channel_alias] = {}
-        data[channel_alias].update(kwargs)
-        save_metadata(filepath, data)
+def update_channel(filepath, channel_alias, increments=None, **kwargs):
+    with channel_transaction(filepath, channel_alias) as entry:
+        entry.update(kwargs)
+        for key, delta in (increments or {}).items():
+            entry[key] = entry.get(key, 0) + delta
 
 
-def increment_collected(filepath, channel_alias):
-    with _lock:
-        data = load_metadata(filepath)
-        if channel_alias not in data:
-            data[channel_alias] = {}
-        data[channel_alias]["total_collected"] = data[channel_alias].get("total_collected", 0) + 1
-        save_metadata(filepath, data)
+def increment_collected(filepath, channel_alias, count=1):
+    update_channel(filepath, channel_alias, increments={"total_collected": count})
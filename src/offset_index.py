@@ -0,0 +1,243 @@
+import gzip
+import logging
+import mmap
+import os
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+
+from src.serialization import loads
+
+logger = logging.getLogger(__name__)
+
+INDEX_SUFFIX = ".idx"
+MAX_LOADED_INDEXES = 256
+# message_id, 오프셋, 길이 — 압축 파일은 줄이 아니라 그 줄이 들어 있는 gzip frame의 위치를 가리킨다
+ENTRY = struct.Struct("<qQI")
+
+_lock = threading.Lock()
+_loaded = OrderedDict()
+
+
+def generate_index_path(filepath):
+    return filepath + INDEX_SUFFIX
+
+
+def _is_compressed(filepath):
+    return filepath.endswith(".gz")
+
+
+def _file_signature(filepath):
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return None
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+def _message_id(raw):
+    try:
+        obj = loads(raw)
+    except (ValueError, UnicodeDecodeError):
+        return None
+    msg_id = obj.get("message_id") if isinstance(obj, dict) else None
+    return msg_id if isinstance(msg_id, int) else None
+
+
+def _scan_plain(filepath):
+    entries = []
+    offset = 0
+    with open(filepath, "rb") as f:
+        for raw in f:
+            msg_id = _message_id(raw) if raw.endswith(b"\n") else None
+            if msg_id is not None:
+                entries.append((msg_id, offset, len(raw)))
+            offset += len(raw)
+    return entries
+
+
+def _scan_frames(filepath):
+    entries = []
+    with open(filepath, "rb") as f:
+        data = f.read()
+    offset = 0
+    while offset < len(data):
+        decompressor = zlib.decompressobj(wbits=31)
+        try:
+            payload = decompressor.decompress(data[offset:])
+        except zlib.error as e:
+            logger.error(f"Stopping index scan at corrupted frame {offset} in {filepath}: {e}")
+            break
+        if not decompressor.eof:
+            break
+        frame_length = len(data) - offset - len(decompressor.unused_data)
+        for raw in payload.splitlines(keepends=True):
+            msg_id = _message_id(raw)
+            if msg_id is not None:
+                entries.append((msg_id, offset, frame_length))
+        offset += frame_length
+    return entries
+
+
+def frame_entries(lines, frame_offset, frame_length):
+    entries = []
+    for raw in lines:
+        msg_id = _message_id(raw)
+        if msg_id is not None:
+            entries.append((msg_id, frame_offset, frame_length))
+    return entries
+
+
+def line_entries(lines, start_offset):
+    entries = []
+    offset = start_offset
+    for line in lines:
+        raw = line.encode("utf-8") if isinstance(line, str) else line
+        msg_id = _message_id(raw)
+        if msg_id is not None:
+            entries.append((msg_id, offset, len(raw)))
+        offset += len(raw)
+    return entries
+
+
+def append_entries(filepath, entries):
+    if not entries:
+        return
+    with open(generate_index_path(filepath), "ab") as f:
+        f.write(b"".join(ENTRY.pack(*entry) for entry in entries))
+
+
+def remove_index(filepath):
+    index_path = generate_index_path(filepath)
+    if os.path.exists(index_path):
+        os.remove(index_path)
+    with _lock:
+        _loaded.pop(filepath, None)
+
+
+def write_index(filepath, entries):
+    index_path = generate_index_path(filepath)
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(b"".join(ENTRY.pack(*entry) for entry in entries))
+    os.replace(tmp_path, index_path)
+
+
+def rebuild_index(filepath):
+    entries = _scan_frames(filepath) if _is_compressed(filepath) else _scan_plain(filepath)
+    write_index(filepath, entries)
+    return entries
+
+
+def _read_entries(filepath):
+    index_path = generate_index_path(filepath)
+    if not os.path.exists(index_path):
+        return None
+    with open(index_path, "rb") as f:
+        data = f.read()
+    usable = len(data) - len(data) % ENTRY.size
+    return list(ENTRY.iter_unpack(data[:usable]))
+
+
+def _covers_file(filepath, entries):
+    size = os.path.getsize(filepath)
+    if not entries:
+        return size == 0
+    # 평문은 줄이 빈틈없이 이어져야 하고, 압축본은 마지막 frame이 파일 끝에 닿아야 한다
+    if _is_compressed(filepath):
+        return entries[0][1] == 0 and entries[-1][1] + entries[-1][2] == size
+    end = 0
+    for _, offset, length in entries:
+        if offset != end:
+            return False
+        end = offset + length
+    return end == size
+
+
+def load_index(filepath):
+    signature = (_file_signature(filepath), _file_signature(generate_index_path(filepath)))
+    if signature[0] is None:
+        return None
+
+    with _lock:
+        cached = _loaded.get(filepath)
+        if cached is not None and cached["signature"] == signature:
+            _loaded.move_to_end(filepath)
+            return cached
+
+    entries = _read_entries(filepath)
+    if entries is None or not _covers_file(filepath, entries):
+        # 색인이 없거나 데이터 파일과 어긋나면 그 자리에서 다시 만든다
+        entries = rebuild_index(filepath)
+        signature = (_file_signature(filepath), _file_signature(generate_index_path(filepath)))
+
+    by_id = {}
+    for msg_id, offset, length in entries:
+        by_id.setdefault(msg_id, []).append((offset, length))
+    ids_desc = sorted(by_id, reverse=True)
+    loaded = {
+        "signature": signature,
+        "by_id": by_id,
+        "ids_desc": ids_desc,
+        "min_id": ids_desc[-1] if ids_desc else None,
+        "max_id": ids_desc[0] if ids_desc else None,
+    }
+    with _lock:
+        _loaded[filepath] = loaded
+        while len(_loaded) > MAX_LOADED_INDEXES:
+            _loaded.popitem(last=False)
+    return loaded
+
+
+def clear_loaded_indexes():
+    with _lock:
+        _loaded.clear()
+
+
+def _read_locations(filepath, locations, message_id):
+    if not locations:
+        return []
+    records = []
+    with open(filepath, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        for offset, length in locations:
+            chunk = mapped[offset:offset + length]
+            if not _is_compressed(filepath):
+                records.append(loads(chunk))
+                continue
+            for raw in gzip.decompress(chunk).splitlines():
+                if _message_id(raw) == message_id:
+                    records.append(loads(raw))
+                    break
+    return records
+
+
+def read_versions(filepath, message_id):
+    index = load_index(filepath)
+    if index is None:
+        return []
+    locations = index["by_id"].get(message_id, [])
+    try:
+        records = _read_locations(filepath, locations, message_id)
+    except (OSError, ValueError, zlib.error) as e:
+        logger.error(f"Indexed read of message {message_id} from {filepath} failed: {e}")
+        records = []
+    if len(records) != len(locations) or any(record.get("message_id") != message_id for record in records):
+        # 외부에서 파일이 바뀌어 오프셋이 어긋난 경우: 한 번 다시 만들고 다시 읽는다
+        logger.warning(f"Offset index for {filepath} is stale, rebuilding")
+        rebuild_index(filepath)
+        index = load_index(filepath)
+        records = _read_locations(filepath, index["by_id"].get(message_id, []), message_id)
+    return records
+
+
+def read_message(filepath, message_id):
+    records = read_versions(filepath, message_id)
+    return records[0] if records else None
+
+
+def latest_ids(filepath, n):
+    index = load_index(filepath)
+    if index is None:
+        return []
+    return index["ids_desc"][:n]
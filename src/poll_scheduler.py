@@ -0,0 +1,118 @@
+import heapq
+import logging
+import time
+from datetime import datetime, timezone
+
+from src.metadata import load_metadata, update_channel
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MIN_INTERVAL_SEC = 60
+DEFAULT_MAX_INTERVAL_SEC = 3600
+# 새 관측값의 가중치 — 클수록 게시 속도 변화에 빨리 반응한다
+DEFAULT_ALPHA = 0.3
+# 한 번 폴링할 때 기대하는 새 메시지 수. 1이면 평균적으로 글 하나마다 한 번 조회한다
+TARGET_MESSAGES_PER_POLL = 1.0
+
+
+def _parse_time(value):
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+class AdaptivePollScheduler:
+    def __init__(self, channels, metadata_path, default_interval_sec=300,
+                 min_interval_sec=DEFAULT_MIN_INTERVAL_SEC, max_interval_sec=DEFAULT_MAX_INTERVAL_SEC,
+                 alpha=DEFAULT_ALPHA, now=None):
+        self.metadata_path = metadata_path
+        self.min_interval_sec = min_interval_sec
+        self.max_interval_sec = max(min_interval_sec, max_interval_sec)
+        self.default_interval_sec = min(max(default_interval_sec, min_interval_sec), self.max_interval_sec)
+        self.alpha = alpha
+        self.channels = {ch["alias"]: ch for ch in channels if ch.get("enabled", False)}
+        self._state = {}
+        self._heap = []
+
+        now = time.time() if now is None else now
+        metadata = load_metadata(metadata_path)
+        for alias in self.channels:
+            entry = metadata.get(alias, {})
+            rate = entry.get("post_rate_per_hour")
+            last_polled = _parse_time(entry.get("last_polled_at")) or _parse_time(entry.get("last_collected_at"))
+            self._state[alias] = {
+                "rate_per_sec": rate / 3600 if isinstance(rate, (int, float)) else None,
+                "last_polled": last_polled,
+                "due": None,
+            }
+            # 재시작 직후에는 저장된 속도로 다음 조회 시각을 이어 가되, 처음 보는 채널은 바로 조회한다
+            self._schedule(alias, now if last_polled is None else last_polled + self.interval_for(alias))
+
+    def _schedule(self, alias, due):
+        # 이전 예약은 heap에서 지우지 않고, 꺼낼 때 state의 due와 다르면 버린다
+        self._state[alias]["due"] = due
+        heapq.heappush(self._heap, (due, alias))
+
+    def _drop_stale(self):
+        while self._heap and self._state[self._heap[0][1]]["due"] != self._heap[0][0]:
+            heapq.heappop(self._heap)
+
+    def rate_per_hour(self, alias):
+        rate = self._state[alias]["rate_per_sec"]
+        return None if rate is None else rate * 3600
+
+    def interval_for(self, alias):
+        rate = self._state[alias]["rate_per_sec"]
+        if rate is None:
+            return self.default_interval_sec
+        if rate <= 0:
+            return self.max_interval_sec
+        return min(max(TARGET_MESSAGES_PER_POLL / rate, self.min_interval_sec), self.max_interval_sec)
+
+    def next_due(self):
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now=None):
+        now = time.time() if now is None else now
+        due = []
+        self._drop_stale()
+        while self._heap and self._heap[0][0] <= now:
+            alias = heapq.heappop(self._heap)[1]
+            self._state[alias]["due"] = None
+            due.append(self.channels[alias])
+            self._drop_stale()
+        return due
+
+    def requeue(self, alias, now=None):
+        # 주기 마감으로 조회하지 못한 채널은 게시 속도를 갱신하지 않고 바로 다시 대기열에 넣는다
+        self._schedule(alias, time.time() if now is None else now)
+
+    def record(self, alias, count, now=None, backlog=False):
+        now = time.time() if now is None else now
+        state = self._state[alias]
+        if state["last_polled"] is not None and now > state["last_polled"]:
+            observed = count / (now - state["last_polled"])
+            if state["rate_per_sec"] is None:
+                state["rate_per_sec"] = observed
+            else:
+                state["rate_per_sec"] = self.alpha * observed + (1 - self.alpha) * state["rate_per_sec"]
+        state["last_polled"] = now
+
+        # 페이지 한도에 걸려 밀린 메시지가 남았으면 속도와 무관하게 곧바로 다시 조회한다
+        interval = self.min_interval_sec if backlog else self.interval_for(alias)
+        self._schedule(alias, now + interval)
+
+        rate = self.rate_per_hour(alias)
+        fields = {"last_polled_at": datetime.fromtimestamp(now, timezone.utc).isoformat()}
+        if rate is not None:
+            fields["post_rate_per_hour"] = round(rate, 4)
+        update_channel(self.metadata_path, alias, **fields)
+        logger.debug("Next poll of %s in %ds (%.2f msgs/h)", alias, interval, rate or 0)
+        return interval
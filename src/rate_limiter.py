@@ -0,0 +1,110 @@
+import asyncio
+import logging
+from time import monotonic
+
+from src.reconnect import extract_flood_wait_seconds, is_flood_wait
+
+logger = logging.getLogger(__name__)
+
+# 텔레그램 한도는 메서드 종류별로 따로 걸리므로 버킷도 종류별로 나눈다
+METHOD_CLASSES = {
+    "get_entity": "resolve",
+    "get_input_entity": "resolve",
+    "get_messages": "history",
+    "get_dialogs": "history",
+    "download_media": "download",
+}
+DEFAULT_RATES_PER_MIN = {"resolve": 30, "history": 300, "download": 120}
+DEFAULT_FLOOD_RETRIES = 1
+
+
+class TokenBucket:
+    def __init__(self, rate_per_sec, capacity):
+        self.rate_per_sec = rate_per_sec
+        self.capacity = max(1, capacity)
+        self.tokens = float(self.capacity)
+        self.blocked_until = 0.0
+        self._updated = monotonic()
+        self._lock = asyncio.Lock()
+        self.stats = {"calls": 0, "throttled_sec": 0.0, "flood_waits": 0, "flood_wait_sec": 0}
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate_per_sec)
+        self._updated = now
+
+    async def acquire(self):
+        started = monotonic()
+        # 락을 잡은 채로 기다려 대기 순서대로 토큰을 받는다
+        async with self._lock:
+            while True:
+                now = monotonic()
+                self._refill(now)
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    break
+                await asyncio.sleep((1 - self.tokens) / self.rate_per_sec)
+        self.stats["calls"] += 1
+        self.stats["throttled_sec"] += monotonic() - started
+
+    def pause(self, seconds):
+        # FloodWait 동안 이 종류의 호출만 멈추고, 재개 시 버스트가 몰리지 않게 토큰을 비운다
+        self.blocked_until = max(self.blocked_until, monotonic() + seconds)
+        self.tokens = 0.0
+        self.stats["flood_waits"] += 1
+        self.stats["flood_wait_sec"] += seconds
+
+
+class RateLimiter:
+    def __init__(self, rates_per_min=None, flood_retries=DEFAULT_FLOOD_RETRIES):
+        rates = dict(DEFAULT_RATES_PER_MIN)
+        rates.update(rates_per_min or {})
+        self.flood_retries = flood_retries
+        self.buckets = {
+            method_class: TokenBucket(per_min / 60, capacity=per_min // 10)
+            for method_class, per_min in rates.items()
+        }
+
+    async def call(self, method_class, func, *args, **kwargs):
+        bucket = self.buckets[method_class]
+        attempt = 0
+        while True:
+            await bucket.acquire()
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                if not is_flood_wait(e):
+                    raise
+                seconds = extract_flood_wait_seconds(e)
+                bucket.pause(seconds)
+                logger.warning("FloodWait on %s calls: pausing %ds", method_class, seconds)
+                if attempt >= self.flood_retries:
+                    raise
+                attempt += 1
+
+    def stats(self):
+        return {method_class: dict(bucket.stats) for method_class, bucket in self.buckets.items()}
+
+
+class RateLimitedClient:
+    # 알려진 API 메서드만 버킷을 거치고, 나머지 속성(on, start, disconnect 등)은 그대로 넘긴다
+    def __init__(self, client, limiter):
+        self._client = client
+        self.rate_limiter = limiter
+
+    @property
+    def client(self):
+        return self._client
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        method_class = METHOD_CLASSES.get(name)
+        if method_class is None:
+            return attr
+
+        async def limited(*args, **kwargs):
+            return await self.rate_limiter.call(method_class, attr, *args, **kwargs)
+
+        return limited
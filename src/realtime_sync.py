@@ -0,0 +1,159 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+from time import monotonic
+
+from src.batch_collector import (
+    DEFAULT_MAX_PAGES,
+    DEFAULT_TIME_BUDGET_SEC,
+    catch_up_channel,
+    fetch_latest_messages,
+    get_last_message_id,
+)
+from src.metadata import update_channel
+
+logger = logging.getLogger(__name__)
+
+
+class RealtimeCatchUp:
+    # 채널별 high-water mark는 catch-up이 live head까지 따라잡은 뒤에만 실시간 저장분으로 전진한다
+    def __init__(self, client, channels, metadata_path, data_dir="data", concurrency=1,
+                 max_pages=DEFAULT_MAX_PAGES, time_budget_sec=DEFAULT_TIME_BUDGET_SEC,
+                 media_scheduler=None, storage=None):
+        self.client = client
+        self.channels = {ch["alias"]: ch for ch in channels}
+        self.metadata_path = metadata_path
+        self.data_dir = data_dir
+        self.max_pages = max_pages
+        self.time_budget_sec = time_budget_sec
+        self.media_scheduler = media_scheduler
+        self.storage = storage
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self._synced = {alias: False for alias in self.channels}
+        self._live_max = {}
+        self._tasks = {}
+        self._pending = set()
+        self.metrics = {"catch_ups": 0, "caught_up_messages": 0, "catch_up_sec": 0.0, "failed": 0}
+
+    def is_synced(self, channel_alias):
+        return self._synced.get(channel_alias, False)
+
+    def start(self):
+        # 시작/재연결 시 호출: 모든 채널을 다시 체크포인트부터 live head까지 훑는다
+        for alias in self.channels:
+            self.request(alias)
+        return asyncio.ensure_future(self.wait())
+
+    def request(self, channel_alias):
+        if channel_alias not in self.channels:
+            return None
+        self._synced[channel_alias] = False
+        task = self._tasks.get(channel_alias)
+        if task is not None and not task.done():
+            # 진행 중인 catch-up이 이미 지나간 구간일 수 있으므로 끝난 뒤 한 번 더 돈다
+            self._pending.add(channel_alias)
+            return task
+        task = asyncio.create_task(self._run_channel(channel_alias))
+        self._tasks[channel_alias] = task
+        return task
+
+    def on_written(self, channel_alias, msgs, stored):
+        if channel_alias not in self.channels:
+            return
+        lost = {msg["message_id"] for msg in msgs} - {msg["message_id"] for msg in stored}
+        if lost:
+            # 실시간 저장이 일부 실패하면 체크포인트를 멈추고 catch-up으로 빈 구간을 다시 받는다
+            logger.warning("Realtime write for %s lost %d messages, scheduling catch-up", channel_alias, len(lost))
+            self.request(channel_alias)
+            return
+
+        live_ids = [msg["message_id"] for msg in stored if not msg.get("is_edit")]
+        if not live_ids:
+            return
+        self._live_max[channel_alias] = max(self._live_max.get(channel_alias, 0), max(live_ids))
+        if self._synced.get(channel_alias):
+            self._advance(channel_alias)
+
+    def _advance(self, channel_alias):
+        live_max = self._live_max.get(channel_alias, 0)
+        if live_max <= get_last_message_id(self.metadata_path, channel_alias):
+            return
+        update_channel(
+            self.metadata_path, channel_alias,
+            last_message_id=live_max,
+            last_collected_at=datetime.now(timezone.utc).isoformat(),
+        )
+
+    async def _run_channel(self, channel_alias):
+        while True:
+            if not await self._catch_up(channel_alias):
+                self._pending.discard(channel_alias)
+                return
+            if channel_alias not in self._pending:
+                break
+            self._pending.discard(channel_alias)
+
+        self._synced[channel_alias] = True
+        self._advance(channel_alias)
+
+    async def _seed_checkpoint(self, channel_alias, entity):
+        # 체크포인트가 없는 채널은 과거 이력을 받지 않고 현재 head부터 실시간으로 이어 간다
+        latest = await fetch_latest_messages(self.client, entity, limit=1)
+        if not latest:
+            return
+        update_channel(
+            self.metadata_path, channel_alias,
+            last_message_id=latest[0].id,
+            last_collected_at=datetime.now(timezone.utc).isoformat(),
+        )
+        logger.info("No checkpoint for %s, starting at message %d", channel_alias, latest[0].id)
+
+    async def _catch_up(self, channel_alias):
+        ch = self.channels[channel_alias]
+        started = monotonic()
+        saved = 0
+        async with self._semaphore:
+            try:
+                if not get_last_message_id(self.metadata_path, channel_alias):
+                    await self._seed_checkpoint(channel_alias, ch["entity"])
+                while True:
+                    result = await catch_up_channel(
+                        self.client, ch["entity"], channel_alias,
+                        metadata_path=self.metadata_path,
+                        data_dir=self.data_dir,
+                        max_pages=self.max_pages,
+                        time_budget_sec=self.time_budget_sec,
+                        media_scheduler=self.media_scheduler,
+                        storage=self.storage,
+                    )
+                    saved += result["saved"]
+                    if result["reached_head"]:
+                        break
+                    if not result["saved"]:
+                        # 저장이 전혀 진행되지 않으면 같은 구간을 반복하지 않고 다음 요청을 기다린다
+                        logger.error("Catch-up for %s stalled at message %d", channel_alias, result["last_message_id"])
+                        self.metrics["failed"] += 1
+                        return False
+            except Exception as e:
+                logger.error("Catch-up failed for %s: %s", channel_alias, e)
+                self.metrics["failed"] += 1
+                return False
+            finally:
+                self.metrics["catch_up_sec"] += monotonic() - started
+
+        self.metrics["catch_ups"] += 1
+        self.metrics["caught_up_messages"] += saved
+        logger.info("Caught up %s with %d messages", channel_alias, saved)
+        return True
+
+    async def wait(self):
+        tasks = [task for task in self._tasks.values() if not task.done()]
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def close(self):
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks.clear()
+        logger.info("Realtime catch-up closed: %s", self.metrics)
@@ -15,20 +15,42 @@ class ReconnectManager:
     def __init__(self, on_reconnect=None):
         self.attempt = 0
         self._on_reconnect = on_reconnect
+        self.metrics = {
+            "reconnects": 0,
+            "disconnected_sec": 0.0,
+            "flood_waits": 0,
+            "flood_wait_sec": 0,
+            "catch_up_sec": 0.0,
+        }
 
     def get_delay(self):
         return calculate_backoff(self.attempt)
 
     def record_failure(self):
-        self.attempt += 1
+        # 이번 재시도 대기시간을 돌려주고, 다음 실패부터 backoff를 늘린다
         delay = self.get_delay()
+        self.attempt += 1
         logger.warning("Connection failed (attempt %d), next retry in %ds", self.attempt, delay)
+        return delay
+
+    def record_flood_wait(self, seconds):
+        self.metrics["flood_waits"] += 1
+        self.metrics["flood_wait_sec"] += seconds
+        logger.warning("FloodWait on connect, retrying in %ds", seconds)
+        return seconds
 
     def record_success(self):
         self.attempt = 0
+        self.metrics["reconnects"] += 1
         logger.info("Successfully reconnected")
         if self._on_reconnect:
-            self._on_reconnect()
+            return self._on_reconnect()
+        return None
+
+
+def is_flood_wait(error):
+    # telethon의 FloodWaitError 계열은 모두 대기해야 할 초를 seconds 속성으로 준다
+    return isinstance(getattr(error, "seconds", None), int)
 
 
 def extract_flood_wait_seconds(error):
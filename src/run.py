@@ -1,6 +1,7 @@
 import argparse
 import asyncio
 import logging
+import os
 
 from dotenv import load_dotenv
 
@@ -8,10 +9,24 @@ from src.batch import run_periodic_batch
 from src.channel_manager import filter_enabled_channels, parse_channels, resolve_channels
 from src.channel_registry import load_channels_config
 from src.client import create_client, start_client
+from src.compaction import run_periodic_compaction
 from src.config import load_config
+from src.entity_cache import EntityCache, entity_id
 from src.logger import setup_logger
 from src.main import run_client, setup_handlers
+from src.media_scheduler import MediaDownloadScheduler
+from src.media_store import MediaStore
 from src.pathing import resolve_in_workspace, resolve_workspace_dir
+from src.poll_scheduler import AdaptivePollScheduler
+from src.rate_limiter import RateLimitedClient, RateLimiter
+from src.realtime_sync import RealtimeCatchUp
+from src.reconnect import ReconnectManager
+from src.search_index import IndexedStorage, SearchIndex
+from src.sqlite_storage import SQLiteStorage
+from src.storage import JsonlStorage
+from src.write_queue import WriteBehindQueue
+
+logger = logging.getLogger(__name__)
 
 
 def configure_runtime_logging(log_level="INFO", log_dir="logs"):
@@ -24,13 +39,111 @@ def configure_runtime_logging(log_level="INFO", log_dir="logs"):
             root_logger.addHandler(handler)
 
 
+def create_entity_cache(config, session_dir):
+    return EntityCache(
+        os.path.join(session_dir, "entity_cache.json"),
+        ttl_sec=config.get("entity_cache_ttl_sec", 86400),
+    )
+
+
+def create_media_scheduler(config, client, data_dir):
+    return MediaDownloadScheduler(
+        client,
+        data_dir=data_dir,
+        download_enabled=config.get("download_media", True),
+        max_size_mb=config.get("media_max_size_mb", 50),
+        concurrency=config.get("media_download_concurrency", 4),
+        media_store=MediaStore(data_dir),
+    )
+
+
+def create_rate_limited_client(config, client):
+    # flood_sleep_threshold는 건드리지 않는다 — 업데이트 루프의 GetDifference까지 공유하는 값이라
+    # 0으로 두면 짧은 FloodWait에도 업데이트 갭 복구를 포기한다. 그보다 긴 FloodWait만 limiter가 받는다
+    limiter = RateLimiter(
+        rates_per_min={
+            "resolve": config.get("rate_limit_resolve_per_min", 30),
+            "history": config.get("rate_limit_history_per_min", 300),
+            "download": config.get("rate_limit_download_per_min", 120),
+        },
+        flood_retries=config.get("rate_limit_flood_retries", 1),
+    )
+    return RateLimitedClient(client, limiter)
+
+
+def create_poll_scheduler(config, channels, metadata_path):
+    if not config.get("batch_adaptive", True):
+        return None
+    return AdaptivePollScheduler(
+        channels,
+        metadata_path,
+        default_interval_sec=config.get("batch_interval_sec", 300),
+        min_interval_sec=config.get("batch_min_interval_sec", 60),
+        max_interval_sec=config.get("batch_max_interval_sec", 3600),
+    )
+
+
+def create_storage(config, data_dir, workspace_dir=None):
+    backend = config.get("storage_backend", "jsonl")
+    if backend == "sqlite":
+        storage = SQLiteStorage(resolve_in_workspace(config.get("sqlite_path", "data/messages.db"), workspace_dir))
+    elif backend == "jsonl":
+        storage = JsonlStorage(data_dir)
+    else:
+        raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
+
+    if config.get("search_index", True):
+        index_path = resolve_in_workspace(config.get("search_index_path", "data/_search.db"), workspace_dir)
+        storage = IndexedStorage(storage, SearchIndex(index_path))
+    return storage
+
+
+def start_compaction(config, data_dir):
+    interval_sec = config.get("compaction_interval_sec", 3600)
+    if config.get("storage_backend", "jsonl") != "jsonl" or interval_sec <= 0:
+        return None
+    return asyncio.create_task(
+        run_periodic_compaction(
+            data_dir,
+            interval_sec=interval_sec,
+            min_age_days=config.get("compaction_min_age_days", 1),
+        )
+    )
+
+
+async def stop_compaction(task):
+    if task is None:
+        return
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+
 def load_enabled_channels(channels_path):
     config = load_channels_config(channels_path)
     channels = parse_channels(config)
     return filter_enabled_channels(channels)
 
 
-async def run_realtime_mode(channels_path="channels.json", workspace_dir=None):
+def create_catch_up(config, client, channels, metadata_path, data_dir, media_scheduler=None, storage=None):
+    if not config.get("realtime_catch_up", True):
+        return None
+    return RealtimeCatchUp(
+        client,
+        channels,
+        metadata_path=metadata_path,
+        data_dir=data_dir,
+        concurrency=config.get("batch_concurrency", 4),
+        max_pages=config.get("batch_max_pages", 10),
+        time_budget_sec=config.get("batch_channel_budget_sec", 60),
+        media_scheduler=media_scheduler,
+        storage=storage,
+    )
+
+
+async def run_realtime_mode(channels_path="channels.json", metadata_path="data/_metadata.json", workspace_dir=None):
     load_dotenv()
     config = load_config()
     workspace_dir = resolve_workspace_dir(workspace_dir)
@@ -39,15 +152,50 @@ async def run_realtime_mode(channels_path="channels.json", workspace_dir=None):
     configure_runtime_logging(config.get("log_level", "INFO"), log_dir=log_dir)
 
     resolved_channels_path = resolve_in_workspace(channels_path, workspace_dir)
+    resolved_metadata_path = resolve_in_workspace(metadata_path, workspace_dir)
+    data_dir = resolve_in_workspace(config.get("data_dir", "data"), workspace_dir)
     channels = load_enabled_channels(resolved_channels_path)
 
     session_dir = resolve_in_workspace(config.get("session_dir", "session"), workspace_dir)
     client = create_client(config, session_dir=session_dir)
-    resolved = await resolve_channels(client, channels)
-    channel_map = {ch["entity"].id: ch["alias"] for ch in resolved}
+    api_client = create_rate_limited_client(config, client)
+    entity_cache = create_entity_cache(config, session_dir)
+    resolved = await resolve_channels(api_client, channels, entity_cache=entity_cache)
+    channel_map = {entity_id(ch["entity"]): ch["alias"] for ch in resolved}
 
-    setup_handlers(client, channel_map)
-    await run_client(client, phone=config["phone"])
+    storage = create_storage(config, data_dir, workspace_dir)
+    media_scheduler = create_media_scheduler(config, api_client, data_dir)
+    # 실시간 저장분은 catch-up이 live head에 닿은 채널만 체크포인트를 전진시킨다
+    catch_up = create_catch_up(
+        config, api_client, resolved, resolved_metadata_path, data_dir,
+        media_scheduler=media_scheduler,
+        storage=storage,
+    )
+    write_queue = WriteBehindQueue(
+        data_dir=data_dir,
+        maxsize=config.get("write_queue_maxsize", 1000),
+        max_latency_ms=config.get("write_queue_max_latency_ms", 500),
+        storage=storage,
+        on_written=catch_up.on_written if catch_up is not None else None,
+    )
+    write_queue.start()
+    setup_handlers(client, channel_map, write_queue=write_queue, media_scheduler=media_scheduler)
+    compaction_task = start_compaction(config, data_dir)
+    try:
+        await run_client(
+            client,
+            phone=config["phone"],
+            on_connected=catch_up.start if catch_up is not None else None,
+            reconnect=ReconnectManager(on_reconnect=catch_up.start if catch_up is not None else None),
+        )
+    finally:
+        await stop_compaction(compaction_task)
+        if catch_up is not None:
+            await catch_up.close()
+        await write_queue.close()
+        await media_scheduler.close()
+        storage.close()
+        logger.info("Rate limiter stats: %s", api_client.rate_limiter.stats())
 
 
 async def run_batch_mode(channels_path="channels.json", metadata_path="data/_metadata.json", workspace_dir=None):
@@ -67,13 +215,32 @@ async def run_batch_mode(channels_path="channels.json", metadata_path="data/_met
     session_dir = resolve_in_workspace(config.get("session_dir", "session"), workspace_dir)
     client = create_client(config, session_dir=session_dir)
     await start_client(client, phone=config["phone"])
-    await run_periodic_batch(
-        client,
-        channels,
-        metadata_path=resolved_metadata_path,
-        data_dir=data_dir,
-        interval_sec=config.get("batch_interval_sec", 300),
-    )
+    api_client = create_rate_limited_client(config, client)
+    storage = create_storage(config, data_dir, workspace_dir)
+    media_scheduler = create_media_scheduler(config, api_client, data_dir)
+    compaction_task = start_compaction(config, data_dir)
+    try:
+        await run_periodic_batch(
+            api_client,
+            channels,
+            metadata_path=resolved_metadata_path,
+            data_dir=data_dir,
+            interval_sec=config.get("batch_interval_sec", 300),
+            concurrency=config.get("batch_concurrency", 4),
+            max_pages=config.get("batch_max_pages", 10),
+            time_budget_sec=config.get("batch_channel_budget_sec", 60),
+            entity_cache=create_entity_cache(config, session_dir),
+            media_scheduler=media_scheduler,
+            storage=storage,
+            scheduler=create_poll_scheduler(config, channels, resolved_metadata_path),
+            dialogs_prepass=config.get("batch_dialogs_prepass", True),
+            jitter_sec=config.get("batch_jitter_sec", 0),
+            backfill=config.get("batch_backfill", False),
+        )
+    finally:
+        await stop_compaction(compaction_task)
+        await media_scheduler.close()
+        storage.close()
 
 
 def build_parser():
@@ -98,7 +265,13 @@ def main(argv=None):
             )
         )
     else:
-        asyncio.run(run_realtime_mode(channels_path=args.channels_file, workspace_dir=args.workspace))
+        asyncio.run(
+            run_realtime_mode(
+                channels_path=args.channels_file,
+                metadata_path=args.metadata_path,
+                workspace_dir=args.workspace,
+            )
+        )
 
     return 0
 
@@ -0,0 +1,68 @@
+import argparse
+import json
+from time import perf_counter
+
+from src.pathing import resolve_in_workspace, resolve_workspace_dir
+from src.search_index import DEFAULT_LIMIT, SearchIndex, rebuild_index
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Search collected messages.")
+    parser.add_argument("--workspace", default=None)
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--index-path", default="data/_search.db")
+
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    query_parser = subparsers.add_parser("query", help="Full-text search over indexed messages")
+    query_parser.add_argument("text", help="Search terms (all terms must match)")
+    query_parser.add_argument("--channel", default=None, help="Channel alias")
+    query_parser.add_argument("--since", default=None, help="Inclusive start date (YYYY-MM-DD)")
+    query_parser.add_argument("--until", default=None, help="Exclusive end date (YYYY-MM-DD)")
+    query_parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT)
+
+    subparsers.add_parser("rebuild", help="Rebuild the index from JSONL data files")
+
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    workspace = resolve_workspace_dir(args.workspace)
+    index_path = resolve_in_workspace(args.index_path, workspace)
+
+    if args.command == "query":
+        index = SearchIndex(index_path)
+        try:
+            started = perf_counter()
+            results = index.search(
+                args.text,
+                channel_alias=args.channel,
+                since=args.since,
+                until=args.until,
+                limit=max(1, args.limit),
+            )
+            took_ms = round((perf_counter() - started) * 1000, 2)
+        finally:
+            index.close()
+        print(json.dumps({"query": args.text, "count": len(results), "took_ms": took_ms, "results": results},
+                         ensure_ascii=False))
+        return 0
+
+    if args.command == "rebuild":
+        data_dir = resolve_in_workspace(args.data_dir, workspace)
+        index = SearchIndex(index_path)
+        try:
+            counts = rebuild_index(data_dir, index)
+        finally:
+            index.close()
+        print(json.dumps({"index_path": index_path, **counts}, ensure_ascii=False))
+        return 0
+
+    return 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,191 @@
+import logging
+import os
+import sqlite3
+import threading
+
+from src.storage import generate_edit_log_path, iter_day_files, read_records
+
+logger = logging.getLogger(__name__)
+
+# trigram 토크나이저는 3글자 미만 검색어를 매칭하지 못한다
+MIN_TRIGRAM_LENGTH = 3
+DEFAULT_LIMIT = 50
+REBUILD_BATCH_SIZE = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    channel_alias TEXT NOT NULL,
+    message_id INTEGER NOT NULL,
+    channel_id INTEGER,
+    date TEXT NOT NULL,
+    text TEXT NOT NULL,
+    UNIQUE (channel_alias, message_id)
+);
+CREATE INDEX IF NOT EXISTS idx_documents_alias_date ON documents (channel_alias, date);
+CREATE INDEX IF NOT EXISTS idx_documents_date ON documents (date);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+    text, content='documents', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS documents_ai AFTER INSERT ON documents BEGIN
+    INSERT INTO documents_fts (rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS documents_ad AFTER DELETE ON documents BEGIN
+    INSERT INTO documents_fts (documents_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+CREATE TRIGGER IF NOT EXISTS documents_au AFTER UPDATE OF text ON documents BEGIN
+    INSERT INTO documents_fts (documents_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    INSERT INTO documents_fts (rowid, text) VALUES (new.id, new.text);
+END;
+"""
+
+_INSERT = (
+    "INSERT INTO documents (channel_alias, message_id, channel_id, date, text) VALUES (?, ?, ?, ?, ?) "
+    "ON CONFLICT (channel_alias, message_id) DO NOTHING"
+)
+# 편집본은 기존 본문을 덮어써서 최신 내용으로 검색되게 한다
+_UPSERT = (
+    "INSERT INTO documents (channel_alias, message_id, channel_id, date, text) VALUES (?, ?, ?, ?, ?) "
+    "ON CONFLICT (channel_alias, message_id) DO UPDATE SET text = excluded.text"
+)
+
+
+def _document(msg, channel_alias):
+    return (
+        msg.get("channel_alias") or channel_alias,
+        msg["message_id"],
+        msg.get("channel_id"),
+        msg["date"],
+        msg.get("text") or "",
+    )
+
+
+def _fts_phrase(term):
+    return '"' + term.replace('"', '""') + '"'
+
+
+class SearchIndex:
+    def __init__(self, db_path):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def add_messages(self, msgs, channel_alias):
+        originals = [_document(msg, channel_alias) for msg in msgs if not msg.get("is_edit") and msg.get("text")]
+        edits = [_document(msg, channel_alias) for msg in msgs if msg.get("is_edit")]
+        if not originals and not edits:
+            return 0
+        try:
+            with self._lock, self._conn:
+                self._conn.executemany(_INSERT, originals)
+                self._conn.executemany(_UPSERT, edits)
+        except sqlite3.Error as e:
+            logger.error(f"Search index update of {len(msgs)} messages failed: {e}")
+            return 0
+        return len(originals) + len(edits)
+
+    def search(self, query, channel_alias=None, since=None, until=None, limit=DEFAULT_LIMIT):
+        terms = query.split()
+        fts_terms = [term for term in terms if len(term) >= MIN_TRIGRAM_LENGTH]
+        short_terms = [term for term in terms if len(term) < MIN_TRIGRAM_LENGTH]
+
+        clauses = []
+        params = []
+        if fts_terms:
+            source = "documents_fts JOIN documents d ON d.id = documents_fts.rowid"
+            clauses.append("documents_fts MATCH ?")
+            params.append(" ".join(_fts_phrase(term) for term in fts_terms))
+        else:
+            source = "documents d"
+        for term in short_terms:
+            clauses.append("d.text LIKE ? ESCAPE '\\'")
+            escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            params.append(f"%{escaped}%")
+        if channel_alias:
+            clauses.append("d.channel_alias = ?")
+            params.append(channel_alias)
+        if since:
+            clauses.append("d.date >= ?")
+            params.append(since)
+        if until:
+            clauses.append("d.date < ?")
+            params.append(until)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = (
+            f"SELECT d.channel_alias, d.message_id, d.channel_id, d.date, d.text FROM {source} {where} "
+            "ORDER BY d.date DESC, d.message_id DESC LIMIT ?"
+        )
+        with self._lock:
+            rows = self._conn.execute(sql, params + [limit]).fetchall()
+        return [
+            {"channel_alias": row[0], "message_id": row[1], "channel_id": row[2], "date": row[3], "text": row[4]}
+            for row in rows
+        ]
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._conn.executescript("DROP TABLE IF EXISTS documents_fts; DROP TABLE IF EXISTS documents;")
+            self._conn.executescript(_SCHEMA)
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class IndexedStorage:
+    def __init__(self, storage, index):
+        self.storage = storage
+        self.index = index
+
+    def save_message(self, msg, channel_alias):
+        return bool(self.save_messages([msg], channel_alias))
+
+    def save_messages(self, msgs, channel_alias):
+        stored = self.storage.save_messages(msgs, channel_alias)
+        if stored:
+            self.index.add_messages(stored, channel_alias)
+        return stored
+
+    def close(self):
+        self.storage.close()
+        self.index.close()
+
+
+def rebuild_index(data_dir, index, batch_size=REBUILD_BATCH_SIZE):
+    index.clear()
+    counts = {"files": 0, "indexed": 0}
+    seen_channels = set()
+
+    for channel_alias, _, filepath in iter_day_files(data_dir):
+        batch = []
+        for record in read_records(filepath):
+            batch.append(record)
+            if len(batch) >= batch_size:
+                counts["indexed"] += index.add_messages(batch, channel_alias)
+                batch = []
+        if batch:
+            counts["indexed"] += index.add_messages(batch, channel_alias)
+        counts["files"] += 1
+        seen_channels.add(channel_alias)
+
+    # 편집 로그는 원본을 모두 넣은 뒤 순서대로 적용해야 최신 본문이 남는다
+    for channel_alias in sorted(seen_channels):
+        edits = [dict(record, is_edit=True) for record in read_records(generate_edit_log_path(channel_alias, data_dir))]
+        if edits:
+            index.add_messages(edits, channel_alias)
+
+    logger.info("Rebuilt search index from %s: %s", data_dir, counts)
+    return counts
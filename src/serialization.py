@@ -0,0 +1,60 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(obj):
+    # MessageRecord 같은 레코드 타입은 직렬화 경계에서만 dict로 바꾼다
+    to_dict = getattr(obj, "to_dict", None)
+    if to_dict is None:
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+    return to_dict()
+
+
+# json.dumps(obj, ensure_ascii=False)와 바이트 단위로 같은 출력을 내야 기존 파일과 섞어 쓸 수 있다.
+# orjson/msgspec 인코더는 구분자(", " / ": ")와 float 표기가 달라 인코딩에는 쓰지 않는다.
+_encoder = json.JSONEncoder(ensure_ascii=False, default=_default)
+_stdlib_loads = json.loads
+
+
+def dumps(obj):
+    return _encoder.encode(obj)
+
+
+def dumps_line(obj):
+    return _encoder.encode(obj) + "\n"
+
+
+def _orjson_loads(raw):
+    try:
+        return orjson.loads(raw)
+    except ValueError:
+        # NaN, 64비트 초과 정수 등 orjson이 거부하는 입력은 stdlib 결과를 그대로 따른다
+        return _stdlib_loads(raw)
+
+
+DECODERS = {"stdlib": _stdlib_loads}
+if orjson is not None:
+    DECODERS["orjson"] = _orjson_loads
+
+_backend = "orjson" if orjson is not None else "stdlib"
+_loads = DECODERS[_backend]
+
+
+def get_backend():
+    return _backend
+
+
+def set_backend(name):
+    global _backend, _loads
+    if name not in DECODERS:
+        raise ValueError(f"JSON decoder not available: {name} (available: {', '.join(sorted(DECODERS))})")
+    _backend = name
+    _loads = DECODERS[name]
+
+
+def loads(raw):
+    return _loads(raw)
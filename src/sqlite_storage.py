@@ -0,0 +1,178 @@
+import logging
+import os
+import sqlite3
+import threading
+
+from src.storage import content_hash, generate_edit_log_path, iter_day_files, read_records
+
+logger = logging.getLogger(__name__)
+
+IMPORT_BATCH_SIZE = 1000
+
+COLUMNS = [
+    "channel_id",
+    "message_id",
+    "channel_alias",
+    "date",
+    "text",
+    "has_media",
+    "media_type",
+    "media_file",
+    "views",
+    "forwards",
+    "edit_date",
+    "is_edit",
+    "collected_at",
+]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    channel_id INTEGER NOT NULL,
+    message_id INTEGER NOT NULL,
+    channel_alias TEXT NOT NULL,
+    date TEXT NOT NULL,
+    text TEXT,
+    has_media INTEGER,
+    media_type TEXT,
+    media_file TEXT,
+    views INTEGER,
+    forwards INTEGER,
+    edit_date TEXT,
+    is_edit INTEGER,
+    collected_at TEXT,
+    PRIMARY KEY (channel_id, message_id)
+);
+CREATE INDEX IF NOT EXISTS idx_messages_date ON messages (date);
+CREATE INDEX IF NOT EXISTS idx_messages_alias_date ON messages (channel_alias, date);
+CREATE TABLE IF NOT EXISTS message_edits (
+    channel_id INTEGER NOT NULL,
+    message_id INTEGER NOT NULL,
+    content_hash TEXT NOT NULL,
+    channel_alias TEXT NOT NULL,
+    date TEXT NOT NULL,
+    text TEXT,
+    has_media INTEGER,
+    media_type TEXT,
+    media_file TEXT,
+    views INTEGER,
+    forwards INTEGER,
+    edit_date TEXT,
+    is_edit INTEGER,
+    collected_at TEXT,
+    PRIMARY KEY (channel_id, message_id, content_hash)
+);
+"""
+
+_INSERT_MESSAGE = (
+    f"INSERT OR IGNORE INTO messages ({', '.join(COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in COLUMNS)})"
+)
+_INSERT_EDIT = (
+    f"INSERT OR IGNORE INTO message_edits (content_hash, {', '.join(COLUMNS)}) "
+    f"VALUES (?, {', '.join('?' for _ in COLUMNS)})"
+)
+
+
+def _row(msg, channel_alias):
+    values = dict(msg)
+    # channel_id가 없는 레코드(테스트/수동 입력)는 0 채널로 모은다
+    values["channel_id"] = values.get("channel_id") or 0
+    values["channel_alias"] = values.get("channel_alias") or channel_alias
+    return tuple(values.get(column) for column in COLUMNS)
+
+
+def _message_from_row(row):
+    msg = dict(zip(COLUMNS, row))
+    msg["has_media"] = bool(msg["has_media"]) if msg["has_media"] is not None else None
+    msg["is_edit"] = bool(msg["is_edit"]) if msg["is_edit"] is not None else None
+    return msg
+
+
+class SQLiteStorage:
+    def __init__(self, db_path):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def save_message(self, msg, channel_alias):
+        return bool(self.save_messages([msg], channel_alias))
+
+    def save_messages(self, msgs, channel_alias):
+        messages = [msg for msg in msgs if not msg.get("is_edit")]
+        edits = [msg for msg in msgs if msg.get("is_edit")]
+        try:
+            with self._lock, self._conn:
+                self._conn.executemany(_INSERT_MESSAGE, [_row(msg, channel_alias) for msg in messages])
+                self._conn.executemany(
+                    _INSERT_EDIT,
+                    [(msg.get("content_hash") or content_hash(msg),) + _row(msg, channel_alias) for msg in edits],
+                )
+        except sqlite3.Error as e:
+            logger.error(f"SQLite write of {len(msgs)} messages failed: {e}")
+            return []
+        # PRIMARY KEY 충돌로 무시된 행은 이미 저장된 것이므로 저장 성공으로 본다 (JSONL과 같은 계약)
+        return list(msgs)
+
+    def get_message(self, channel_id, message_id):
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM messages WHERE channel_id = ? AND message_id = ?",
+                (channel_id, message_id),
+            ).fetchone()
+        return _message_from_row(row) if row else None
+
+    def query(self, channel_alias=None, since=None, until=None, limit=100):
+        clauses = []
+        params = []
+        if channel_alias:
+            clauses.append("channel_alias = ?")
+            params.append(channel_alias)
+        if since:
+            clauses.append("date >= ?")
+            params.append(since)
+        if until:
+            clauses.append("date < ?")
+            params.append(until)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM messages {where} ORDER BY date DESC, message_id DESC LIMIT ?",
+                params + [limit],
+            ).fetchall()
+        return [_message_from_row(row) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def import_jsonl_tree(data_dir, storage, batch_size=IMPORT_BATCH_SIZE):
+    counts = {"files": 0, "messages": 0, "edits": 0}
+    seen_channels = set()
+
+    for channel_alias, _, filepath in iter_day_files(data_dir):
+        batch = []
+        for record in read_records(filepath):
+            batch.append(record)
+            if len(batch) >= batch_size:
+                counts["messages"] += len(storage.save_messages(batch, channel_alias))
+                batch = []
+        if batch:
+            counts["messages"] += len(storage.save_messages(batch, channel_alias))
+        counts["files"] += 1
+
+        if channel_alias not in seen_channels:
+            seen_channels.add(channel_alias)
+            edits = [dict(record, is_edit=True) for record in read_records(generate_edit_log_path(channel_alias, data_dir))]
+            if edits:
+                counts["edits"] += len(storage.save_messages(edits, channel_alias))
+
+    logger.info("Imported JSONL tree %s: %s", data_dir, counts)
+    return counts
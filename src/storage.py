@@ -1,52 +1,525 @@
+import gzip
+import hashlib
 import json
 import logging
 import os
+import re
+import shutil
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: 프로세스 간 락 없이 프로세스 안의 락만 쓴다
+    fcntl = None
+
+from src import offset_index
+from src.serialization import dumps, dumps_line, loads
 
 logger = logging.getLogger(__name__)
 
 MAX_RETRIES = 3
+MAX_INDEXED_FILES = 256
+COMPRESSED_SUFFIX = ".gz"
+LOCK_SUFFIX = ".lock"
+# 압축 파일은 gzip member(frame) 단위로 나눠 쓴다 — frame 경계에서 따로 풀 수 있다
+FRAME_LINES = 1000
+DAY_FILE_RE = re.compile(r"^(\d{4}-\d{2}-\d{2})\.jsonl(\.gz)?$")
+
+_index_lock = threading.RLock()
+_message_id_index = OrderedDict()
+_edit_index = OrderedDict()
 
 
 def generate_file_path(channel_alias, date_str, data_dir="data"):
     return os.path.join(data_dir, channel_alias, f"{date_str}.jsonl")
 
 
-def _read_existing_message_ids(filepath):
-    ids = set()
+def generate_compressed_path(channel_alias, date_str, data_dir="data"):
+    return generate_file_path(channel_alias, date_str, data_dir) + COMPRESSED_SUFFIX
+
+
+def generate_edit_log_path(channel_alias, data_dir="data"):
+    return os.path.join(data_dir, channel_alias, "_edits.jsonl")
+
+
+@contextmanager
+def _day_lock(filepath):
+    # 같은 데이터 디렉토리를 쓰는 다른 프로세스(realtime/batch/CLI)와 날짜 파일 쓰기·압축을 직렬화한다.
+    # 항상 이 락을 _index_lock보다 먼저 잡는다
+    if fcntl is None:
+        yield
+        return
+    lock_path = filepath + LOCK_SUFFIX
+    while True:
+        fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        # 기다리는 사이 압축이 락 파일을 지웠다면 새 락 파일로 다시 잡는다
+        try:
+            if os.path.samestat(os.fstat(fd), os.stat(lock_path)):
+                break
+        except FileNotFoundError:
+            pass
+        os.close(fd)
+    try:
+        yield
+    finally:
+        os.close(fd)
+
+
+def _remove_day_lock(filepath):
+    # 평문 파일이 없어진 날짜에는 락 파일을 남기지 않는다 — 락을 쥔 채로만 부르고,
+    # 기다리던 쪽은 _day_lock에서 새 파일로 다시 잡는다
+    if fcntl is not None:
+        os.remove(filepath + LOCK_SUFFIX)
+
+
+def _channel_day_files(channel_dir):
+    days = []
+    for name in os.listdir(channel_dir):
+        match = DAY_FILE_RE.match(name)
+        if match:
+            # 같은 날짜는 압축본을 먼저, 이후 도착한 delta(평문)를 나중에 돌려준다
+            days.append((match.group(1), match.group(2) is None, name))
+    return [(date_str, os.path.join(channel_dir, name)) for date_str, _, name in sorted(days)]
+
+
+def iter_day_files(data_dir="data"):
+    if not os.path.isdir(data_dir):
+        return
+    for channel_alias in sorted(os.listdir(data_dir)):
+        channel_dir = os.path.join(data_dir, channel_alias)
+        if channel_alias.startswith("_") or not os.path.isdir(channel_dir):
+            continue
+        for date_str, filepath in _channel_day_files(channel_dir):
+            yield channel_alias, date_str, filepath
+
+
+def _open_day_file(filepath):
+    if filepath.endswith(COMPRESSED_SUFFIX):
+        return gzip.open(filepath, "rb")
+    return open(filepath, "rb")
+
+
+def _iter_lines(filepath):
     if not os.path.exists(filepath):
-        return ids
-    with open(filepath, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if line:
-                try:
-                    obj = json.loads(line)
-                    ids.add(obj.get("message_id"))
-                except json.JSONDecodeError:
-                    continue
+        return
+    try:
+        with _open_day_file(filepath) as f:
+            for raw in f:
+                if raw.strip():
+                    yield raw if raw.endswith(b"\n") else raw + b"\n"
+    except (OSError, EOFError) as e:
+        # 잘린 압축 파일은 읽을 수 있는 frame까지만 돌려준다
+        logger.error(f"Failed to read {filepath}: {e}")
+
+
+def read_records(filepath):
+    for raw in _iter_lines(filepath):
+        try:
+            yield loads(raw)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            continue
+
+
+def read_day_records(channel_alias, date_str, data_dir="data"):
+    yield from read_records(generate_compressed_path(channel_alias, date_str, data_dir))
+    yield from read_records(generate_file_path(channel_alias, date_str, data_dir))
+
+
+def _read_existing_message_ids(filepath):
+    ids = {obj.get("message_id") for obj in read_records(filepath + COMPRESSED_SUFFIX)}
+    ids.update(obj.get("message_id") for obj in read_records(filepath))
     return ids
 
 
-def save_message(msg, channel_alias, data_dir="data"):
-    date_str = msg["date"][:10]
-    filepath = generate_file_path(channel_alias, date_str, data_dir)
+def _file_signature(filepath):
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return None
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+def _day_signature(filepath):
+    return (_file_signature(filepath), _file_signature(filepath + COMPRESSED_SUFFIX))
+
+
+def _get_message_id_index(channel_alias, filepath):
+    key = (channel_alias, filepath)
+    signature = _day_signature(filepath)
+    entry = _message_id_index.get(key)
+
+    if entry is not None and entry["signature"] == signature:
+        _message_id_index.move_to_end(key)
+        return entry
+
+    # 파일이 처음 보이거나 외부에서 변경된 경우에만 전체 스캔
+    entry = {"ids": _read_existing_message_ids(filepath), "signature": signature}
+    _message_id_index[key] = entry
+    while len(_message_id_index) > MAX_INDEXED_FILES:
+        _message_id_index.popitem(last=False)
+    return entry
 
-    dir_path = os.path.dirname(filepath)
-    os.makedirs(dir_path, exist_ok=True)
 
-    existing_ids = _read_existing_message_ids(filepath)
-    if msg["message_id"] in existing_ids:
-        return True
+def clear_message_id_index():
+    with _index_lock:
+        _message_id_index.clear()
+        _edit_index.clear()
 
-    line = json.dumps(msg, ensure_ascii=False) + "\n"
 
+def _append_lines(filepath, lines):
+    payload = "".join(lines)
     for attempt in range(MAX_RETRIES):
         try:
             with open(filepath, "a", encoding="utf-8") as f:
-                f.write(line)
+                f.write(payload)
             return True
         except OSError as e:
             logger.error(f"Write failed (attempt {attempt + 1}/{MAX_RETRIES}): {e}")
+    return False
+
+
+def _index_appended(filepath, lines, start_offset):
+    # 기존 파일에 색인이 아직 없으면 일부만 담긴 색인을 만들지 않고, 조회 시점 재생성에 맡긴다
+    if start_offset and not os.path.exists(offset_index.generate_index_path(filepath)):
+        return
+    try:
+        offset_index.append_entries(filepath, offset_index.line_entries(lines, start_offset))
+    except OSError as e:
+        logger.error(f"Offset index append failed for {filepath}: {e}")
+
+
+def _plain_size(signature):
+    return signature[0][0] if signature and signature[0] else 0
+
+
+def content_hash(msg):
+    content = [msg.get("text"), msg.get("has_media"), msg.get("media_type"), msg.get("media_file")]
+    return hashlib.sha1(dumps(content).encode("utf-8")).hexdigest()
+
+
+def _read_edit_log(filepath):
+    latest = {}
+    if not os.path.exists(filepath):
+        return latest
+    offset = 0
+    with open(filepath, "rb") as f:
+        for raw in f:
+            try:
+                obj = loads(raw)
+            except ValueError:
+                obj = None
+            if isinstance(obj, dict):
+                latest[obj.get("message_id")] = (obj.get("content_hash"), offset, len(raw))
+            offset += len(raw)
+    return latest
+
+
+def _get_edit_index(channel_alias, filepath):
+    key = (channel_alias, filepath)
+    signature = _file_signature(filepath)
+    entry = _edit_index.get(key)
+
+    if entry is not None and entry["signature"] == signature:
+        _edit_index.move_to_end(key)
+        return entry
+
+    entry = {"latest": _read_edit_log(filepath), "originals": {}, "signature": signature}
+    _edit_index[key] = entry
+    while len(_edit_index) > MAX_INDEXED_FILES:
+        _edit_index.popitem(last=False)
+    return entry
+
+
+def _original_hash(index, channel_alias, msg, data_dir):
+    message_id = msg["message_id"]
+    if message_id not in index["originals"]:
+        original = find_message(channel_alias, message_id, data_dir=data_dir, date_str=msg["date"][:10])
+        index["originals"][message_id] = content_hash(original) if original is not None else None
+    return index["originals"][message_id]
+
+
+def save_edit(msg, channel_alias, data_dir="data"):
+    filepath = generate_edit_log_path(channel_alias, data_dir)
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    digest = content_hash(msg)
+
+    with _index_lock:
+        index = _get_edit_index(channel_alias, filepath)
+        latest = index["latest"].get(msg["message_id"])
+        if latest is not None:
+            last_digest = latest[0]
+        else:
+            # 첫 편집은 원본과 비교한다 — 반응 수만 바뀐 MessageEdited는 내용이 원본과 같다
+            last_digest = _original_hash(index, channel_alias, msg, data_dir)
+        if last_digest == digest:
+            return True
+
+        record = dict(msg, content_hash=digest)
+        raw = dumps_line(record).encode("utf-8")
+        offset = index["signature"][0] if index["signature"] else 0
+
+        for attempt in range(MAX_RETRIES):
+            try:
+                with open(filepath, "ab") as f:
+                    f.write(raw)
+                index["latest"][msg["message_id"]] = (digest, offset, len(raw))
+                index["signature"] = _file_signature(filepath)
+                _index_appended(filepath, [raw], offset)
+                return True
+            except OSError as e:
+                logger.error(f"Edit log write failed (attempt {attempt + 1}/{MAX_RETRIES}): {e}")
+
+    logger.error(f"Failed to write edit of message {msg['message_id']} after {MAX_RETRIES} retries")
+    return False
+
+
+def get_latest_version(channel_alias, message_id, data_dir="data"):
+    filepath = generate_edit_log_path(channel_alias, data_dir)
+    with _index_lock:
+        latest = _get_edit_index(channel_alias, filepath)["latest"].get(message_id)
+    if latest is None:
+        # 편집된 적 없는 메시지는 원본이 곧 최신본이다
+        return find_message(channel_alias, message_id, data_dir=data_dir)
+    _, offset, length = latest
+    with open(filepath, "rb") as f:
+        f.seek(offset)
+        return loads(f.read(length))
+
+
+def save_message(msg, channel_alias, data_dir="data"):
+    if msg.get("is_edit"):
+        return save_edit(msg, channel_alias, data_dir=data_dir)
+
+    date_str = msg["date"][:10]
+    filepath = generate_file_path(channel_alias, date_str, data_dir)
+
+    dir_path = os.path.dirname(filepath)
+    os.makedirs(dir_path, exist_ok=True)
+
+    with _day_lock(filepath), _index_lock:
+        index = _get_message_id_index(channel_alias, filepath)
+        if msg["message_id"] in index["ids"]:
+            return True
+
+        line = dumps_line(msg)
+        start_offset = _plain_size(index["signature"])
+        if _append_lines(filepath, [line]):
+            index["ids"].add(msg["message_id"])
+            index["signature"] = _day_signature(filepath)
+            _index_appended(filepath, [line], start_offset)
+            return True
 
     logger.error(f"Failed to write message {msg['message_id']} after {MAX_RETRIES} retries")
     return False
+
+
+def save_messages(msgs, channel_alias, data_dir="data"):
+    groups = OrderedDict()
+    stored = []
+    for msg in msgs:
+        if msg.get("is_edit"):
+            if save_edit(msg, channel_alias, data_dir=data_dir):
+                stored.append(msg)
+            continue
+        filepath = generate_file_path(channel_alias, msg["date"][:10], data_dir)
+        groups.setdefault(filepath, []).append(msg)
+
+    for filepath, group in groups.items():
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+
+        with _day_lock(filepath), _index_lock:
+            index = _get_message_id_index(channel_alias, filepath)
+            new_msgs = []
+            new_ids = set()
+            for msg in group:
+                msg_id = msg["message_id"]
+                if msg_id in new_ids:
+                    continue
+                if msg_id in index["ids"]:
+                    stored.append(msg)
+                    continue
+                new_ids.add(msg_id)
+                new_msgs.append(msg)
+
+            if not new_msgs:
+                continue
+
+            lines = [dumps_line(msg) for msg in new_msgs]
+            start_offset = _plain_size(index["signature"])
+            if _append_lines(filepath, lines):
+                index["ids"].update(new_ids)
+                index["signature"] = _day_signature(filepath)
+                _index_appended(filepath, lines, start_offset)
+                stored.extend(new_msgs)
+            else:
+                logger.error(f"Failed to write {len(new_msgs)} messages to {filepath} after {MAX_RETRIES} retries")
+
+    return stored
+
+
+def _days_newest_first(channel_alias, data_dir):
+    channel_dir = os.path.join(data_dir, channel_alias)
+    if not os.path.isdir(channel_dir):
+        return []
+    days = OrderedDict()
+    for date_str, filepath in reversed(_channel_day_files(channel_dir)):
+        days.setdefault(date_str, []).insert(0, filepath)
+    return list(days.items())
+
+
+def find_message(channel_alias, message_id, data_dir="data", date_str=None):
+    days = _days_newest_first(channel_alias, data_dir)
+    if date_str is not None:
+        days = [(day, paths) for day, paths in days if day == date_str]
+    for _, paths in days:
+        for filepath in paths:
+            with _index_lock:
+                index = offset_index.load_index(filepath)
+                # 날짜별 id 범위 밖이면 파일을 열지 않고 건너뛴다
+                if index is None or index["min_id"] is None:
+                    continue
+                if not index["min_id"] <= message_id <= index["max_id"]:
+                    continue
+                record = offset_index.read_message(filepath, message_id)
+            if record is not None:
+                return record
+    return None
+
+
+def latest_messages(channel_alias, n, data_dir="data"):
+    records = []
+    seen_ids = set()
+    for _, paths in _days_newest_first(channel_alias, data_dir):
+        if len(records) >= n:
+            break
+        candidates = []
+        with _index_lock:
+            for filepath in paths:
+                for msg_id in offset_index.latest_ids(filepath, n):
+                    if msg_id not in seen_ids:
+                        seen_ids.add(msg_id)
+                        candidates.append((msg_id, filepath))
+            candidates.sort(reverse=True)
+            for msg_id, filepath in candidates[:n - len(records)]:
+                record = offset_index.read_message(filepath, msg_id)
+                if record is not None:
+                    records.append(record)
+    return records
+
+
+def get_edit_versions(channel_alias, message_id, data_dir="data"):
+    filepath = generate_edit_log_path(channel_alias, data_dir)
+    with _index_lock:
+        return offset_index.read_versions(filepath, message_id)
+
+
+def rebuild_offset_indexes(data_dir="data"):
+    result = {"files": 0, "entries": 0}
+    paths = [filepath for _, _, filepath in iter_day_files(data_dir)]
+    if os.path.isdir(data_dir):
+        for channel_alias in sorted(os.listdir(data_dir)):
+            edit_log = generate_edit_log_path(channel_alias, data_dir)
+            if not channel_alias.startswith("_") and os.path.exists(edit_log):
+                paths.append(edit_log)
+    with _index_lock:
+        for filepath in paths:
+            result["entries"] += len(offset_index.rebuild_index(filepath))
+            result["files"] += 1
+    offset_index.clear_loaded_indexes()
+    return result
+
+
+def _write_frames(f, lines, frame_lines):
+    entries = []
+    for start in range(0, len(lines), frame_lines):
+        chunk = lines[start:start + frame_lines]
+        frame = gzip.compress(b"".join(chunk), mtime=0)
+        entries.extend(offset_index.frame_entries(chunk, f.tell(), len(frame)))
+        f.write(frame)
+    return entries
+
+
+def _unique_lines(raw_lines, seen_ids):
+    lines = []
+    for raw in raw_lines:
+        if not raw.endswith(b"\n"):
+            raw += b"\n"
+        try:
+            msg_id = loads(raw).get("message_id")
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            continue
+        if msg_id in seen_ids:
+            continue
+        seen_ids.add(msg_id)
+        lines.append(raw)
+    return lines
+
+
+def compact_day_file(channel_alias, date_str, data_dir="data", frame_lines=FRAME_LINES):
+    filepath = generate_file_path(channel_alias, date_str, data_dir)
+    compressed_path = filepath + COMPRESSED_SUFFIX
+    if not os.path.exists(filepath):
+        return 0
+
+    # 압축하는 동안 다른 프로세스가 이 날짜에 덧붙이지 못하게 날짜 락을 끝까지 쥔다.
+    # 닫힌 날짜라 기다리는 쓰기는 늦게 도착한 메시지뿐이고, 다른 날짜 쓰기는 막지 않는다
+    with _day_lock(filepath):
+        if not os.path.exists(filepath):
+            # 기다리는 사이 다른 프로세스가 먼저 압축했다
+            _remove_day_lock(filepath)
+            return 0
+        seen_ids = {obj.get("message_id") for obj in read_records(compressed_path)}
+        with open(filepath, "rb") as f:
+            delta = _unique_lines(f.read().splitlines(keepends=True), seen_ids)
+
+        tmp_path = f"{compressed_path}.{os.getpid()}.tmp"
+        had_compressed = os.path.exists(compressed_path)
+        try:
+            with open(tmp_path, "wb") as out:
+                # 기존 frame은 풀지 않고 그대로 복사한 뒤 delta를 새 frame으로 덧붙인다
+                if had_compressed:
+                    with open(compressed_path, "rb") as f:
+                        shutil.copyfileobj(f, out)
+                frame_entries = _write_frames(out, delta, frame_lines)
+                out.flush()
+                os.fsync(out.fileno())
+
+            with _index_lock:
+                os.replace(tmp_path, compressed_path)
+                os.remove(filepath)
+                offset_index.remove_index(filepath)
+                if had_compressed:
+                    offset_index.append_entries(compressed_path, frame_entries)
+                else:
+                    offset_index.write_index(compressed_path, frame_entries)
+
+                entry = _message_id_index.get((channel_alias, filepath))
+                if entry is not None:
+                    entry["ids"].update(seen_ids)
+                    entry["signature"] = _day_signature(filepath)
+        except OSError as e:
+            logger.error(f"Compaction of {filepath} failed: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return 0
+
+        _remove_day_lock(filepath)
+
+    return len(delta)
+
+
+class JsonlStorage:
+    def __init__(self, data_dir="data"):
+        self.data_dir = data_dir
+
+    def save_message(self, msg, channel_alias):
+        return save_message(msg, channel_alias, data_dir=self.data_dir)
+
+    def save_messages(self, msgs, channel_alias):
+        return save_messages(msgs, channel_alias, data_dir=self.data_dir)
+
+    def close(self):
+        pass
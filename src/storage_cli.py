@@ -0,0 +1,69 @@
+import argparse
+import json
+
+from src.columnar_export import export_parquet
+from src.compaction import DEFAULT_MIN_AGE_DAYS, compact_closed_days
+from src.pathing import resolve_in_workspace, resolve_workspace_dir
+from src.sqlite_storage import SQLiteStorage, import_jsonl_tree
+from src.storage import rebuild_offset_indexes
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Manage collected message storage.")
+    parser.add_argument("--workspace", default=None)
+    parser.add_argument("--data-dir", default="data")
+
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import-sqlite", help="Import JSONL day files into SQLite")
+    import_parser.add_argument("--db-path", default="data/messages.db")
+
+    compact_parser = subparsers.add_parser("compact", help="Compress day files for days that have ended")
+    compact_parser.add_argument("--min-age-days", type=int, default=DEFAULT_MIN_AGE_DAYS)
+
+    export_parser = subparsers.add_parser("export-parquet", help="Export day files to partitioned Parquet")
+    export_parser.add_argument("--output-dir", default="data/_parquet")
+
+    subparsers.add_parser("reindex", help="Rebuild offset index sidecars for day files and edit logs")
+
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    workspace = resolve_workspace_dir(args.workspace)
+    data_dir = resolve_in_workspace(args.data_dir, workspace)
+
+    if args.command == "import-sqlite":
+        db_path = resolve_in_workspace(args.db_path, workspace)
+        storage = SQLiteStorage(db_path)
+        try:
+            counts = import_jsonl_tree(data_dir, storage)
+        finally:
+            storage.close()
+        print(json.dumps({"db_path": db_path, **counts}, ensure_ascii=False))
+        return 0
+
+    if args.command == "compact":
+        result = compact_closed_days(data_dir, min_age_days=max(1, args.min_age_days))
+        print(json.dumps({"data_dir": data_dir, **result}, ensure_ascii=False))
+        return 0
+
+    if args.command == "export-parquet":
+        output_dir = resolve_in_workspace(args.output_dir, workspace)
+        result = export_parquet(data_dir, output_dir=output_dir)
+        print(json.dumps({"output_dir": output_dir, **result}, ensure_ascii=False))
+        return 0
+
+    if args.command == "reindex":
+        result = rebuild_offset_indexes(data_dir)
+        print(json.dumps({"data_dir": data_dir, **result}, ensure_ascii=False))
+        return 0
+
+    return 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,114 @@
+import asyncio
+import logging
+from time import monotonic
+
+from src.storage import save_messages
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAXSIZE = 1000
+DEFAULT_BATCH_SIZE = 200
+DEFAULT_MAX_LATENCY_MS = 500
+
+_CLOSE = object()
+
+
+class WriteBehindQueue:
+    def __init__(self, data_dir="data", maxsize=DEFAULT_MAXSIZE, batch_size=DEFAULT_BATCH_SIZE,
+                 max_latency_ms=DEFAULT_MAX_LATENCY_MS, storage=None, on_written=None):
+        self.data_dir = data_dir
+        self.storage = storage
+        self.on_written = on_written
+        self.batch_size = batch_size
+        self.max_latency_sec = max_latency_ms / 1000
+        self._queue = asyncio.Queue(maxsize=maxsize)
+        self._task = None
+        self.metrics = {
+            "enqueued": 0,
+            "written": 0,
+            "failed": 0,
+            "flushes": 0,
+            "max_depth": 0,
+            "blocked_puts": 0,
+            "blocked_sec": 0.0,
+        }
+
+    @property
+    def depth(self):
+        return self._queue.qsize()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        return self._task
+
+    async def put(self, msg, channel_alias):
+        if self._queue.full():
+            # 큐가 가득 차면 핸들러가 여기서 대기한다 (backpressure)
+            self.metrics["blocked_puts"] += 1
+            started = monotonic()
+            await self._queue.put((channel_alias, msg, monotonic()))
+            self.metrics["blocked_sec"] += monotonic() - started
+        else:
+            self._queue.put_nowait((channel_alias, msg, monotonic()))
+        self.metrics["enqueued"] += 1
+        self.metrics["max_depth"] = max(self.metrics["max_depth"], self._queue.qsize())
+
+    async def _next_batch(self):
+        first = await self._queue.get()
+        if first is _CLOSE:
+            return [], True
+        batch = [first]
+        deadline = first[2] + self.max_latency_sec
+
+        while len(batch) < self.batch_size:
+            timeout = deadline - monotonic()
+            try:
+                if timeout <= 0:
+                    item = self._queue.get_nowait()
+                else:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+            except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                break
+            if item is _CLOSE:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _write(self, batch):
+        groups = {}
+        for channel_alias, msg, _ in batch:
+            groups.setdefault(channel_alias, []).append(msg)
+
+        for channel_alias, msgs in groups.items():
+            try:
+                if self.storage is not None:
+                    stored = await asyncio.to_thread(self.storage.save_messages, msgs, channel_alias)
+                else:
+                    stored = await asyncio.to_thread(save_messages, msgs, channel_alias, data_dir=self.data_dir)
+            except Exception as e:
+                logger.error("Write-behind flush failed for %s: %s", channel_alias, e)
+                stored = []
+            self.metrics["written"] += len(stored)
+            self.metrics["failed"] += len(msgs) - len(stored)
+            if self.on_written is not None:
+                try:
+                    self.on_written(channel_alias, msgs, stored)
+                except Exception as e:
+                    logger.error("Write-behind callback failed for %s: %s", channel_alias, e)
+        self.metrics["flushes"] += 1
+
+    async def _run(self):
+        closing = False
+        while not closing:
+            batch, closing = await self._next_batch()
+            if batch:
+                await self._write(batch)
+
+    async def close(self):
+        # 종료 표식 앞에 쌓인 메시지는 지연 한도를 기다리지 않고 모두 기록한다
+        if self._task is not None:
+            await self._queue.put(_CLOSE)
+            await self._task
+            self._task = None
+        logger.info("Write-behind queue closed: %s", self.metrics)
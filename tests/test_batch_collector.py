@@ -2,7 +2,8 @@ from unittest.mock import MagicMock, AsyncMock, patch
 
 import pytest
 
-from src.batch_collector import get_last_message_id, fetch_messages, collect_batch
+from src.batch_collector import catch_up_channel, collect_batch, fetch_messages, get_last_message_id
+from src.metadata import load_metadata
 
 
 def test_reads_last_message_id_from_metadata(tmp_path):
@@ -138,13 +139,234 @@ async def test_updates_metadata_after_collection(tmp_path):
     metadata_path = str(tmp_path / "_metadata.json")
     channel_entity = MagicMock()
 
+    progress = {}
     await collect_batch(
         mock_client, channel_entity, channel_alias,
-        metadata_path=metadata_path, data_dir=str(data_dir),
+        metadata_path=metadata_path, data_dir=str(data_dir), report=progress,
     )
 
-    metadata = json.loads(open(metadata_path, encoding="utf-8").read())
+    metadata = load_metadata(metadata_path)
     assert channel_alias in metadata
     assert metadata[channel_alias]["last_message_id"] == 500
+    assert progress["saved"] == 1
+    assert progress["reached_head"] is True
     assert "last_collected_at" in metadata[channel_alias]
     assert metadata[channel_alias]["total_collected"] >= 1
+
+
+@pytest.mark.asyncio
+async def test_collect_batch_writes_metadata_once_per_batch(tmp_path):
+    from datetime import datetime, timezone
+    import json
+
+    messages = []
+    for i in range(1, 101):
+        msg = MagicMock()
+        msg.id = i
+        msg.text = f"메시지 {i}"
+        msg.date = datetime(2026, 2, 12, 8, 0, 0, tzinfo=timezone.utc)
+        msg.media = None
+        msg.chat_id = -1001234567890
+        msg.views = 1
+        msg.forwards = 0
+        msg.edit_date = None
+        messages.append(msg)
+
+    mock_client = MagicMock()
+    mock_client.get_messages = AsyncMock(return_value=messages)
+    metadata_path = str(tmp_path / "_metadata.json")
+
+    with patch("src.metadata._append_journal") as mock_append:
+        count = await collect_batch(
+            mock_client, MagicMock(), "투자뉴스A",
+            metadata_path=metadata_path, data_dir=str(tmp_path / "data"),
+        )
+
+    assert count == 100
+    assert mock_append.call_count == 1
+    saved = mock_append.call_args[0][2]
+    assert saved["total_collected"] == 100
+    assert saved["last_message_id"] == 100
+
+
+@pytest.mark.asyncio
+async def test_collect_batch_uses_given_last_message_id(tmp_path):
+    mock_client = MagicMock()
+    mock_client.get_messages = AsyncMock(return_value=[])
+
+    with patch("src.batch_collector.load_metadata") as mock_load:
+        await collect_batch(
+            mock_client, MagicMock(), "투자뉴스A",
+            metadata_path=str(tmp_path / "_metadata.json"),
+            data_dir=str(tmp_path / "data"),
+            last_message_id=321,
+        )
+
+    mock_load.assert_not_called()
+    assert mock_client.get_messages.call_args[1]["min_id"] == 321
+
+
+def _make_channel_history(count):
+    from datetime import datetime, timezone
+
+    history = []
+    for i in range(1, count + 1):
+        msg = MagicMock()
+        msg.id = i
+        msg.text = f"backlog {i}"
+        msg.date = datetime(2026, 2, 12, 8, 0, 0, tzinfo=timezone.utc)
+        msg.media = None
+        msg.chat_id = -1001234567890
+        msg.views = 1
+        msg.forwards = 0
+        msg.edit_date = None
+        history.append(msg)
+    return history
+
+
+def _history_client(history):
+    async def get_messages(entity, limit, min_id=0, reverse=False):
+        if not reverse:
+            return list(reversed(history))[:limit]
+        return [msg for msg in history if msg.id > min_id][:limit]
+
+    client = MagicMock()
+    client.get_messages = AsyncMock(side_effect=get_messages)
+    return client
+
+
+@pytest.mark.asyncio
+async def test_catch_up_pages_until_head(tmp_path):
+    client = _history_client(_make_channel_history(250))
+    metadata_path = str(tmp_path / "_metadata.json")
+
+    result = await catch_up_channel(
+        client, MagicMock(), "투자뉴스A",
+        metadata_path=metadata_path, data_dir=str(tmp_path / "data"),
+        backfill=True,
+    )
+
+    assert result == {"saved": 250, "pages": 3, "last_message_id": 250, "reached_head": True}
+    assert [c.kwargs["min_id"] for c in client.get_messages.call_args_list] == [0, 100, 200]
+    assert get_last_message_id(metadata_path, "투자뉴스A") == 250
+
+
+@pytest.mark.asyncio
+async def test_catch_up_checkpoints_every_page_and_resumes(tmp_path):
+    history = _make_channel_history(250)
+    client = _history_client(history)
+    metadata_path = str(tmp_path / "_metadata.json")
+    data_dir = str(tmp_path / "data")
+
+    calls = 0
+    original = client.get_messages.side_effect
+
+    async def crash_on_third_page(*args, **kwargs):
+        nonlocal calls
+        calls += 1
+        if calls == 3:
+            raise ConnectionError("connection lost")
+        return await original(*args, **kwargs)
+
+    client.get_messages.side_effect = crash_on_third_page
+    with pytest.raises(ConnectionError):
+        await catch_up_channel(
+            client, MagicMock(), "투자뉴스A", metadata_path=metadata_path, data_dir=data_dir, backfill=True,
+        )
+
+    assert get_last_message_id(metadata_path, "투자뉴스A") == 200
+
+    resumed = await catch_up_channel(
+        _history_client(history), MagicMock(), "투자뉴스A",
+        metadata_path=metadata_path, data_dir=data_dir,
+    )
+    assert resumed["saved"] == 50
+    assert resumed["last_message_id"] == 250
+
+
+@pytest.mark.asyncio
+async def test_catch_up_stops_at_page_budget(tmp_path):
+    client = _history_client(_make_channel_history(500))
+
+    result = await catch_up_channel(
+        client, MagicMock(), "투자뉴스A",
+        metadata_path=str(tmp_path / "_metadata.json"), data_dir=str(tmp_path / "data"),
+        max_pages=2,
+        backfill=True,
+    )
+
+    assert result["pages"] == 2
+    assert result["last_message_id"] == 200
+    assert result["reached_head"] is False
+
+
+@pytest.mark.asyncio
+async def test_catch_up_stops_at_time_budget(tmp_path):
+    client = _history_client(_make_channel_history(500))
+
+    with patch("src.batch_collector.monotonic", side_effect=[0, 0, 100]):
+        result = await catch_up_channel(
+            client, MagicMock(), "투자뉴스A",
+            metadata_path=str(tmp_path / "_metadata.json"), data_dir=str(tmp_path / "data"),
+            time_budget_sec=60,
+            backfill=True,
+        )
+
+    assert result["pages"] == 2
+    assert result["reached_head"] is False
+
+
+@pytest.mark.asyncio
+async def test_catch_up_without_checkpoint_starts_at_head(tmp_path):
+    client = _history_client(_make_channel_history(500))
+    metadata_path = str(tmp_path / "_metadata.json")
+
+    result = await catch_up_channel(
+        client, MagicMock(), "투자뉴스A",
+        metadata_path=metadata_path, data_dir=str(tmp_path / "data"),
+    )
+
+    assert result == {"saved": 100, "pages": 1, "last_message_id": 500, "reached_head": True}
+    assert "reverse" not in client.get_messages.call_args.kwargs
+    assert get_last_message_id(metadata_path, "투자뉴스A") == 500
+
+
+@pytest.mark.asyncio
+async def test_catch_up_stores_pages_off_the_event_loop(tmp_path):
+    import threading
+
+    from src.storage import save_messages
+
+    loop_thread = threading.get_ident()
+    store_threads = []
+
+    def recording_save(*args, **kwargs):
+        store_threads.append(threading.get_ident())
+        return save_messages(*args, **kwargs)
+
+    media_scheduler = MagicMock()
+    history = _make_channel_history(3)
+    with patch("src.batch_collector.save_messages", side_effect=recording_save):
+        result = await catch_up_channel(
+            _history_client(history), MagicMock(), "투자뉴스A",
+            metadata_path=str(tmp_path / "_metadata.json"), data_dir=str(tmp_path / "data"),
+            media_scheduler=media_scheduler, backfill=True,
+        )
+
+    assert result["saved"] == 3
+    assert store_threads and loop_thread not in store_threads
+    assert [c.args[0].id for c in media_scheduler.schedule.call_args_list] == [1, 2, 3]
+
+
+@pytest.mark.asyncio
+async def test_fetch_dialog_heads_maps_peer_to_top_message():
+    from src.batch_collector import fetch_dialog_heads
+
+    with_message = MagicMock(id=-1001)
+    with_message.message = MagicMock(id=42)
+    empty = MagicMock(id=-1002)
+    empty.message = None
+    client = MagicMock()
+    client.get_dialogs = AsyncMock(return_value=[with_message, empty])
+
+    assert await fetch_dialog_heads(client) == {-1001: 42}
@@ -1,3 +1,4 @@
+import asyncio
 import sys
 from unittest.mock import MagicMock, AsyncMock, patch
 
@@ -6,6 +7,7 @@ import pytest
 sys.modules.setdefault("telethon", MagicMock())
 
 from src.batch import run_batch, run_periodic_batch
+from src.metadata import load_metadata
 
 
 @pytest.mark.asyncio
@@ -35,15 +37,18 @@ async def test_batch_interval_uses_configurable_seconds():
     ]
 
     run_count = 0
+    clock = [1000.0]
 
     async def fake_sleep(seconds):
         nonlocal run_count
         assert seconds == 120  # 설정된 간격이 사용되는지 검증
         run_count += 1
+        clock[0] += seconds
         if run_count >= 2:
             raise KeyboardInterrupt  # 루프 탈출
 
     with patch("src.batch.collect_batch", new_callable=AsyncMock, return_value=1), \
+         patch("src.batch.monotonic", side_effect=lambda: clock[0]), \
          patch("src.batch.asyncio.sleep", side_effect=fake_sleep):
         try:
             await run_periodic_batch(
@@ -55,3 +60,419 @@ async def test_batch_interval_uses_configurable_seconds():
             pass
 
     assert run_count >= 1
+
+
+@pytest.mark.asyncio
+async def test_batch_loads_metadata_once_per_cycle(tmp_path):
+    import json
+
+    metadata_path = tmp_path / "_metadata.json"
+    metadata_path.write_text(json.dumps({
+        "ch_a": {"last_message_id": 10},
+        "ch_b": {"last_message_id": 20},
+    }), encoding="utf-8")
+    mock_client = MagicMock()
+    mock_client.get_entity = AsyncMock(return_value=MagicMock())
+    channels = [
+        {"alias": "ch_a", "username": "a", "enabled": True},
+        {"alias": "ch_b", "username": "b", "enabled": True},
+        {"alias": "ch_c", "username": "c", "enabled": True},
+    ]
+
+    with patch("src.batch.load_metadata", wraps=load_metadata) as mock_load, \
+         patch("src.batch.collect_batch", new_callable=AsyncMock, return_value=0) as mock_collect:
+        await run_batch(mock_client, channels, metadata_path=str(metadata_path), data_dir="data")
+
+    assert mock_load.call_count == 1
+    passed = [call.kwargs["last_message_id"] for call in mock_collect.call_args_list]
+    assert passed == [10, 20, 0]
+
+
+@pytest.mark.asyncio
+async def test_batch_runs_channels_concurrently_up_to_limit():
+    mock_client = MagicMock()
+    mock_client.get_entity = AsyncMock(return_value=MagicMock())
+    channels = [{"alias": f"ch_{i}", "username": f"u{i}", "enabled": True} for i in range(6)]
+
+    in_flight = 0
+    max_in_flight = 0
+
+    async def slow_collect(*args, **kwargs):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return 1
+
+    with patch("src.batch.collect_batch", side_effect=slow_collect):
+        result = await run_batch(mock_client, channels, metadata_path="meta.json", data_dir="data", concurrency=3)
+
+    assert max_in_flight == 3
+    assert result == {f"ch_{i}": 1 for i in range(6)}
+
+
+@pytest.mark.asyncio
+async def test_batch_isolates_channel_failures():
+    mock_client = MagicMock()
+
+    async def get_entity(identifier):
+        if identifier == "broken":
+            raise ValueError("No user has \"broken\" as username")
+        return MagicMock()
+
+    mock_client.get_entity = AsyncMock(side_effect=get_entity)
+    channels = [
+        {"alias": "ok_a", "username": "a", "enabled": True},
+        {"alias": "broken", "username": "broken", "enabled": True},
+        {"alias": "ok_b", "username": "b", "enabled": True},
+        {"alias": "off", "username": "off", "enabled": False},
+    ]
+
+    with patch("src.batch.collect_batch", new_callable=AsyncMock, return_value=2):
+        result = await run_batch(mock_client, channels, metadata_path="meta.json", data_dir="data", concurrency=4)
+
+    assert result == {"ok_a": 2, "broken": 0, "ok_b": 2}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_batch_keeps_every_channel_checkpoint(tmp_path):
+    from datetime import datetime, timezone
+
+    def make_messages(base):
+        messages = []
+        for i in range(1, 4):
+            msg = MagicMock()
+            msg.id = base + i
+            msg.text = f"msg {i}"
+            msg.date = datetime(2026, 2, 12, 8, 0, 0, tzinfo=timezone.utc)
+            msg.media = None
+            msg.chat_id = -100
+            msg.views = 1
+            msg.forwards = 0
+            msg.edit_date = None
+            messages.append(msg)
+        return messages
+
+    entities = {f"u{i}": MagicMock(name=f"entity{i}") for i in range(5)}
+    pages = {id(entities[f"u{i}"]): make_messages(i * 100) for i in range(5)}
+
+    async def get_messages(entity, **kwargs):
+        await asyncio.sleep(0.001)
+        return pages[id(entity)]
+
+    mock_client = MagicMock()
+    mock_client.get_entity = AsyncMock(side_effect=lambda identifier: entities[identifier])
+    mock_client.get_messages = AsyncMock(side_effect=get_messages)
+    channels = [{"alias": f"ch_{i}", "username": f"u{i}", "enabled": True} for i in range(5)]
+    metadata_path = str(tmp_path / "_metadata.json")
+
+    await run_batch(mock_client, channels, metadata_path=metadata_path, data_dir=str(tmp_path / "data"), concurrency=5)
+
+    metadata = load_metadata(metadata_path)
+    for i in range(5):
+        assert metadata[f"ch_{i}"]["last_message_id"] == i * 100 + 3
+        assert metadata[f"ch_{i}"]["total_collected"] == 3
+
+
+@pytest.mark.asyncio
+async def test_adaptive_batch_polls_only_due_channels(tmp_path):
+    from datetime import datetime, timezone
+
+    from src.metadata import update_channel
+    from src.poll_scheduler import AdaptivePollScheduler
+
+    clock = [1_770_000_000.0]
+    last_polled = datetime.fromtimestamp(clock[0] - 60, timezone.utc).isoformat()
+    metadata_path = str(tmp_path / "_metadata.json")
+    update_channel(metadata_path, "hot", post_rate_per_hour=60, last_polled_at=last_polled)
+    update_channel(metadata_path, "idle", post_rate_per_hour=0.1, last_polled_at=last_polled)
+    channels = [
+        {"alias": "hot", "username": "hot", "enabled": True},
+        {"alias": "idle", "username": "idle", "enabled": True},
+    ]
+    mock_client = MagicMock()
+    mock_client.get_entity = AsyncMock(return_value=MagicMock())
+    polled = []
+    sleeps = []
+
+    async def fake_collect(client, entity, alias, report=None, **kwargs):
+        polled.append(alias)
+        report["reached_head"] = True
+        return 1
+
+    async def fake_sleep(seconds):
+        sleeps.append(seconds)
+        if len(sleeps) >= 3:
+            raise KeyboardInterrupt
+        clock[0] += seconds
+
+    with patch("src.batch.collect_batch", side_effect=fake_collect), \
+         patch("src.batch.asyncio.sleep", side_effect=fake_sleep), \
+         patch("time.time", side_effect=lambda: clock[0]):
+        scheduler = AdaptivePollScheduler(channels, metadata_path, min_interval_sec=60, max_interval_sec=3600)
+        with pytest.raises(KeyboardInterrupt):
+            await run_periodic_batch(
+                mock_client, channels,
+                metadata_path=metadata_path, data_dir=str(tmp_path / "data"),
+                scheduler=scheduler,
+            )
+
+    assert polled == ["hot", "hot", "hot"]
+    assert sleeps == [60, 60, 60]
+
+
+@pytest.mark.asyncio
+async def test_adaptive_batch_defers_channels_past_the_cycle_deadline(tmp_path):
+    from src.poll_scheduler import AdaptivePollScheduler
+
+    clock = [1_770_000_000.0]
+    metadata_path = str(tmp_path / "_metadata.json")
+    channels = [{"alias": f"ch{i}", "username": f"c{i}", "enabled": True} for i in range(3)]
+    started = []
+    sleeps = []
+
+    async def slow_collect(client, entity, alias, report=None, **kwargs):
+        started.append((alias, len(sleeps)))
+        # 첫 채널이 최소 주기(60초)를 넘겨 나머지는 이번 주기에 시작하지 않는다
+        clock[0] += 90 if len(started) == 1 else 1
+        report["reached_head"] = True
+        return 1
+
+    async def fake_sleep(seconds):
+        sleeps.append(seconds)
+        if len(sleeps) >= 2:
+            raise KeyboardInterrupt
+
+    with patch("src.batch.resolve_entity", new_callable=AsyncMock, return_value=MagicMock()), \
+         patch("src.batch.collect_batch", side_effect=slow_collect), \
+         patch("src.batch.asyncio.sleep", side_effect=fake_sleep), \
+         patch("src.batch.monotonic", side_effect=lambda: clock[0]), \
+         patch("time.time", side_effect=lambda: clock[0]):
+        scheduler = AdaptivePollScheduler(channels, metadata_path, min_interval_sec=60, max_interval_sec=3600)
+        with pytest.raises(KeyboardInterrupt):
+            await run_periodic_batch(
+                MagicMock(), channels,
+                metadata_path=metadata_path, data_dir=str(tmp_path / "data"),
+                scheduler=scheduler,
+            )
+
+    # 건너뛴 ch1, ch2는 게시 속도 기록 없이 기다리지 않고 다음 주기에 조회된다
+    assert started == [("ch0", 0), ("ch1", 1), ("ch2", 1)]
+    assert sleeps[0] == 0
+
+
+@pytest.mark.asyncio
+async def test_adaptive_batch_retries_failed_and_unfinished_channels_at_minimum_interval(tmp_path):
+    from src.poll_scheduler import AdaptivePollScheduler
+
+    clock = [1_770_000_000.0]
+    metadata_path = str(tmp_path / "_metadata.json")
+    channels = [{"alias": alias, "username": alias, "enabled": True} for alias in ("broken", "behind", "caught")]
+
+    async def collect(client, entity, alias, report=None, **kwargs):
+        if alias == "broken":
+            raise ConnectionError("network down")
+        # behind는 시간 예산에 걸려 페이지 한도보다 적게 받고 멈췄다
+        report["reached_head"] = alias == "caught"
+        return 5
+
+    async def stop(seconds):
+        raise KeyboardInterrupt
+
+    with patch("src.batch.resolve_entity", new_callable=AsyncMock, return_value=MagicMock()), \
+         patch("src.batch.collect_batch", side_effect=collect), \
+         patch("src.batch.asyncio.sleep", side_effect=stop), \
+         patch("src.batch.monotonic", side_effect=lambda: clock[0]), \
+         patch("time.time", side_effect=lambda: clock[0]):
+        scheduler = AdaptivePollScheduler(channels, metadata_path, min_interval_sec=60, max_interval_sec=3600)
+        with pytest.raises(KeyboardInterrupt):
+            await run_periodic_batch(
+                MagicMock(), channels,
+                metadata_path=metadata_path, data_dir=str(tmp_path / "data"),
+                scheduler=scheduler,
+            )
+
+    state = scheduler._state
+    assert state["broken"]["due"] == clock[0] + 60
+    assert state["broken"]["last_polled"] is None
+    assert state["behind"]["due"] == clock[0] + 60
+    assert state["caught"]["due"] > clock[0] + 60
+
+
+def _dialog(peer_id, top_id):
+    dialog = MagicMock()
+    dialog.id = peer_id
+    dialog.message = MagicMock(id=top_id)
+    return dialog
+
+
+@pytest.mark.asyncio
+async def test_dialogs_prepass_collects_only_channels_whose_head_moved(tmp_path):
+    from src.metadata import update_channel
+
+    metadata_path = str(tmp_path / "_metadata.json")
+    update_channel(metadata_path, "quiet", last_message_id=50)
+    update_channel(metadata_path, "busy", last_message_id=10)
+    entity_cache = MagicMock()
+    entity_cache.peer_id.side_effect = {"quiet": -1001, "busy": -1002, "unsubscribed": -1003}.get
+    channels = [
+        {"alias": "quiet", "username": "q", "enabled": True},
+        {"alias": "busy", "username": "b", "enabled": True},
+        {"alias": "unsubscribed", "username": "u", "enabled": True},
+    ]
+    mock_client = MagicMock()
+    mock_client.get_dialogs = AsyncMock(return_value=[_dialog(-1001, 50), _dialog(-1002, 12), _dialog(777, 3)])
+
+    with patch("src.batch.resolve_entity", new_callable=AsyncMock, return_value=MagicMock()), \
+         patch("src.batch.collect_batch", new_callable=AsyncMock, return_value=2) as mock_collect:
+        result = await run_batch(
+            mock_client, channels, metadata_path=metadata_path, data_dir=str(tmp_path),
+            entity_cache=entity_cache, dialogs_prepass=True,
+        )
+
+    mock_client.get_dialogs.assert_awaited_once_with(limit=None)
+    assert sorted(c.args[2] for c in mock_collect.call_args_list) == ["busy", "unsubscribed"]
+    assert result == {"quiet": 0, "busy": 2, "unsubscribed": 2}
+
+
+@pytest.mark.asyncio
+async def test_dialogs_prepass_failure_falls_back_to_all_channels(tmp_path):
+    channels = [{"alias": f"ch{i}", "username": f"c{i}", "enabled": True} for i in range(3)]
+    mock_client = MagicMock()
+    mock_client.get_dialogs = AsyncMock(side_effect=ConnectionError("lost"))
+
+    with patch("src.batch.resolve_entity", new_callable=AsyncMock, return_value=MagicMock()), \
+         patch("src.batch.collect_batch", new_callable=AsyncMock, return_value=0) as mock_collect:
+        await run_batch(mock_client, channels, metadata_path=str(tmp_path / "m.json"), dialogs_prepass=True)
+
+    assert mock_collect.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_dialogs_prepass_is_skipped_for_few_channels(tmp_path):
+    channels = [{"alias": "only", "username": "o", "enabled": True}]
+    mock_client = MagicMock()
+    mock_client.get_dialogs = AsyncMock(return_value=[])
+
+    with patch("src.batch.resolve_entity", new_callable=AsyncMock, return_value=MagicMock()), \
+         patch("src.batch.collect_batch", new_callable=AsyncMock, return_value=0) as mock_collect:
+        await run_batch(mock_client, channels, metadata_path=str(tmp_path / "m.json"), dialogs_prepass=True)
+
+    mock_client.get_dialogs.assert_not_called()
+    assert mock_collect.await_count == 1
+
+
+async def _run_fixed_rate(channels, collect, clock, sleeps, cycles, **kwargs):
+    async def fake_sleep(seconds):
+        sleeps.append(seconds)
+        clock[0] += seconds
+        if len(sleeps) >= cycles:
+            raise KeyboardInterrupt
+
+    mock_client = MagicMock()
+    with patch("src.batch.resolve_entity", new_callable=AsyncMock, return_value=MagicMock()), \
+         patch("src.batch.collect_batch", side_effect=collect), \
+         patch("src.batch.monotonic", side_effect=lambda: clock[0]), \
+         patch("src.batch.asyncio.sleep", side_effect=fake_sleep):
+        with pytest.raises(KeyboardInterrupt):
+            await run_periodic_batch(mock_client, channels, metadata_path="meta.json", data_dir="data", **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_fixed_rate_subtracts_cycle_time_from_sleep():
+    clock = [0.0]
+    sleeps = []
+
+    async def collect(*args, **kwargs):
+        clock[0] += 30
+        return 1
+
+    await _run_fixed_rate([{"alias": "a", "username": "a", "enabled": True}], collect, clock, sleeps, 3,
+                          interval_sec=100)
+
+    assert sleeps == [70, 70, 70]
+
+
+@pytest.mark.asyncio
+async def test_fixed_rate_applies_jitter_without_drift():
+    clock = [0.0]
+    sleeps = []
+
+    async def collect(*args, **kwargs):
+        return 1
+
+    with patch("src.batch.random.uniform", return_value=7):
+        await _run_fixed_rate([{"alias": "a", "username": "a", "enabled": True}], collect, clock, sleeps, 3,
+                              interval_sec=100, jitter_sec=10)
+
+    assert sleeps == [107, 100, 100]
+
+
+@pytest.mark.asyncio
+async def test_overrun_cycle_stops_starting_channels_and_skips_missed_ticks(caplog):
+    import logging
+
+    clock = [0.0]
+    sleeps = []
+    started = []
+    channels = [{"alias": f"ch{i}", "username": f"c{i}", "enabled": True} for i in range(4)]
+
+    async def collect(client, entity, alias, **kwargs):
+        started.append(alias)
+        clock[0] += 80 if alias == "ch0" and len(started) == 1 else 10
+        return 1
+
+    with caplog.at_level(logging.INFO):
+        await _run_fixed_rate(channels, collect, clock, sleeps, 1, interval_sec=60)
+
+    # 첫 주기: ch0이 80초 걸려 마감(60초)을 넘겼으므로 ch1~ch3은 시작하지 않는다.
+    # 80초 시점은 다음 주기(60~120)의 절반이 남아 곧바로 짧은 주기를 돌고, 건너뛴 채널부터 시작한다.
+    assert started[:5] == ["ch0", "ch1", "ch2", "ch3", "ch0"]
+    assert "Batch cycle report" in caplog.text
+    assert "overran" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_run_batch_reports_per_channel_durations_and_skips_after_deadline():
+    from time import monotonic
+
+    channels = [{"alias": "a", "username": "a", "enabled": True}, {"alias": "b", "username": "b", "enabled": True}]
+    report = {}
+
+    with patch("src.batch.resolve_entity", new_callable=AsyncMock, return_value=MagicMock()), \
+         patch("src.batch.collect_batch", new_callable=AsyncMock, return_value=3):
+        result = await run_batch(MagicMock(), channels, metadata_path="meta.json", report=report)
+        expired = {}
+        skipped = await run_batch(MagicMock(), channels, metadata_path="meta.json",
+                                  deadline=monotonic() - 1, report=expired)
+
+    assert result == {"a": 3, "b": 3}
+    assert set(report["channels"]) == {"a", "b"}
+    assert report["channels"]["a"]["count"] == 3
+    assert report["channels"]["a"]["duration_sec"] >= 0
+    assert report["failed"] == []
+    assert report["started_at"] <= report["finished_at"]
+    assert skipped == {"a": 0, "b": 0}
+    assert expired["skipped"] == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_run_batch_reports_failed_channels_and_head_progress():
+    channels = [{"alias": "ok", "username": "ok", "enabled": True}, {"alias": "bad", "username": "bad", "enabled": True}]
+    report = {}
+
+    async def collect(client, entity, alias, report=None, **kwargs):
+        if alias == "bad":
+            raise ConnectionError("network down")
+        report["reached_head"] = True
+        return 4
+
+    with patch("src.batch.resolve_entity", new_callable=AsyncMock, return_value=MagicMock()), \
+         patch("src.batch.collect_batch", side_effect=collect):
+        result = await run_batch(MagicMock(), channels, metadata_path="meta.json", report=report)
+
+    assert result == {"ok": 4, "bad": 0}
+    assert report["failed"] == ["bad"]
+    assert report["channels"]["ok"]["reached_head"] is True
+    assert report["channels"]["bad"]["reached_head"] is False
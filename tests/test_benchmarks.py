@@ -0,0 +1,36 @@
+import json
+
+from benchmarks.ingest import compare_reports, main, run_benchmarks
+
+
+def test_run_benchmarks_reports_every_stage(tmp_path):
+    results = run_benchmarks(messages=50, channels=2, lines_per_file=10, work_dir=str(tmp_path))
+
+    assert [r["stage"] for r in results] == ["parse", "parse_messages", "encode", "decode", "save_message", "save_messages", "metadata"]
+    for result in results:
+        assert result["messages"] == 50
+        assert result["messages_per_sec"] > 0
+        assert result["p50_us"] <= result["p99_us"]
+        assert result["peak_alloc_kb"] >= 0
+
+
+def test_main_writes_json_report_and_comparison(tmp_path, capsys):
+    baseline = tmp_path / "baseline.json"
+    current = tmp_path / "current.json"
+    args = ["--messages", "20", "--channels", "1", "--lines-per-file", "10", "--stage", "parse",
+            "--work-dir", str(tmp_path)]
+
+    assert main(args + ["--output", str(baseline)]) == 0
+    assert main(args + ["--output", str(current), "--compare", str(baseline)]) == 0
+    capsys.readouterr()
+
+    report = json.loads(current.read_text(encoding="utf-8"))
+    assert report["scale"] == {"messages": 20, "channels": 1, "lines_per_file": 10}
+    assert "parse" in report["comparison"]
+
+
+def test_compare_reports_computes_speedup():
+    baseline = {"results": [{"stage": "save_messages", "messages_per_sec": 100.0}]}
+    current = {"results": [{"stage": "save_messages", "messages_per_sec": 250.0}]}
+
+    assert compare_reports(baseline, current)["save_messages"]["speedup"] == 2.5
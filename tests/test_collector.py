@@ -128,3 +128,20 @@ async def test_handles_text_media_and_caption_messages(text, media, expected_has
 
         mock_parse.assert_called_once()
         mock_save.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_enqueues_to_write_queue_instead_of_saving():
+    event = MagicMock()
+    event.message.chat_id = -1001234567890
+    channel_map = {-1001234567890: "투자뉴스A"}
+    parsed_data = {"message_id": 500, "date": "2026-02-11T12:00:00+00:00"}
+    write_queue = MagicMock()
+    write_queue.put = AsyncMock()
+
+    with patch("src.collector.parse_message", return_value=parsed_data), \
+         patch("src.collector.save_message") as mock_save:
+        await handle_new_message(event, channel_map, write_queue=write_queue)
+
+    write_queue.put.assert_awaited_once_with(parsed_data, "투자뉴스A")
+    mock_save.assert_not_called()
@@ -0,0 +1,97 @@
+import json
+import os
+from datetime import datetime, timezone
+
+import pytest
+
+from src.columnar_export import MANIFEST_NAME, export_parquet
+from src.storage import compact_day_file, save_messages
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+def _msg(message_id, date="2026-02-10T09:00:00+00:00", text="삼성전자 목표주가 상향", **extra):
+    msg = {
+        "message_id": message_id,
+        "channel_id": -1001234567890,
+        "channel_alias": "news",
+        "date": date,
+        "text": text,
+        "has_media": False,
+        "media_type": None,
+        "media_file": None,
+        "views": 100 + message_id,
+        "forwards": None,
+        "edit_date": None,
+        "is_edit": False,
+        "collected_at": "2026-02-10T18:00:00.123456+00:00",
+    }
+    msg.update(extra)
+    return msg
+
+
+def _read_part(output_dir, alias, date_str):
+    return pq.read_table(os.path.join(output_dir, f"channel={alias}", f"day={date_str}", "part-0.parquet"))
+
+
+def test_exports_typed_partitioned_columns(tmp_path):
+    data_dir = str(tmp_path / "data")
+    save_messages([_msg(1), _msg(2, media_type="photo", has_media=True)], "news", data_dir=data_dir)
+    save_messages([_msg(3, date="2026-02-11T01:00:00+00:00")], "news", data_dir=data_dir)
+
+    result = export_parquet(data_dir)
+
+    assert result == {"days": 2, "exported": 2, "skipped": 0, "removed": 0, "rows": 3}
+    table = _read_part(os.path.join(data_dir, "_parquet"), "news", "2026-02-10")
+    assert table.schema.field("message_id").type == pa.int64()
+    assert table.schema.field("views").type == pa.int64()
+    assert table.schema.field("is_edit").type == pa.bool_()
+    assert pa.types.is_timestamp(table.schema.field("date").type)
+    for name in ("date", "edit_date", "collected_at"):
+        assert table.schema.field(name).type == pa.timestamp("us", tz="UTC")
+    assert table.column("collected_at")[0].as_py() == datetime(2026, 2, 10, 18, 0, 0, 123456, tzinfo=timezone.utc)
+    assert pa.types.is_dictionary(table.schema.field("text").type)
+    assert pa.types.is_dictionary(table.schema.field("media_type").type)
+    assert table.column("message_id").to_pylist() == [1, 2]
+    assert table.column("forwards").to_pylist() == [None, None]
+    assert table.column("media_type").to_pylist() == [None, "photo"]
+
+
+def test_export_is_incremental(tmp_path):
+    data_dir = str(tmp_path / "data")
+    output_dir = str(tmp_path / "out")
+    save_messages([_msg(1)], "news", data_dir=data_dir)
+    save_messages([_msg(2, date="2026-02-11T01:00:00+00:00")], "news", data_dir=data_dir)
+    export_parquet(data_dir, output_dir=output_dir)
+
+    assert export_parquet(data_dir, output_dir=output_dir)["exported"] == 0
+
+    save_messages([_msg(5, date="2026-02-11T02:00:00+00:00")], "news", data_dir=data_dir)
+    result = export_parquet(data_dir, output_dir=output_dir)
+
+    assert result["exported"] == 1
+    assert result["skipped"] == 1
+    assert _read_part(output_dir, "news", "2026-02-11").column("message_id").to_pylist() == [2, 5]
+    with open(os.path.join(output_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    assert manifest["news/2026-02-11"]["rows"] == 2
+    assert list(manifest["news/2026-02-11"]["sources"]) == ["2026-02-11.jsonl"]
+
+
+def test_export_reads_compressed_days_and_removes_deleted_sources(tmp_path):
+    data_dir = str(tmp_path / "data")
+    output_dir = str(tmp_path / "out")
+    save_messages([_msg(1), _msg(2)], "news", data_dir=data_dir)
+    compact_day_file("news", "2026-02-10", data_dir=data_dir)
+    save_messages([_msg(3)], "news", data_dir=data_dir)
+    save_messages([_msg(9, date="2026-02-12T01:00:00+00:00")], "news", data_dir=data_dir)
+    export_parquet(data_dir, output_dir=output_dir)
+
+    assert _read_part(output_dir, "news", "2026-02-10").column("message_id").to_pylist() == [1, 2, 3]
+
+    os.remove(os.path.join(data_dir, "news", "2026-02-12.jsonl"))
+    result = export_parquet(data_dir, output_dir=output_dir)
+
+    assert result["removed"] == 1
+    assert not os.path.exists(os.path.join(output_dir, "channel=news", "day=2026-02-12"))
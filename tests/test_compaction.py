@@ -0,0 +1,100 @@
+import asyncio
+import multiprocessing
+from datetime import date
+from unittest.mock import patch
+
+import pytest
+
+from src.compaction import compact_closed_days, run_periodic_compaction
+from src.storage import clear_message_id_index, fcntl, read_day_records, save_messages
+
+
+def _msgs(date_str, ids):
+    return [{"message_id": i, "date": f"{date_str}T09:00:00+00:00", "text": "본문 " * 20} for i in ids]
+
+
+def test_compacts_only_days_older_than_min_age(tmp_path):
+    data_dir = str(tmp_path)
+    save_messages(_msgs("2026-02-09", range(50)), "news", data_dir=data_dir)
+    save_messages(_msgs("2026-02-10", range(50, 60)), "news", data_dir=data_dir)
+    save_messages(_msgs("2026-02-11", range(60, 70)), "news", data_dir=data_dir)
+
+    result = compact_closed_days(data_dir, min_age_days=1, today=date(2026, 2, 11))
+
+    assert result["files"] == 2
+    assert result["messages"] == 60
+    assert result["bytes_after"] < result["bytes_before"]
+    assert sorted(p.name for p in (tmp_path / "news").iterdir()) == [
+        "2026-02-09.jsonl.gz",
+        "2026-02-09.jsonl.gz.idx",
+        "2026-02-10.jsonl.gz",
+        "2026-02-10.jsonl.gz.idx",
+        "2026-02-11.jsonl",
+        "2026-02-11.jsonl.idx",
+        "2026-02-11.jsonl.lock",
+    ]
+    assert len(list(read_day_records("news", "2026-02-09", data_dir))) == 50
+
+
+def test_second_pass_merges_late_delta(tmp_path):
+    data_dir = str(tmp_path)
+    save_messages(_msgs("2026-02-09", [1, 2]), "news", data_dir=data_dir)
+    compact_closed_days(data_dir, today=date(2026, 2, 11))
+    save_messages(_msgs("2026-02-09", [3]), "news", data_dir=data_dir)
+
+    result = compact_closed_days(data_dir, today=date(2026, 2, 11))
+
+    assert result["files"] == 1
+    assert result["messages"] == 1
+    assert sorted(p.name for p in (tmp_path / "news").iterdir()) == ["2026-02-09.jsonl.gz", "2026-02-09.jsonl.gz.idx"]
+    assert [m["message_id"] for m in read_day_records("news", "2026-02-09", data_dir)] == [1, 2, 3]
+
+
+def _append_late(data_dir, start, count):
+    clear_message_id_index()
+    for first in range(start, start + count, 10):
+        save_messages(_msgs("2026-02-09", range(first, first + 10)), "news", data_dir=data_dir)
+
+
+def _compact_repeatedly(data_dir, rounds):
+    for _ in range(rounds):
+        compact_closed_days(data_dir, today=date(2026, 2, 11))
+
+
+@pytest.mark.skipif(fcntl is None, reason="cross-process day locks need fcntl")
+def test_compaction_does_not_lose_appends_from_another_process(tmp_path):
+    data_dir = str(tmp_path)
+    save_messages(_msgs("2026-02-09", range(100)), "news", data_dir=data_dir)
+
+    context = multiprocessing.get_context("fork")
+    writers = [context.Process(target=_append_late, args=(data_dir, 1000 * (i + 1), 500)) for i in range(2)]
+    compactor = context.Process(target=_compact_repeatedly, args=(data_dir, 50))
+    for process in writers + [compactor]:
+        process.start()
+    while any(writer.is_alive() for writer in writers):
+        compact_closed_days(data_dir, today=date(2026, 2, 11))
+    for process in writers + [compactor]:
+        process.join()
+    compact_closed_days(data_dir, today=date(2026, 2, 11))
+
+    ids = [m["message_id"] for m in read_day_records("news", "2026-02-09", data_dir)]
+    assert sorted(ids) == sorted(list(range(100)) + list(range(1000, 1500)) + list(range(2000, 2500)))
+    assert sorted(p.name for p in (tmp_path / "news").iterdir()) == ["2026-02-09.jsonl.gz", "2026-02-09.jsonl.gz.idx"]
+
+
+@pytest.mark.asyncio
+async def test_periodic_compaction_keeps_running_after_errors(tmp_path):
+    calls = []
+
+    def _fail(*args):
+        calls.append(args)
+        raise OSError("disk full")
+
+    with patch("src.compaction.compact_closed_days", side_effect=_fail):
+        task = asyncio.create_task(run_periodic_compaction(str(tmp_path), interval_sec=0.01))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    assert len(calls) >= 2
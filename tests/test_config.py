@@ -49,13 +49,31 @@ def test_load_config_reads_optional_with_defaults(monkeypatch):
     monkeypatch.delenv("DOWNLOAD_MEDIA", raising=False)
     monkeypatch.delenv("LOG_LEVEL", raising=False)
     monkeypatch.delenv("DATA_DIR", raising=False)
+    monkeypatch.delenv("STORAGE_BACKEND", raising=False)
+    monkeypatch.delenv("SQLITE_PATH", raising=False)
+    monkeypatch.delenv("SEARCH_INDEX", raising=False)
+    monkeypatch.delenv("SEARCH_INDEX_PATH", raising=False)
+    monkeypatch.delenv("COMPACTION_INTERVAL_SEC", raising=False)
+    monkeypatch.delenv("COMPACTION_MIN_AGE_DAYS", raising=False)
     monkeypatch.delenv("MEDIA_MAX_SIZE_MB", raising=False)
     monkeypatch.delenv("BATCH_INTERVAL_SEC", raising=False)
+    monkeypatch.delenv("BATCH_CONCURRENCY", raising=False)
+    monkeypatch.delenv("BATCH_MAX_PAGES", raising=False)
+    monkeypatch.delenv("BATCH_CHANNEL_BUDGET_SEC", raising=False)
 
     config = load_config()
 
     assert config["download_media"] is True
     assert config["log_level"] == "INFO"
     assert config["data_dir"] == "data"
+    assert config["storage_backend"] == "jsonl"
+    assert config["sqlite_path"] == "data/messages.db"
+    assert config["search_index"] is True
+    assert config["search_index_path"] == "data/_search.db"
+    assert config["compaction_interval_sec"] == 3600
+    assert config["compaction_min_age_days"] == 1
     assert config["media_max_size_mb"] == 50
     assert config["batch_interval_sec"] == 300
+    assert config["batch_concurrency"] == 4
+    assert config["batch_max_pages"] == 10
+    assert config["batch_channel_budget_sec"] == 60
@@ -0,0 +1,167 @@
+import importlib
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+import src.entity_cache
+from src.entity_cache import EntityCache, entity_id, resolve_entity
+
+
+def _import_real_telethon():
+    # 다른 테스트 모듈이 sys.modules에 넣어 둔 telethon MagicMock은 잠시 치웠다가 되돌린다
+    mocked = {name: module for name, module in sys.modules.items() if name.split(".")[0] == "telethon"}
+    for name in mocked:
+        del sys.modules[name]
+    try:
+        real_types = pytest.importorskip("telethon.tl.types")
+        real_utils = importlib.import_module("telethon.utils")
+    finally:
+        for name in [name for name in sys.modules if name.split(".")[0] == "telethon"]:
+            del sys.modules[name]
+        sys.modules.update(mocked)
+    return real_types, real_utils
+
+
+types, utils = _import_real_telethon()
+
+
+@pytest.fixture(autouse=True)
+def real_telethon(monkeypatch):
+    monkeypatch.setattr(src.entity_cache, "types", types)
+    monkeypatch.setattr(src.entity_cache, "utils", utils)
+
+
+def _channel(channel_id=123, access_hash=456):
+    return types.Channel(
+        id=channel_id,
+        title="투자뉴스A",
+        photo=types.ChatPhotoEmpty(),
+        date=None,
+        access_hash=access_hash,
+    )
+
+
+@pytest.mark.asyncio
+async def test_resolve_caches_peer_and_access_hash(tmp_path):
+    cache_path = str(tmp_path / "entity_cache.json")
+    client = MagicMock()
+    client.get_entity = AsyncMock(return_value=_channel())
+
+    cache = EntityCache(cache_path)
+    await resolve_entity(client, "investnews_kr", cache=cache, key="투자뉴스A")
+    cache.save()
+
+    saved = json.loads(open(cache_path, encoding="utf-8").read())
+    assert saved["투자뉴스A"]["identifier"] == "investnews_kr"
+    assert saved["투자뉴스A"]["peer_id"] == -1000000000123
+    assert saved["투자뉴스A"]["access_hash"] == 456
+
+
+@pytest.mark.asyncio
+async def test_cached_entity_skips_get_entity_after_restart(tmp_path):
+    cache_path = str(tmp_path / "entity_cache.json")
+    client = MagicMock()
+    client.get_entity = AsyncMock(return_value=_channel())
+
+    first = EntityCache(cache_path)
+    await resolve_entity(client, "investnews_kr", cache=first, key="투자뉴스A")
+    first.save()
+
+    restarted = EntityCache(cache_path)
+    entity = await resolve_entity(client, "investnews_kr", cache=restarted, key="투자뉴스A")
+
+    assert client.get_entity.await_count == 1
+    assert entity == types.InputPeerChannel(channel_id=123, access_hash=456)
+    assert entity_id(entity) == 123
+
+
+@pytest.mark.asyncio
+async def test_expired_entry_is_resolved_again(tmp_path):
+    cache = EntityCache(str(tmp_path / "entity_cache.json"), ttl_sec=60)
+    client = MagicMock()
+    client.get_entity = AsyncMock(return_value=_channel())
+
+    await resolve_entity(client, "investnews_kr", cache=cache, key="투자뉴스A")
+    later = datetime.now(timezone.utc) + timedelta(seconds=120)
+    with patch("src.entity_cache._now", return_value=later):
+        await resolve_entity(client, "investnews_kr", cache=cache, key="투자뉴스A")
+
+    assert client.get_entity.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_changed_identifier_is_resolved_again(tmp_path):
+    cache = EntityCache(str(tmp_path / "entity_cache.json"))
+    client = MagicMock()
+    client.get_entity = AsyncMock(return_value=_channel())
+
+    await resolve_entity(client, "old_username", cache=cache, key="투자뉴스A")
+    await resolve_entity(client, "new_username", cache=cache, key="투자뉴스A")
+
+    assert client.get_entity.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_resolve_invalidates_entry(tmp_path):
+    cache = EntityCache(str(tmp_path / "entity_cache.json"), ttl_sec=0)
+    client = MagicMock()
+    client.get_entity = AsyncMock(return_value=_channel())
+    await resolve_entity(client, "investnews_kr", cache=cache, key="투자뉴스A")
+
+    client.get_entity = AsyncMock(side_effect=ValueError("No user has \"investnews_kr\" as username"))
+    with pytest.raises(ValueError):
+        await resolve_entity(client, "investnews_kr", cache=cache, key="투자뉴스A")
+
+    assert cache.get("투자뉴스A", "investnews_kr") is None
+
+
+class ChannelPrivateError(Exception):
+    pass
+
+
+@pytest.mark.asyncio
+async def test_batch_invalidates_cache_when_peer_is_invalid(tmp_path):
+    from src.batch import run_batch
+
+    cache_path = str(tmp_path / "entity_cache.json")
+    cache = EntityCache(cache_path)
+    cache.put("투자뉴스A", "investnews_kr", _channel())
+    client = MagicMock()
+    client.get_entity = AsyncMock()
+    channels = [{"alias": "투자뉴스A", "username": "investnews_kr", "enabled": True}]
+
+    with patch("src.batch.collect_batch", new_callable=AsyncMock, side_effect=ChannelPrivateError("private")):
+        await run_batch(client, channels, metadata_path=str(tmp_path / "_metadata.json"), entity_cache=cache)
+
+    client.get_entity.assert_not_awaited()
+    assert json.loads(open(cache_path, encoding="utf-8").read()) == {}
+
+
+@pytest.mark.asyncio
+async def test_batch_keeps_cache_on_transient_errors(tmp_path):
+    from src.batch import run_batch
+
+    cache = EntityCache(str(tmp_path / "entity_cache.json"))
+    cache.put("투자뉴스A", "investnews_kr", _channel())
+    channels = [{"alias": "투자뉴스A", "username": "investnews_kr", "enabled": True}]
+
+    with patch("src.batch.collect_batch", new_callable=AsyncMock, side_effect=ConnectionError("lost")):
+        await run_batch(MagicMock(), channels, metadata_path=str(tmp_path / "_metadata.json"), entity_cache=cache)
+
+    assert cache.peer_id("투자뉴스A") == -1000000000123
+    assert cache.get("투자뉴스A", "investnews_kr") is not None
+
+
+@pytest.mark.asyncio
+async def test_peer_id_is_available_even_after_ttl(tmp_path):
+    client = MagicMock()
+    client.get_entity = AsyncMock(return_value=_channel())
+    cache = EntityCache(str(tmp_path / "entity_cache.json"), ttl_sec=0)
+    await resolve_entity(client, "investnews_kr", cache=cache, key="투자뉴스A")
+
+    assert cache.get("투자뉴스A", "investnews_kr") is None
+    assert cache.peer_id("투자뉴스A") == -1000000000123
+    assert cache.peer_id("missing") is None
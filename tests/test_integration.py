@@ -8,6 +8,7 @@ from src.batch_collector import collect_batch
 from src.collector import handle_new_message
 from src.media_downloader import download_media
 from src.message_parser import parse_message
+from src.metadata import load_metadata
 from src.storage import save_message
 
 
@@ -149,7 +150,7 @@ async def test_batch_collection_pipeline(tmp_path):
     assert len(lines) == 2
 
     # 메타데이터 검증
-    meta = json.loads(open(metadata_path, encoding="utf-8").read())
+    meta = load_metadata(metadata_path)
     assert meta["배치채널"]["last_message_id"] == 6002
     assert meta["배치채널"]["total_collected"] == 2
 
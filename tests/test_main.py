@@ -29,3 +29,109 @@ async def test_main_connects_and_runs():
 
     mock_client.start.assert_called_once_with(phone="+821012345678")
     mock_client.run_until_disconnected.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_main_calls_on_connected_after_start():
+    mock_client = MagicMock()
+    mock_client.start = AsyncMock()
+    mock_client.run_until_disconnected = AsyncMock()
+    on_connected = MagicMock()
+
+    await run_client(mock_client, phone="+821012345678", on_connected=on_connected)
+
+    on_connected.assert_called_once()
+
+
+class _FloodWait(Exception):
+    def __init__(self, seconds):
+        super().__init__(f"wait {seconds}")
+        self.seconds = seconds
+
+
+@pytest.mark.asyncio
+async def test_supervisor_reconnects_with_backoff_and_fires_hook():
+    from src.reconnect import ReconnectManager
+
+    mock_client = MagicMock()
+    mock_client.start = AsyncMock()
+    mock_client.run_until_disconnected = AsyncMock(side_effect=[ConnectionError("lost"), ConnectionError("lost"), None])
+    on_connected = MagicMock()
+    on_reconnect = MagicMock(return_value=None)
+    manager = ReconnectManager(on_reconnect=on_reconnect)
+
+    with patch("src.main.asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+        await run_client(mock_client, phone="+821012345678", on_connected=on_connected, reconnect=manager)
+
+    assert [c.args[0] for c in mock_sleep.await_args_list] == [30, 30]
+    assert mock_client.start.await_count == 3
+    on_connected.assert_called_once()
+    assert on_reconnect.call_count == 2
+    assert manager.metrics["reconnects"] == 2
+    assert manager.attempt == 0
+
+
+@pytest.mark.asyncio
+async def test_supervisor_backs_off_while_connect_keeps_failing():
+    from src.reconnect import ReconnectManager
+
+    mock_client = MagicMock()
+    mock_client.start = AsyncMock(side_effect=[None, OSError("down"), OSError("down"), None])
+    mock_client.run_until_disconnected = AsyncMock(side_effect=[ConnectionError("lost"), None])
+    manager = ReconnectManager()
+
+    with patch("src.main.asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+        await run_client(mock_client, phone="+821012345678", reconnect=manager)
+
+    assert [c.args[0] for c in mock_sleep.await_args_list] == [30, 60, 120]
+    assert manager.metrics["reconnects"] == 1
+    assert manager.metrics["disconnected_sec"] >= 0
+
+
+@pytest.mark.asyncio
+async def test_supervisor_honors_flood_wait_exactly():
+    from src.reconnect import ReconnectManager
+
+    mock_client = MagicMock()
+    mock_client.start = AsyncMock(side_effect=[_FloodWait(17), None])
+    mock_client.run_until_disconnected = AsyncMock()
+    on_connected = MagicMock()
+    manager = ReconnectManager()
+
+    with patch("src.main.asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+        await run_client(mock_client, phone="+821012345678", on_connected=on_connected, reconnect=manager)
+
+    mock_sleep.assert_awaited_once_with(17)
+    on_connected.assert_called_once()
+    assert manager.attempt == 0
+    assert manager.metrics["flood_waits"] == 1
+    assert manager.metrics["flood_wait_sec"] == 17
+
+
+@pytest.mark.asyncio
+async def test_supervisor_does_not_retry_unexpected_errors():
+    mock_client = MagicMock()
+    mock_client.start = AsyncMock(side_effect=ValueError("bad phone"))
+
+    with pytest.raises(ValueError):
+        await run_client(mock_client, phone="bad")
+
+
+@pytest.mark.asyncio
+async def test_supervisor_measures_catch_up_after_reconnect():
+    import asyncio
+    from src.reconnect import ReconnectManager
+
+    async def catch_up():
+        await asyncio.sleep(0)
+
+    mock_client = MagicMock()
+    mock_client.start = AsyncMock()
+    mock_client.run_until_disconnected = AsyncMock(side_effect=[ConnectionError("lost"), None])
+    manager = ReconnectManager(on_reconnect=lambda: asyncio.ensure_future(catch_up()))
+
+    with patch("src.main.asyncio.sleep", new_callable=AsyncMock):
+        await run_client(mock_client, phone="+821012345678", reconnect=manager)
+    await asyncio.sleep(0.01)
+
+    assert manager.metrics["catch_up_sec"] > 0
@@ -75,3 +75,39 @@ async def test_downloads_highest_resolution_photo(tmp_path):
     call_kwargs = mock_client.download_media.call_args
     assert call_kwargs[0][0] == mock_message
     assert result is not None
+
+
+@pytest.mark.asyncio
+async def test_existing_file_is_not_downloaded_again(tmp_path):
+    mock_client = MagicMock()
+    mock_client.download_media = AsyncMock()
+
+    mock_message = MagicMock()
+    mock_message.id = 100
+    mock_message.media = MagicMock()
+    mock_message.file = MagicMock()
+    mock_message.file.size = 1024
+    mock_message.file.name = "photo.jpg"
+
+    existing = generate_media_file_path("ch", 100, "photo.jpg", data_dir=str(tmp_path))
+    os.makedirs(os.path.dirname(existing))
+    open(existing, "wb").close()
+
+    result = await download_media(mock_client, mock_message, "ch", data_dir=str(tmp_path))
+
+    assert result == existing
+    mock_client.download_media.assert_not_called()
+
+
+def test_media_index_keeps_latest_entry_per_message(tmp_path):
+    from src.media_downloader import load_media_files, record_media_file
+
+    data_dir = str(tmp_path)
+    record_media_file("ch", 1, os.path.join(data_dir, "ch", "media", "1_a.jpg"), data_dir=data_dir)
+    record_media_file("ch", 2, os.path.join(data_dir, "ch", "media", "2_b.pdf"), data_dir=data_dir)
+    record_media_file("ch", 1, os.path.join(data_dir, "ch", "media", "1_c.jpg"), data_dir=data_dir)
+
+    assert load_media_files("ch", data_dir=data_dir) == {
+        1: os.path.join("media", "1_c.jpg"),
+        2: os.path.join("media", "2_b.pdf"),
+    }
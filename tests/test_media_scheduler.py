@@ -0,0 +1,140 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.media_downloader import load_media_files
+from src.media_scheduler import MediaDownloadScheduler
+
+
+def _media_message(message_id, name="chart.png"):
+    msg = MagicMock()
+    msg.id = message_id
+    msg.media = MagicMock()
+    msg.file = MagicMock()
+    msg.file.size = 1024
+    msg.file.name = name
+    return msg
+
+
+def _writing_client(delay=0.0):
+    state = {"in_flight": 0, "max_in_flight": 0, "order": []}
+
+    async def download(message, file):
+        state["in_flight"] += 1
+        state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+        state["order"].append(message.id)
+        await asyncio.sleep(delay)
+        with open(file, "wb") as f:
+            f.write(b"data")
+        state["in_flight"] -= 1
+        return file
+
+    client = MagicMock()
+    client.download_media = AsyncMock(side_effect=download)
+    return client, state
+
+
+@pytest.mark.asyncio
+async def test_schedule_returns_without_waiting_and_records_sidecar(tmp_path):
+    client, _ = _writing_client(delay=0.01)
+    scheduler = MediaDownloadScheduler(client, data_dir=str(tmp_path))
+
+    task = scheduler.schedule(_media_message(10), "투자뉴스A")
+    assert not task.done()
+
+    await scheduler.close()
+
+    assert load_media_files("투자뉴스A", data_dir=str(tmp_path)) == {10: "media/10_chart.png"}
+    assert scheduler.metrics["downloaded"] == 1
+
+
+@pytest.mark.asyncio
+async def test_limits_concurrent_downloads(tmp_path):
+    client, state = _writing_client(delay=0.01)
+    scheduler = MediaDownloadScheduler(client, data_dir=str(tmp_path), concurrency=2, per_channel_limit=10)
+
+    for i in range(6):
+        scheduler.schedule(_media_message(i), "투자뉴스A")
+    await scheduler.close()
+
+    assert state["max_in_flight"] == 2
+    assert client.download_media.await_count == 6
+
+
+@pytest.mark.asyncio
+async def test_busy_channel_does_not_starve_other_channels(tmp_path):
+    client, state = _writing_client(delay=0.01)
+    scheduler = MediaDownloadScheduler(client, data_dir=str(tmp_path), concurrency=2, per_channel_limit=1)
+
+    for i in range(5):
+        scheduler.schedule(_media_message(i), "busy")
+    scheduler.schedule(_media_message(100), "quiet")
+    await scheduler.close()
+
+    # quiet 채널은 busy 채널의 대기열이 모두 끝날 때까지 기다리지 않는다
+    assert state["order"].index(100) <= 1
+
+
+@pytest.mark.asyncio
+async def test_skips_disabled_duplicate_and_text_only(tmp_path):
+    client, _ = _writing_client()
+    scheduler = MediaDownloadScheduler(client, data_dir=str(tmp_path), download_enabled=False)
+    assert scheduler.schedule(_media_message(1), "ch") is None
+
+    scheduler = MediaDownloadScheduler(client, data_dir=str(tmp_path))
+    text_only = _media_message(2)
+    text_only.media = None
+    assert scheduler.schedule(text_only, "ch") is None
+    assert scheduler.schedule(_media_message(3), "ch") is not None
+    assert scheduler.schedule(_media_message(3), "ch") is None
+    await scheduler.close()
+
+    assert client.download_media.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_finished_downloads_are_forgotten_and_not_recorded_twice(tmp_path):
+    client, _ = _writing_client()
+    scheduler = MediaDownloadScheduler(client, data_dir=str(tmp_path))
+
+    scheduler.schedule(_media_message(5), "ch")
+    await scheduler.close()
+    assert not scheduler._scheduled
+
+    # 같은 메시지가 다시 들어오면 파일은 이미 있어 내려받지 않고, sidecar에도 다시 쓰지 않는다
+    scheduler.schedule(_media_message(5), "ch")
+    await scheduler.close()
+
+    assert client.download_media.await_count == 1
+    sidecar = tmp_path / "ch" / "media" / "_index.jsonl"
+    assert len(sidecar.read_text(encoding="utf-8").splitlines()) == 1
+
+
+@pytest.mark.asyncio
+async def test_batch_collection_schedules_media_downloads(tmp_path):
+    from datetime import datetime, timezone
+
+    from src.batch_collector import collect_batch
+
+    msg = _media_message(700, name="report.pdf")
+    msg.text = "리포트 첨부"
+    msg.date = datetime(2026, 2, 12, 8, 0, 0, tzinfo=timezone.utc)
+    msg.chat_id = -1001234567890
+    msg.views = 1
+    msg.forwards = 0
+    msg.edit_date = None
+
+    client, _ = _writing_client()
+    client.get_messages = AsyncMock(return_value=[msg])
+    data_dir = str(tmp_path / "data")
+    scheduler = MediaDownloadScheduler(client, data_dir=data_dir)
+
+    await collect_batch(
+        client, MagicMock(), "투자뉴스A",
+        metadata_path=str(tmp_path / "_metadata.json"), data_dir=data_dir,
+        media_scheduler=scheduler,
+    )
+    await scheduler.close()
+
+    assert load_media_files("투자뉴스A", data_dir=data_dir) == {700: "media/700_report.pdf"}
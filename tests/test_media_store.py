@@ -0,0 +1,114 @@
+import asyncio
+import os
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.media_downloader import download_media
+from src.media_store import MediaStore, media_key
+
+
+def _document_message(message_id, document_id=555, access_hash=777, name="chart.pdf"):
+    msg = MagicMock()
+    msg.id = message_id
+    msg.media = MagicMock()
+    msg.photo = None
+    msg.document = MagicMock()
+    msg.document.id = document_id
+    msg.document.access_hash = access_hash
+    msg.file = MagicMock()
+    msg.file.size = 1024
+    msg.file.name = name
+    msg.file.ext = ".pdf"
+    return msg
+
+
+def _client(content=b"%PDF-1.7 chart", delay=0.0):
+    async def download(message, file):
+        await asyncio.sleep(delay)
+        with open(file, "wb") as f:
+            f.write(content)
+        return file
+
+    client = MagicMock()
+    client.download_media = AsyncMock(side_effect=download)
+    return client
+
+
+def test_media_key_uses_document_or_photo_id():
+    msg = _document_message(1)
+    assert media_key(msg) == "document_555_777"
+
+    text_only = MagicMock()
+    text_only.photo = None
+    text_only.document = None
+    assert media_key(text_only) is None
+
+
+@pytest.mark.asyncio
+async def test_same_media_across_channels_is_downloaded_once(tmp_path):
+    data_dir = str(tmp_path)
+    store = MediaStore(data_dir)
+    client = _client()
+
+    first = await download_media(client, _document_message(10), "ch_a", data_dir=data_dir, media_store=store)
+    second = await download_media(client, _document_message(20), "ch_b", data_dir=data_dir, media_store=store)
+
+    assert client.download_media.await_count == 1
+    assert first == os.path.join(data_dir, "ch_a", "media", "10_chart.pdf")
+    assert second == os.path.join(data_dir, "ch_b", "media", "20_chart.pdf")
+    assert os.stat(first).st_ino == os.stat(second).st_ino
+    assert store.metrics["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_identical_content_with_new_id_shares_one_blob(tmp_path):
+    data_dir = str(tmp_path)
+    store = MediaStore(data_dir)
+    client = _client()
+
+    await download_media(client, _document_message(10, document_id=1), "ch_a", data_dir=data_dir, media_store=store)
+    await download_media(client, _document_message(11, document_id=2), "ch_a", data_dir=data_dir, media_store=store)
+
+    blobs = [name for _, _, files in os.walk(store.root) for name in files if name.endswith(".pdf")]
+    assert len(blobs) == 1
+    assert store.metrics["content_dedup"] == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_download(tmp_path):
+    data_dir = str(tmp_path)
+    store = MediaStore(data_dir)
+    client = _client(delay=0.01)
+
+    results = await asyncio.gather(*[
+        download_media(client, _document_message(i), f"ch_{i}", data_dir=data_dir, media_store=store)
+        for i in range(5)
+    ])
+
+    assert client.download_media.await_count == 1
+    assert all(os.path.exists(path) for path in results)
+
+
+@pytest.mark.asyncio
+async def test_index_is_reloaded_after_restart(tmp_path):
+    data_dir = str(tmp_path)
+    client = _client()
+    await download_media(client, _document_message(10), "ch_a", data_dir=data_dir, media_store=MediaStore(data_dir))
+
+    restarted = MediaStore(data_dir)
+    await download_media(client, _document_message(20), "ch_b", data_dir=data_dir, media_store=restarted)
+
+    assert client.download_media.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_falls_back_to_store_reference_without_hardlinks(tmp_path):
+    data_dir = str(tmp_path)
+    store = MediaStore(data_dir)
+
+    with patch("src.media_store.os.link", side_effect=OSError("cross-device link")):
+        path = await download_media(_client(), _document_message(10), "ch_a", data_dir=data_dir, media_store=store)
+
+    assert path.startswith(store.root)
+    assert os.path.exists(path)
@@ -2,7 +2,10 @@ import logging
 from datetime import datetime, timezone
 from unittest.mock import MagicMock, PropertyMock
 
-from src.message_parser import parse_message
+import pytest
+
+from src.message_parser import FIELDS, MessageRecord, parse_message, parse_messages
+from src.serialization import dumps
 
 
 def test_parse_text_only_message(mock_message):
@@ -140,3 +143,66 @@ def test_parse_failure_logs_error_with_message_id(caplog):
 
     assert result is None
     assert "99999" in caplog.text
+
+
+def _telethon_message(message_id, date=None):
+    msg = MagicMock()
+    msg.id = message_id
+    msg.text = f"메시지 {message_id}"
+    msg.date = date or datetime(2026, 2, 11, 9, 0, 0, tzinfo=timezone.utc)
+    msg.media = None
+    msg.views = 1
+    msg.forwards = 0
+    msg.edit_date = None
+    msg.chat_id = -1001234567890
+    return msg
+
+
+def test_parse_messages_shares_collected_at_across_batch():
+    records = parse_messages([_telethon_message(i) for i in range(3)], channel_alias="투자뉴스A")
+
+    assert [r["message_id"] for r in records] == [0, 1, 2]
+    assert all(isinstance(r, MessageRecord) for r in records)
+    assert records[0].collected_at is records[1].collected_at is records[2].collected_at
+
+
+def test_parse_messages_skips_unparseable_messages(caplog):
+    broken = _telethon_message(2)
+    broken.date = "not a datetime"
+
+    with caplog.at_level(logging.ERROR):
+        records = parse_messages([_telethon_message(1), broken, _telethon_message(3)], channel_alias="ch")
+
+    assert [r["message_id"] for r in records] == [1, 3]
+    assert "Failed to parse message 2" in caplog.text
+
+
+def test_record_formats_dates_lazily(mock_message):
+    mock_message.edit_date = datetime(2026, 2, 11, 10, 30, 0, tzinfo=timezone.utc)
+    record = parse_message(mock_message, channel_alias="투자뉴스A")
+
+    assert record._date_iso is None
+    assert record["date"] == "2026-02-11T09:00:00+00:00"
+    assert record._date_iso == "2026-02-11T09:00:00+00:00"
+    assert record.get("edit_date") == "2026-02-11T10:30:00+00:00"
+
+
+def test_record_to_dict_matches_legacy_layout(mock_message):
+    record = parse_message(mock_message, channel_alias="투자뉴스A")
+    as_dict = record.to_dict()
+
+    assert tuple(as_dict) == FIELDS
+    assert dict(record) == as_dict
+    assert record == as_dict
+    assert dumps(record) == dumps(as_dict)
+
+
+def test_record_supports_item_assignment_for_known_fields(mock_message):
+    record = parse_message(mock_message, channel_alias="투자뉴스A")
+
+    record["media_file"] = "12345_photo.jpg"
+
+    assert record.to_dict()["media_file"] == "12345_photo.jpg"
+    assert record.get("unknown", "fallback") == "fallback"
+    with pytest.raises(KeyError):
+        record["unknown"] = 1
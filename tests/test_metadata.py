@@ -1,4 +1,19 @@
-from src.metadata import increment_collected, load_metadata, save_metadata, update_channel
+import multiprocessing
+from unittest.mock import patch
+
+import pytest
+
+from src import metadata
+from src.metadata import (
+    _append_journal,
+    channel_transaction,
+    compact_metadata,
+    generate_journal_path,
+    increment_collected,
+    load_metadata,
+    save_metadata,
+    update_channel,
+)
 
 
 def test_load_returns_empty_when_file_missing(tmp_path):
@@ -7,6 +22,8 @@ def test_load_returns_empty_when_file_missing(tmp_path):
     result = load_metadata(str(filepath))
 
     assert result == {}
+    # 읽기만 하는 프로세스가 빈 데이터 디렉터리에 락 파일을 남기지 않는다
+    assert list(tmp_path.iterdir()) == []
 
 
 def test_save_writes_metadata_to_file(tmp_path):
@@ -116,3 +133,144 @@ def test_metadata_concurrent_writes_are_safe(tmp_path):
     assert "ch_b" in result
     assert result["ch_a"]["total_collected"] >= 1
     assert result["ch_b"]["total_collected"] >= 1
+
+
+def test_update_channel_applies_fields_and_increments_in_one_write(tmp_path):
+    filepath = str(tmp_path / "_metadata.json")
+    save_metadata(filepath, {"ch_a": {"total_collected": 10}})
+
+    with patch("src.metadata._append_journal", wraps=_append_journal) as mock_append:
+        update_channel(filepath, "ch_a", increments={"total_collected": 100}, last_message_id=700)
+
+    assert mock_append.call_count == 1
+    result = load_metadata(filepath)
+    assert result["ch_a"] == {"total_collected": 110, "last_message_id": 700}
+
+
+def test_channel_transaction_writes_once_on_exit(tmp_path):
+    filepath = str(tmp_path / "_metadata.json")
+
+    with patch("src.metadata._append_journal", wraps=_append_journal) as mock_append:
+        with channel_transaction(filepath, "ch_a") as entry:
+            entry["last_message_id"] = 5
+            entry["total_collected"] = entry.get("total_collected", 0) + 3
+            assert mock_append.call_count == 0
+
+    assert mock_append.call_count == 1
+    assert load_metadata(filepath)["ch_a"] == {"last_message_id": 5, "total_collected": 3}
+
+
+def test_save_replaces_file_atomically(tmp_path):
+    filepath = tmp_path / "_metadata.json"
+    save_metadata(str(filepath), {"ch_a": {"last_message_id": 1}})
+    save_metadata(str(filepath), {"ch_a": {"last_message_id": 2}})
+
+    assert load_metadata(str(filepath))["ch_a"]["last_message_id"] == 2
+    assert not [p.name for p in tmp_path.iterdir() if p.name.endswith(".tmp")]
+
+
+def _reload(filepath):
+    # 다른 프로세스가 새로 시작한 것처럼 메모리 캐시를 비우고 읽는다
+    metadata._states.clear()
+    return load_metadata(filepath)
+
+
+def test_update_appends_one_journal_line_without_rewriting_snapshot(tmp_path):
+    import json
+
+    filepath = str(tmp_path / "_metadata.json")
+    save_metadata(filepath, {f"ch_{i}": {"last_message_id": i} for i in range(100)})
+    snapshot = (tmp_path / "_metadata.json").read_bytes()
+
+    update_channel(filepath, "ch_5", last_message_id=500)
+    update_channel(filepath, "ch_new", last_message_id=1)
+
+    assert (tmp_path / "_metadata.json").read_bytes() == snapshot
+    lines = (tmp_path / "_metadata.json.journal").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["alias"] for line in lines] == ["ch_5", "ch_new"]
+
+    result = _reload(filepath)
+    assert result["ch_5"]["last_message_id"] == 500
+    assert result["ch_new"]["last_message_id"] == 1
+    assert result["ch_99"]["last_message_id"] == 99
+
+
+def test_load_recovers_from_torn_journal_tail(tmp_path):
+    filepath = str(tmp_path / "_metadata.json")
+    update_channel(filepath, "ch_a", last_message_id=10)
+    update_channel(filepath, "ch_b", last_message_id=20)
+    journal = tmp_path / "_metadata.json.journal"
+    with open(journal, "ab") as f:
+        f.write(b'{"alias": "ch_a", "entry": {"last_mess')
+
+    result = _reload(filepath)
+
+    assert result == {"ch_a": {"last_message_id": 10}, "ch_b": {"last_message_id": 20}}
+    assert journal.read_bytes().endswith(b"}\n")
+
+    update_channel(filepath, "ch_a", last_message_id=11)
+    assert _reload(filepath)["ch_a"]["last_message_id"] == 11
+
+
+def test_compaction_folds_journal_into_snapshot(tmp_path):
+    import json
+
+    filepath = str(tmp_path / "_metadata.json")
+    save_metadata(filepath, {"ch_a": {"total_collected": 1}})
+    increment_collected(filepath, "ch_a", 4)
+
+    compact_metadata(filepath)
+
+    assert not (tmp_path / "_metadata.json.journal").exists()
+    assert json.loads((tmp_path / "_metadata.json").read_text(encoding="utf-8")) == {"ch_a": {"total_collected": 5}}
+
+
+def test_journal_is_compacted_automatically(tmp_path):
+    filepath = str(tmp_path / "_metadata.json")
+
+    with patch("src.metadata.COMPACT_EVERY", 3):
+        for i in range(7):
+            increment_collected(filepath, "ch_a")
+
+    journal = tmp_path / "_metadata.json.journal"
+    assert len(journal.read_text(encoding="utf-8").splitlines()) == 1
+    assert _reload(filepath)["ch_a"]["total_collected"] == 7
+
+
+def test_external_snapshot_change_is_picked_up(tmp_path):
+    import json
+
+    filepath = tmp_path / "_metadata.json"
+    update_channel(str(filepath), "ch_a", last_message_id=1)
+    filepath.write_text(json.dumps({"ch_b": {"last_message_id": 2}}), encoding="utf-8")
+    (tmp_path / "_metadata.json.journal").unlink()
+
+    assert load_metadata(str(filepath)) == {"ch_b": {"last_message_id": 2}}
+
+
+def test_journal_path_sits_next_to_snapshot(tmp_path):
+    assert generate_journal_path(str(tmp_path / "_metadata.json")) == str(tmp_path / "_metadata.json.journal")
+
+
+def _increment_many(filepath, alias, count):
+    for _ in range(count):
+        increment_collected(filepath, alias)
+        update_channel(filepath, "shared", increments={"total_collected": 1})
+
+
+@pytest.mark.skipif(metadata.fcntl is None, reason="cross-process metadata lock needs fcntl")
+def test_concurrent_processes_do_not_lose_journal_lines(tmp_path):
+    filepath = str(tmp_path / "_metadata.json")
+    update_channel(filepath, "shared", total_collected=0)
+
+    context = multiprocessing.get_context("fork")
+    with patch("src.metadata.COMPACT_EVERY", 7):
+        workers = [context.Process(target=_increment_many, args=(filepath, f"ch_{i}", 150)) for i in range(3)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+    data = _reload(filepath)
+    assert data["shared"]["total_collected"] == 450
+    assert [data[f"ch_{i}"]["total_collected"] for i in range(3)] == [150, 150, 150]
@@ -0,0 +1,72 @@
+import os
+
+from src.offset_index import (
+    ENTRY,
+    clear_loaded_indexes,
+    generate_index_path,
+    latest_ids,
+    load_index,
+    read_message,
+    read_versions,
+    rebuild_index,
+)
+from src.storage import compact_day_file, generate_compressed_path, generate_file_path, save_messages
+
+
+def _msgs(ids, date_str="2026-02-11"):
+    return [{"message_id": i, "date": f"{date_str}T09:00:00+00:00", "text": f"본문 {i}"} for i in ids]
+
+
+def test_index_is_maintained_on_append(tmp_path):
+    save_messages(_msgs([1, 2]), "news", data_dir=str(tmp_path))
+    save_messages(_msgs([3]), "news", data_dir=str(tmp_path))
+    filepath = generate_file_path("news", "2026-02-11", str(tmp_path))
+
+    assert os.path.getsize(generate_index_path(filepath)) == 3 * ENTRY.size
+    assert read_message(filepath, 2)["text"] == "본문 2"
+    assert latest_ids(filepath, 2) == [3, 2]
+
+
+def test_missing_index_is_rebuilt_on_demand(tmp_path):
+    save_messages(_msgs([1, 2, 3]), "news", data_dir=str(tmp_path))
+    filepath = generate_file_path("news", "2026-02-11", str(tmp_path))
+    os.remove(generate_index_path(filepath))
+    clear_loaded_indexes()
+
+    assert read_message(filepath, 3)["message_id"] == 3
+    assert os.path.exists(generate_index_path(filepath))
+
+
+def test_index_that_does_not_cover_file_is_rebuilt(tmp_path):
+    save_messages(_msgs([1]), "news", data_dir=str(tmp_path))
+    filepath = generate_file_path("news", "2026-02-11", str(tmp_path))
+    # 색인 없이 다른 프로세스가 줄을 덧붙인 경우
+    with open(filepath, "a", encoding="utf-8") as f:
+        f.write('{"message_id": 9, "text": "외부"}\n')
+
+    assert load_index(filepath)["max_id"] == 9
+    assert read_message(filepath, 9)["text"] == "외부"
+
+
+def test_compressed_index_points_at_frames(tmp_path):
+    save_messages(_msgs(range(1, 8), "2026-02-09"), "news", data_dir=str(tmp_path))
+    compact_day_file("news", "2026-02-09", str(tmp_path), frame_lines=3)
+    compressed = generate_compressed_path("news", "2026-02-09", str(tmp_path))
+
+    written = load_index(compressed)["by_id"]
+    assert len({locations[0] for locations in written.values()}) == 3
+    assert read_message(compressed, 5)["text"] == "본문 5"
+
+    assert sorted(rebuild_index(compressed)) == sorted(
+        (msg_id, offset, length) for msg_id, locations in written.items() for offset, length in locations
+    )
+
+
+def test_read_versions_returns_every_occurrence_in_order(tmp_path):
+    filepath = str(tmp_path / "_edits.jsonl")
+    with open(filepath, "w", encoding="utf-8") as f:
+        f.write('{"message_id": 1, "text": "v1"}\n{"message_id": 2, "text": "x"}\n{"message_id": 1, "text": "v2"}\n')
+
+    assert [r["text"] for r in read_versions(filepath, 1)] == ["v1", "v2"]
+    assert read_versions(filepath, 5) == []
+    assert read_versions(str(tmp_path / "missing.jsonl"), 1) == []
@@ -0,0 +1,77 @@
+from src.metadata import load_metadata, update_channel
+from src.poll_scheduler import AdaptivePollScheduler
+
+NOW = 1_770_000_000.0
+
+
+def _channels(*aliases):
+    return [{"alias": alias, "enabled": True} for alias in aliases] + [{"alias": "off", "enabled": False}]
+
+
+def _scheduler(tmp_path, *aliases, **kwargs):
+    return AdaptivePollScheduler(_channels(*aliases), str(tmp_path / "_metadata.json"), now=NOW, **kwargs)
+
+
+def test_new_channels_are_due_immediately_and_disabled_are_ignored(tmp_path):
+    scheduler = _scheduler(tmp_path, "hot", "idle")
+
+    assert sorted(ch["alias"] for ch in scheduler.pop_due(now=NOW)) == ["hot", "idle"]
+    assert scheduler.next_due() is None
+
+
+def test_hot_channels_are_polled_more_often_than_idle_ones(tmp_path):
+    scheduler = _scheduler(tmp_path, "hot", "idle", min_interval_sec=60, max_interval_sec=3600)
+    scheduler.pop_due(now=NOW)
+    scheduler.record("hot", 0, now=NOW)
+    scheduler.record("idle", 0, now=NOW)
+
+    # 5분 동안 hot은 30건, idle은 0건
+    hot_interval = scheduler.record("hot", 30, now=NOW + 300)
+    idle_interval = scheduler.record("idle", 0, now=NOW + 300)
+
+    assert hot_interval == 60
+    assert idle_interval == 3600
+    assert [ch["alias"] for ch in scheduler.pop_due(now=NOW + 360)] == ["hot"]
+    assert scheduler.pop_due(now=NOW + 3000) == []
+    assert [ch["alias"] for ch in scheduler.pop_due(now=NOW + 3900)] == ["idle"]
+
+
+def test_rate_is_smoothed_and_persisted_to_metadata(tmp_path):
+    scheduler = _scheduler(tmp_path, "news", alpha=0.5)
+    scheduler.record("news", 0, now=NOW)
+    scheduler.record("news", 10, now=NOW + 3600)
+    scheduler.record("news", 0, now=NOW + 7200)
+
+    assert scheduler.rate_per_hour("news") == 5
+    entry = load_metadata(str(tmp_path / "_metadata.json"))["news"]
+    assert entry["post_rate_per_hour"] == 5
+    assert entry["last_polled_at"].startswith("2026-02-02")
+
+
+def test_schedule_resumes_from_metadata_after_restart(tmp_path):
+    metadata_path = str(tmp_path / "_metadata.json")
+    update_channel(metadata_path, "news", post_rate_per_hour=6, last_polled_at="2026-02-02T02:40:00+00:00")
+
+    scheduler = AdaptivePollScheduler(_channels("news"), metadata_path, now=NOW)
+
+    assert scheduler.interval_for("news") == 600
+    assert scheduler.next_due() == NOW + 600
+
+
+def test_backlog_forces_minimum_interval(tmp_path):
+    scheduler = _scheduler(tmp_path, "news", min_interval_sec=45)
+    scheduler.pop_due(now=NOW)
+
+    assert scheduler.record("news", 1000, now=NOW, backlog=True) == 45
+    assert scheduler.next_due() == NOW + 45
+
+
+def test_requeue_makes_channel_due_without_touching_rate(tmp_path):
+    scheduler = _scheduler(tmp_path, "news")
+    scheduler.pop_due(now=NOW)
+
+    scheduler.requeue("news", now=NOW + 5)
+
+    assert scheduler.next_due() == NOW + 5
+    assert scheduler.rate_per_hour("news") is None
+    assert "last_polled_at" not in load_metadata(str(tmp_path / "_metadata.json")).get("news", {})
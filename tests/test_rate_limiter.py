@@ -0,0 +1,91 @@
+import asyncio
+from time import monotonic
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.rate_limiter import RateLimitedClient, RateLimiter, TokenBucket
+
+
+class FloodWaitError(Exception):
+    def __init__(self, seconds):
+        super().__init__(f"A wait of {seconds} seconds is required")
+        self.seconds = seconds
+
+
+@pytest.mark.asyncio
+async def test_bucket_allows_burst_then_throttles_to_rate():
+    bucket = TokenBucket(rate_per_sec=100, capacity=2)
+
+    started = monotonic()
+    for _ in range(6):
+        await bucket.acquire()
+    elapsed = monotonic() - started
+
+    assert elapsed >= 0.035
+    assert bucket.stats["calls"] == 6
+    assert bucket.stats["throttled_sec"] > 0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_the_quota():
+    limiter = RateLimiter()
+    limiter.buckets["history"] = TokenBucket(rate_per_sec=200, capacity=1)
+    func = AsyncMock(return_value="ok")
+
+    started = monotonic()
+    await asyncio.gather(*[limiter.call("history", func) for _ in range(11)])
+
+    assert monotonic() - started >= 0.045
+    assert func.await_count == 11
+
+
+@pytest.mark.asyncio
+async def test_flood_wait_pauses_only_that_method_class_and_retries():
+    limiter = RateLimiter()
+    func = AsyncMock(side_effect=[FloodWaitError(0), "page"])
+
+    assert await limiter.call("history", func, "chan", limit=100) == "page"
+    func.assert_awaited_with("chan", limit=100)
+
+    stats = limiter.stats()
+    assert stats["history"]["flood_waits"] == 1
+    assert stats["resolve"]["flood_waits"] == 0
+
+    limiter.buckets["history"].pause(60)
+    resolved = await asyncio.wait_for(limiter.call("resolve", AsyncMock(return_value="entity")), timeout=1)
+    assert resolved == "entity"
+    assert limiter.buckets["history"].blocked_until > monotonic() + 50
+    assert limiter.buckets["history"].stats["flood_wait_sec"] == 60
+
+
+@pytest.mark.asyncio
+async def test_flood_wait_is_raised_after_retries_are_spent():
+    limiter = RateLimiter(flood_retries=1)
+    func = AsyncMock(side_effect=FloodWaitError(0))
+
+    with pytest.raises(FloodWaitError):
+        await limiter.call("download", func)
+    assert func.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_other_errors_are_not_retried():
+    limiter = RateLimiter()
+    func = AsyncMock(side_effect=ValueError("no such channel"))
+
+    with pytest.raises(ValueError):
+        await limiter.call("resolve", func)
+    assert func.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_client_proxy_limits_known_methods_and_passes_through_the_rest():
+    client = MagicMock()
+    client.get_messages = AsyncMock(return_value=["m"])
+    limited = RateLimitedClient(client, RateLimiter())
+
+    assert await limited.get_messages("chan", limit=10) == ["m"]
+    assert limited.rate_limiter.stats()["history"]["calls"] == 1
+    assert limited.on is client.on
+    assert limited.client is client
@@ -0,0 +1,156 @@
+import asyncio
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.batch_collector import get_last_message_id
+from src.message_parser import parse_messages
+from src.metadata import update_channel
+from src.realtime_sync import RealtimeCatchUp
+from src.storage import read_day_records, save_messages
+
+
+def _history(count):
+    history = []
+    for i in range(1, count + 1):
+        msg = MagicMock()
+        msg.id = i
+        msg.text = f"msg {i}"
+        msg.date = datetime(2026, 2, 12, 8, 0, 0, tzinfo=timezone.utc)
+        msg.media = None
+        msg.chat_id = -1001234567890
+        msg.views = 1
+        msg.forwards = 0
+        msg.edit_date = None
+        history.append(msg)
+    return history
+
+
+def _client(history):
+    async def get_messages(entity, limit, min_id=0, reverse=False):
+        await asyncio.sleep(0)
+        if not reverse:
+            return list(reversed(history))[:limit]
+        return [msg for msg in history if msg.id > min_id][:limit]
+
+    client = MagicMock()
+    client.get_messages = AsyncMock(side_effect=get_messages)
+    return client
+
+
+def _catch_up(client, tmp_path):
+    return RealtimeCatchUp(
+        client,
+        [{"alias": "news", "entity": MagicMock()}],
+        metadata_path=str(tmp_path / "_metadata.json"),
+        data_dir=str(tmp_path / "data"),
+    )
+
+
+def _stored_ids(tmp_path):
+    return [r["message_id"] for r in read_day_records("news", "2026-02-12", str(tmp_path / "data"))]
+
+
+def _live_write(catch_up, tmp_path, messages):
+    parsed = parse_messages(messages, "news")
+    stored = save_messages(parsed, "news", data_dir=str(tmp_path / "data"))
+    catch_up.on_written("news", parsed, stored)
+
+
+@pytest.mark.asyncio
+async def test_startup_catch_up_pages_from_checkpoint_to_head(tmp_path):
+    history = _history(250)
+    catch_up = _catch_up(_client(history), tmp_path)
+    update_channel(catch_up.metadata_path, "news", last_message_id=40)
+
+    catch_up.start()
+    await catch_up.wait()
+
+    assert catch_up.is_synced("news")
+    assert _stored_ids(tmp_path) == list(range(41, 251))
+    assert get_last_message_id(catch_up.metadata_path, "news") == 250
+    assert catch_up.metrics["catch_ups"] == 1
+    assert catch_up.metrics["caught_up_messages"] == 210
+
+
+@pytest.mark.asyncio
+async def test_missing_checkpoint_starts_at_head_without_backfill(tmp_path):
+    client = _client(_history(5000))
+    catch_up = _catch_up(client, tmp_path)
+
+    catch_up.start()
+    await catch_up.wait()
+
+    assert catch_up.is_synced("news")
+    assert client.get_messages.call_args_list[0].kwargs == {"limit": 1}
+    assert get_last_message_id(catch_up.metadata_path, "news") == 5000
+    assert catch_up.metrics["caught_up_messages"] == 0
+
+
+@pytest.mark.asyncio
+async def test_live_writes_advance_checkpoint_only_after_head_is_reached(tmp_path):
+    history = _history(150)
+    catch_up = _catch_up(_client(history), tmp_path)
+    update_channel(catch_up.metadata_path, "news", last_message_id=100)
+
+    # catch-up이 끝나기 전에 들어온 실시간 메시지는 저장만 되고 체크포인트는 그대로
+    _live_write(catch_up, tmp_path, history[140:])
+    assert get_last_message_id(catch_up.metadata_path, "news") == 100
+
+    catch_up.start()
+    await catch_up.wait()
+    assert _stored_ids(tmp_path) == list(range(141, 151)) + list(range(101, 141))
+    assert get_last_message_id(catch_up.metadata_path, "news") == 150
+
+    history.extend(_history(151)[150:])
+    _live_write(catch_up, tmp_path, history[150:])
+    assert get_last_message_id(catch_up.metadata_path, "news") == 151
+
+
+@pytest.mark.asyncio
+async def test_failed_live_write_schedules_catch_up_for_the_gap(tmp_path):
+    history = _history(5)
+    catch_up = _catch_up(_client(history), tmp_path)
+    catch_up.start()
+    await catch_up.wait()
+
+    history.extend(_history(7)[5:])
+    parsed = parse_messages(history[5:], "news")
+    catch_up.on_written("news", parsed, [])
+    assert not catch_up.is_synced("news")
+    await catch_up.wait()
+
+    assert catch_up.is_synced("news")
+    assert _stored_ids(tmp_path) == [6, 7]
+    assert get_last_message_id(catch_up.metadata_path, "news") == 7
+
+
+@pytest.mark.asyncio
+async def test_reconnect_catches_up_messages_missed_while_disconnected(tmp_path):
+    history = _history(3)
+    catch_up = _catch_up(_client(history), tmp_path)
+    catch_up.start()
+    await catch_up.wait()
+
+    history.extend(_history(6)[3:])
+    catch_up.start()
+    await catch_up.wait()
+
+    assert _stored_ids(tmp_path) == [4, 5, 6]
+    assert get_last_message_id(catch_up.metadata_path, "news") == 6
+    assert catch_up.metrics["catch_ups"] == 2
+
+
+@pytest.mark.asyncio
+async def test_catch_up_error_leaves_channel_unsynced(tmp_path):
+    client = MagicMock()
+    client.get_messages = AsyncMock(side_effect=ConnectionError("lost"))
+    catch_up = _catch_up(client, tmp_path)
+
+    catch_up.start()
+    await catch_up.wait()
+
+    assert not catch_up.is_synced("news")
+    assert catch_up.metrics["failed"] == 1
+    await catch_up.close()
@@ -72,3 +72,21 @@ def test_connection_state_changes_are_logged(caplog):
     log_text = caplog.text.lower()
     assert "disconnect" in log_text or "fail" in log_text
     assert "reconnect" in log_text or "success" in log_text or "connected" in log_text
+
+
+def test_record_failure_returns_delay_for_this_retry():
+    manager = ReconnectManager()
+
+    assert manager.record_failure() == 30
+    assert manager.record_failure() == 60
+    assert manager.attempt == 2
+
+
+def test_is_flood_wait_checks_seconds_attribute():
+    from src.reconnect import is_flood_wait
+
+    class FloodWaitError(Exception):
+        seconds = 12
+
+    assert is_flood_wait(FloodWaitError())
+    assert not is_flood_wait(ConnectionError("lost"))
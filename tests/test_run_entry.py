@@ -7,7 +7,7 @@ import pytest
 # Mock telethon before importing runtime entry module.
 sys.modules.setdefault("telethon", MagicMock())
 
-from src.run import run_batch_mode, run_realtime_mode, main
+from src.run import create_catch_up, create_poll_scheduler, create_rate_limited_client, create_storage, run_batch_mode, start_compaction, run_realtime_mode, main
 
 
 @pytest.mark.asyncio
@@ -16,6 +16,8 @@ async def test_run_realtime_builds_channel_map_and_starts_client():
     enabled_channels = [{"alias": "news_a", "username": "investnews_kr", "enabled": True}]
     resolved_channels = [{"alias": "news_a", "entity": MagicMock(id=-100123), "enabled": True}]
     client = MagicMock()
+    catch_up = MagicMock()
+    catch_up.close = AsyncMock()
 
     with patch("src.run.load_dotenv"), \
          patch("src.run.load_config", return_value=config), \
@@ -23,6 +25,8 @@ async def test_run_realtime_builds_channel_map_and_starts_client():
          patch("src.run.load_enabled_channels", return_value=enabled_channels), \
          patch("src.run.create_client", return_value=client), \
          patch("src.run.resolve_channels", new_callable=AsyncMock, return_value=resolved_channels), \
+         patch("src.run.create_storage", return_value=MagicMock()), \
+         patch("src.run.create_catch_up", return_value=catch_up) as mock_create_catch_up, \
          patch("src.run.setup_handlers") as mock_setup_handlers, \
          patch("src.run.run_client", new_callable=AsyncMock) as mock_run_client:
         await run_realtime_mode(channels_path="channels.json", workspace_dir="/workspace")
@@ -31,7 +35,15 @@ async def test_run_realtime_builds_channel_map_and_starts_client():
     args, _ = mock_setup_handlers.call_args
     assert args[0] is client
     assert args[1] == {-100123: "news_a"}
-    mock_run_client.assert_awaited_once_with(client, phone="+821012345678")
+    assert mock_create_catch_up.call_args.args[2] == resolved_channels
+    assert mock_create_catch_up.call_args.args[3] == os.path.join(os.path.abspath("/workspace"), "data", "_metadata.json")
+    mock_run_client.assert_awaited_once()
+    run_args, run_kwargs = mock_run_client.call_args
+    assert run_args == (client,)
+    assert run_kwargs["phone"] == "+821012345678"
+    assert run_kwargs["on_connected"] is catch_up.start
+    assert run_kwargs["reconnect"]._on_reconnect is catch_up.start
+    catch_up.close.assert_awaited_once()
 
 
 @pytest.mark.asyncio
@@ -43,8 +55,17 @@ async def test_run_batch_uses_configured_interval_and_metadata_path():
         "data_dir": "data",
         "session_dir": "session",
         "batch_interval_sec": 120,
+        "batch_concurrency": 8,
+        "batch_max_pages": 5,
+        "batch_channel_budget_sec": 30,
     }
     client = MagicMock()
+    api_client = MagicMock()
+    poll_scheduler = MagicMock()
+    entity_cache = MagicMock()
+    media_scheduler = MagicMock()
+    media_scheduler.close = AsyncMock()
+    storage = MagicMock()
     enabled_channels = [{"alias": "news_a", "username": "investnews_kr", "enabled": True}]
 
     with patch("src.run.load_dotenv"), \
@@ -52,6 +73,11 @@ async def test_run_batch_uses_configured_interval_and_metadata_path():
          patch("src.run.configure_runtime_logging"), \
          patch("src.run.load_enabled_channels", return_value=enabled_channels), \
          patch("src.run.create_client", return_value=client), \
+         patch("src.run.create_entity_cache", return_value=entity_cache), \
+         patch("src.run.create_media_scheduler", return_value=media_scheduler), \
+         patch("src.run.create_storage", return_value=storage), \
+         patch("src.run.create_rate_limited_client", return_value=api_client), \
+         patch("src.run.create_poll_scheduler", return_value=poll_scheduler) as mock_create_poll_scheduler, \
          patch("src.run.start_client", new_callable=AsyncMock) as mock_start_client, \
          patch("src.run.run_periodic_batch", new_callable=AsyncMock) as mock_run_periodic_batch:
         await run_batch_mode(
@@ -63,12 +89,102 @@ async def test_run_batch_uses_configured_interval_and_metadata_path():
     expected_workspace = os.path.abspath("/workspace")
     mock_start_client.assert_awaited_once_with(client, phone="+821012345678")
     mock_run_periodic_batch.assert_awaited_once_with(
-        client,
+        api_client,
         enabled_channels,
         metadata_path=os.path.normpath(os.path.join(expected_workspace, "data", "_metadata.json")),
         data_dir=os.path.normpath(os.path.join(expected_workspace, "data")),
         interval_sec=120,
+        concurrency=8,
+        max_pages=5,
+        time_budget_sec=30,
+        entity_cache=entity_cache,
+        media_scheduler=media_scheduler,
+        storage=storage,
+        scheduler=poll_scheduler,
+        dialogs_prepass=True,
+        jitter_sec=0,
+        backfill=False,
+    )
+    assert mock_create_poll_scheduler.call_args.args[1] == enabled_channels
+    media_scheduler.close.assert_awaited_once()
+    storage.close.assert_called_once()
+
+
+def test_create_storage_selects_backend(tmp_path):
+    from src.sqlite_storage import SQLiteStorage
+    from src.storage import JsonlStorage
+
+    jsonl = create_storage({"storage_backend": "jsonl", "search_index": False}, str(tmp_path / "data"))
+    assert isinstance(jsonl, JsonlStorage)
+
+    sqlite = create_storage(
+        {"storage_backend": "sqlite", "sqlite_path": "data/messages.db", "search_index": False},
+        str(tmp_path / "data"),
+        workspace_dir=str(tmp_path),
+    )
+    try:
+        assert isinstance(sqlite, SQLiteStorage)
+        assert sqlite.db_path == os.path.join(str(tmp_path), "data", "messages.db")
+    finally:
+        sqlite.close()
+
+    with pytest.raises(ValueError):
+        create_storage({"storage_backend": "parquet"}, str(tmp_path / "data"))
+
+
+def test_create_storage_wraps_backend_with_search_index(tmp_path):
+    from src.search_index import IndexedStorage
+    from src.storage import JsonlStorage
+
+    storage = create_storage(
+        {"storage_backend": "jsonl", "search_index": True, "search_index_path": "data/_search.db"},
+        str(tmp_path / "data"),
+        workspace_dir=str(tmp_path),
     )
+    try:
+        assert isinstance(storage, IndexedStorage)
+        assert isinstance(storage.storage, JsonlStorage)
+        assert storage.index.db_path == os.path.join(str(tmp_path), "data", "_search.db")
+    finally:
+        storage.close()
+
+
+def test_create_rate_limited_client_uses_configured_rates():
+    client = MagicMock(flood_sleep_threshold=60)
+    limited = create_rate_limited_client(
+        {"rate_limit_resolve_per_min": 6, "rate_limit_history_per_min": 60, "rate_limit_download_per_min": 12},
+        client,
+    )
+
+    assert limited.client is client
+    assert client.flood_sleep_threshold == 60
+    assert limited.rate_limiter.buckets["resolve"].rate_per_sec == 0.1
+    assert limited.rate_limiter.buckets["history"].rate_per_sec == 1
+
+
+def test_create_poll_scheduler_uses_configured_bounds(tmp_path):
+    channels = [{"alias": "news_a", "enabled": True}]
+    config = {"batch_interval_sec": 300, "batch_min_interval_sec": 30, "batch_max_interval_sec": 900}
+
+    scheduler = create_poll_scheduler(config, channels, str(tmp_path / "_metadata.json"))
+
+    assert (scheduler.min_interval_sec, scheduler.max_interval_sec, scheduler.default_interval_sec) == (30, 900, 300)
+    assert create_poll_scheduler({"batch_adaptive": False}, channels, str(tmp_path / "_metadata.json")) is None
+
+
+def test_create_catch_up_is_skipped_when_disabled():
+    assert create_catch_up({"realtime_catch_up": False}, MagicMock(), [], "data/_metadata.json", "data") is None
+
+
+def test_create_catch_up_defaults_to_configured_batch_concurrency():
+    catch_up = create_catch_up({}, MagicMock(), [], "data/_metadata.json", "data")
+
+    assert catch_up._semaphore._value == 4
+
+
+def test_start_compaction_is_skipped_when_disabled():
+    assert start_compaction({"compaction_interval_sec": 0}, "data") is None
+    assert start_compaction({"storage_backend": "sqlite", "compaction_interval_sec": 60}, "data") is None
 
 
 def test_run_main_supports_mode_and_channels_file_args():
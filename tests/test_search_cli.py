@@ -0,0 +1,26 @@
+import json
+from pathlib import Path
+from uuid import uuid4
+
+from src.search_cli import main
+from src.storage import save_messages
+
+
+def test_search_cli_rebuild_and_query(capsys):
+    base = Path("tests") / ".tmp" / f"search_cli_{uuid4().hex}"
+    msgs = [
+        {"message_id": 1, "channel_id": -1001, "date": "2026-02-11T09:00:00+00:00", "text": "삼성전자 목표주가 상향"},
+        {"message_id": 2, "channel_id": -1001, "date": "2026-02-12T09:00:00+00:00", "text": "SK하이닉스 신고가"},
+    ]
+    save_messages(msgs, "news", data_dir=str(base / "data"))
+
+    assert main(["--workspace", str(base), "rebuild"]) == 0
+    rebuilt = json.loads(capsys.readouterr().out)
+    assert rebuilt["indexed"] == 2
+
+    assert main(["--workspace", str(base), "query", "목표주가", "--channel", "news", "--since", "2026-02-01"]) == 0
+    output = json.loads(capsys.readouterr().out)
+    assert output["count"] == 1
+    assert output["results"][0]["message_id"] == 1
+    assert output["results"][0]["channel_alias"] == "news"
+    assert output["took_ms"] >= 0
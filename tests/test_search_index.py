@@ -0,0 +1,102 @@
+from src.search_index import IndexedStorage, SearchIndex, rebuild_index
+from src.storage import JsonlStorage, save_edit, save_messages
+
+
+def _msg(message_id, text, date="2026-02-11T09:00:00+00:00", **extra):
+    msg = {"message_id": message_id, "channel_id": -1001, "date": date, "text": text}
+    msg.update(extra)
+    return msg
+
+
+def test_search_matches_all_terms(tmp_path):
+    index = SearchIndex(str(tmp_path / "_search.db"))
+    try:
+        index.add_messages([
+            _msg(1, "삼성전자 목표주가 상향 조정"),
+            _msg(2, "삼성전자 실적 발표"),
+            _msg(3, "TSLA 급등"),
+        ], "news")
+
+        assert [r["message_id"] for r in index.search("삼성전자")] == [2, 1]
+        assert [r["message_id"] for r in index.search("삼성전자 목표주가")] == [1]
+        assert [r["message_id"] for r in index.search("tsla")] == [3]
+        assert index.search("없는단어") == []
+    finally:
+        index.close()
+
+
+def test_short_terms_fall_back_to_substring_match(tmp_path):
+    index = SearchIndex(str(tmp_path / "_search.db"))
+    try:
+        index.add_messages([_msg(1, "애플 실적 부진"), _msg(2, "애플 신제품")], "news")
+
+        assert [r["message_id"] for r in index.search("실적")] == [1]
+        assert [r["message_id"] for r in index.search("애플 신제품")] == [2]
+        assert index.search("50%") == []
+    finally:
+        index.close()
+
+
+def test_search_filters_by_channel_and_date(tmp_path):
+    index = SearchIndex(str(tmp_path / "_search.db"))
+    try:
+        index.add_messages([
+            _msg(1, "금리 인하 전망", date="2026-02-10T09:00:00+00:00"),
+            _msg(2, "금리 인하 확정", date="2026-02-12T09:00:00+00:00"),
+        ], "news")
+        index.add_messages([_msg(1, "금리 인하 소식", date="2026-02-12T10:00:00+00:00")], "other")
+
+        results = index.search("금리 인하", channel_alias="news", since="2026-02-11")
+        assert [(r["channel_alias"], r["message_id"]) for r in results] == [("news", 2)]
+
+        results = index.search("금리 인하", until="2026-02-11")
+        assert [(r["channel_alias"], r["message_id"]) for r in results] == [("news", 1)]
+    finally:
+        index.close()
+
+
+def test_duplicates_are_ignored_and_edits_replace_text(tmp_path):
+    index = SearchIndex(str(tmp_path / "_search.db"))
+    try:
+        index.add_messages([_msg(1, "원래 본문입니다")], "news")
+        index.add_messages([_msg(1, "원래 본문입니다")], "news")
+        index.add_messages([_msg(1, "수정된 본문입니다", is_edit=True)], "news")
+
+        assert index.count() == 1
+        assert index.search("원래 본문") == []
+        assert [r["text"] for r in index.search("수정된")] == ["수정된 본문입니다"]
+    finally:
+        index.close()
+
+
+def test_indexed_storage_indexes_stored_messages(tmp_path):
+    index = SearchIndex(str(tmp_path / "_search.db"))
+    storage = IndexedStorage(JsonlStorage(str(tmp_path / "data")), index)
+    try:
+        stored = storage.save_messages([_msg(1, "배당 확대 공시"), _msg(2, "자사주 매입")], "news")
+
+        assert len(stored) == 2
+        assert (tmp_path / "data" / "news" / "2026-02-11.jsonl").exists()
+        assert [r["message_id"] for r in index.search("자사주")] == [2]
+    finally:
+        storage.close()
+
+
+def test_rebuild_index_from_jsonl_tree(tmp_path):
+    data_dir = str(tmp_path / "data")
+    save_messages([_msg(1, "유상증자 결정"), _msg(2, "무상증자 결정", date="2026-02-12T09:00:00+00:00")], "news",
+                  data_dir=data_dir)
+    save_edit(_msg(1, "유상증자 철회", is_edit=True), "news", data_dir=data_dir)
+
+    index = SearchIndex(str(tmp_path / "_search.db"))
+    try:
+        index.add_messages([_msg(99, "지워질 문서입니다")], "stale")
+
+        counts = rebuild_index(data_dir, index)
+
+        assert counts == {"files": 2, "indexed": 2}
+        assert index.search("지워질") == []
+        assert [r["message_id"] for r in index.search("증자")] == [2, 1]
+        assert [r["message_id"] for r in index.search("철회")] == [1]
+    finally:
+        index.close()
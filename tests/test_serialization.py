@@ -0,0 +1,72 @@
+import json
+import math
+
+import pytest
+
+from src.serialization import dumps, dumps_line, get_backend, loads, set_backend
+
+SAMPLES = [
+    {
+        "message_id": 45232,
+        "channel_id": -1001234567890,
+        "channel_alias": "투자뉴스A",
+        "date": "2026-02-27T09:15:00+00:00",
+        "text": "삼성전자 \"목표주가\" 상향\n줄바꿈\t탭 \\ 백슬래시 😀",
+        "has_media": True,
+        "media_type": None,
+        "views": 1523,
+        "ratio": 0.1,
+        "big": 2 ** 70,
+        "nested": {"a": [1, 2.5, None, False]},
+    },
+    ["text", None, "photo", "1_photo.jpg"],
+    {},
+]
+
+
+@pytest.mark.parametrize("obj", SAMPLES)
+def test_dumps_is_byte_identical_to_stdlib(obj):
+    assert dumps(obj) == json.dumps(obj, ensure_ascii=False)
+    assert dumps_line(obj) == json.dumps(obj, ensure_ascii=False) + "\n"
+
+
+@pytest.mark.parametrize("obj", SAMPLES)
+def test_loads_round_trips_bytes_and_str(obj):
+    line = dumps_line(obj)
+
+    assert loads(line) == obj
+    assert loads(line.encode("utf-8")) == obj
+
+
+def test_loads_raises_stdlib_decode_error():
+    with pytest.raises(json.JSONDecodeError):
+        loads(b'{"message_id": 1, "te')
+
+
+def test_set_backend_rejects_unknown_decoder():
+    with pytest.raises(ValueError, match="not available"):
+        set_backend("simdjson")
+
+
+def test_stdlib_backend_can_be_forced():
+    previous = get_backend()
+    try:
+        set_backend("stdlib")
+        assert get_backend() == "stdlib"
+        assert math.isnan(loads('{"a": NaN}')["a"])
+    finally:
+        set_backend(previous)
+
+
+def test_orjson_backend_matches_stdlib_results():
+    pytest.importorskip("orjson")
+    previous = get_backend()
+    try:
+        set_backend("orjson")
+        for obj in SAMPLES:
+            assert loads(dumps_line(obj).encode("utf-8")) == json.loads(dumps(obj))
+        # orjson이 거부하는 입력도 stdlib과 같은 결과를 낸다
+        assert math.isnan(loads('{"a": NaN}')["a"])
+        assert loads(str(2 ** 70)) == 2 ** 70
+    finally:
+        set_backend(previous)
@@ -0,0 +1,113 @@
+import json
+
+from src.sqlite_storage import SQLiteStorage, import_jsonl_tree
+from src.storage import save_edit, save_messages
+
+
+def _msg(message_id, date="2026-02-11T09:00:00+00:00", **extra):
+    msg = {
+        "message_id": message_id,
+        "channel_id": -1001234567890,
+        "channel_alias": "test_ch",
+        "date": date,
+        "text": f"message {message_id}",
+        "has_media": False,
+        "media_type": None,
+        "media_file": None,
+        "views": 10,
+        "forwards": 1,
+        "edit_date": None,
+        "is_edit": False,
+        "collected_at": "2026-02-11T18:00:00",
+    }
+    msg.update(extra)
+    return msg
+
+
+def test_uses_wal_journal_mode(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "messages.db"))
+    try:
+        mode = storage._conn.execute("PRAGMA journal_mode").fetchone()[0]
+        assert mode == "wal"
+    finally:
+        storage.close()
+
+
+def test_save_messages_dedups_on_primary_key(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "messages.db"))
+    try:
+        stored = storage.save_messages([_msg(1), _msg(2), _msg(1)], "test_ch")
+        assert [m["message_id"] for m in stored] == [1, 2, 1]
+
+        storage.save_messages([_msg(2), _msg(3)], "test_ch")
+
+        count = storage._conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+        assert count == 3
+        assert storage.get_message(-1001234567890, 2)["text"] == "message 2"
+        assert storage.get_message(-1001234567890, 99) is None
+    finally:
+        storage.close()
+
+
+def test_save_message_round_trips_booleans(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "messages.db"))
+    try:
+        assert storage.save_message(_msg(1, has_media=True, media_type="photo"), "test_ch") is True
+
+        msg = storage.get_message(-1001234567890, 1)
+        assert msg["has_media"] is True
+        assert msg["is_edit"] is False
+        assert msg["media_type"] == "photo"
+    finally:
+        storage.close()
+
+
+def test_edits_are_kept_separately(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "messages.db"))
+    try:
+        storage.save_messages([_msg(1)], "test_ch")
+        storage.save_messages([_msg(1, text="edited", is_edit=True)], "test_ch")
+        storage.save_messages([_msg(1, text="edited", is_edit=True)], "test_ch")
+
+        assert storage.get_message(-1001234567890, 1)["text"] == "message 1"
+        edits = storage._conn.execute("SELECT COUNT(*) FROM message_edits").fetchone()[0]
+        assert edits == 1
+    finally:
+        storage.close()
+
+
+def test_query_filters_by_alias_and_date_range(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "messages.db"))
+    try:
+        storage.save_messages([
+            _msg(1, date="2026-02-10T09:00:00+00:00"),
+            _msg(2, date="2026-02-11T09:00:00+00:00"),
+            _msg(3, date="2026-02-12T09:00:00+00:00"),
+        ], "test_ch")
+        storage.save_messages([_msg(4, channel_id=-1009, channel_alias="other")], "other")
+
+        rows = storage.query(channel_alias="test_ch", since="2026-02-11", until="2026-02-12")
+        assert [r["message_id"] for r in rows] == [2]
+
+        rows = storage.query(channel_alias="test_ch", limit=2)
+        assert [r["message_id"] for r in rows] == [3, 2]
+    finally:
+        storage.close()
+
+
+def test_import_jsonl_tree_copies_messages_and_edits(tmp_path):
+    data_dir = str(tmp_path / "data")
+    save_messages([_msg(1), _msg(2, date="2026-02-12T09:00:00+00:00")], "test_ch", data_dir=data_dir)
+    save_edit(_msg(1, text="edited", is_edit=True), "test_ch", data_dir=data_dir)
+    (tmp_path / "data" / "_metadata.json").write_text(json.dumps({}), encoding="utf-8")
+
+    storage = SQLiteStorage(str(tmp_path / "messages.db"))
+    try:
+        counts = import_jsonl_tree(data_dir, storage)
+        assert counts == {"files": 2, "messages": 2, "edits": 1}
+
+        import_jsonl_tree(data_dir, storage)
+        assert storage._conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0] == 2
+        assert storage._conn.execute("SELECT COUNT(*) FROM message_edits").fetchone()[0] == 1
+    finally:
+        storage.close()
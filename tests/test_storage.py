@@ -2,7 +2,21 @@ import json
 import os
 from unittest.mock import patch
 
-from src.storage import generate_file_path, save_message
+from src.storage import (
+    clear_message_id_index,
+    compact_day_file,
+    find_message,
+    generate_file_path,
+    get_edit_versions,
+    iter_day_files,
+    latest_messages,
+    read_day_records,
+    read_records,
+    rebuild_offset_indexes,
+    save_edit,
+    save_message,
+    save_messages,
+)
 
 
 def test_generate_file_path():
@@ -109,3 +123,304 @@ def test_logs_error_after_max_retries(tmp_path):
         result = save_message(msg, channel_alias="test_ch", data_dir=str(tmp_path))
 
     assert result is False
+
+
+def test_dedup_index_is_built_once_per_file(tmp_path):
+    from src import storage
+
+    with patch("src.storage._read_existing_message_ids", wraps=storage._read_existing_message_ids) as mock_read:
+        for i in range(5):
+            msg = {"message_id": i, "date": "2026-02-11T09:00:00+00:00", "text": f"msg {i}"}
+            save_message(msg, channel_alias="test_ch", data_dir=str(tmp_path))
+        save_message({"message_id": 3, "date": "2026-02-11T09:00:00+00:00"}, channel_alias="test_ch", data_dir=str(tmp_path))
+
+    assert mock_read.call_count == 1
+    filepath = tmp_path / "test_ch" / "2026-02-11.jsonl"
+    assert len(filepath.read_text(encoding="utf-8").strip().split("\n")) == 5
+
+
+def test_dedup_index_rebuilds_after_external_change(tmp_path):
+    msg = {"message_id": 1, "date": "2026-02-11T09:00:00+00:00", "text": "first"}
+    save_message(msg, channel_alias="test_ch", data_dir=str(tmp_path))
+
+    # 다른 프로세스가 같은 파일에 메시지를 추가한 상황
+    filepath = tmp_path / "test_ch" / "2026-02-11.jsonl"
+    with open(filepath, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"message_id": 2, "date": "2026-02-11T10:00:00+00:00"}) + "\n")
+
+    save_message({"message_id": 2, "date": "2026-02-11T10:00:00+00:00"}, channel_alias="test_ch", data_dir=str(tmp_path))
+
+    lines = filepath.read_text(encoding="utf-8").strip().split("\n")
+    assert [json.loads(line)["message_id"] for line in lines] == [1, 2]
+
+
+def test_dedup_index_survives_restart(tmp_path):
+    from src.storage import clear_message_id_index
+
+    msg = {"message_id": 7, "date": "2026-02-11T09:00:00+00:00", "text": "before restart"}
+    save_message(msg, channel_alias="test_ch", data_dir=str(tmp_path))
+
+    clear_message_id_index()
+    save_message(msg, channel_alias="test_ch", data_dir=str(tmp_path))
+
+    filepath = tmp_path / "test_ch" / "2026-02-11.jsonl"
+    assert len(filepath.read_text(encoding="utf-8").strip().split("\n")) == 1
+
+
+def test_save_messages_groups_by_day_file(tmp_path):
+    msgs = [
+        {"message_id": 1, "date": "2026-02-11T09:00:00+00:00", "text": "a"},
+        {"message_id": 2, "date": "2026-02-12T09:00:00+00:00", "text": "b"},
+        {"message_id": 3, "date": "2026-02-11T10:00:00+00:00", "text": "c"},
+    ]
+
+    stored = save_messages(msgs, channel_alias="test_ch", data_dir=str(tmp_path))
+
+    assert [m["message_id"] for m in stored] == [1, 3, 2]
+    day1 = (tmp_path / "test_ch" / "2026-02-11.jsonl").read_text(encoding="utf-8").strip().split("\n")
+    day2 = (tmp_path / "test_ch" / "2026-02-12.jsonl").read_text(encoding="utf-8").strip().split("\n")
+    assert [json.loads(line)["message_id"] for line in day1] == [1, 3]
+    assert [json.loads(line)["message_id"] for line in day2] == [2]
+
+
+def test_save_messages_opens_each_day_file_once(tmp_path):
+    msgs = [
+        {"message_id": i, "date": f"2026-02-1{i % 2 + 1}T09:00:00+00:00", "text": f"msg {i}"}
+        for i in range(100)
+    ]
+    append_opens = []
+    original_open = open
+
+    def counting_open(*args, **kwargs):
+        if len(args) > 1 and args[1] == "a":
+            append_opens.append(args[0])
+        return original_open(*args, **kwargs)
+
+    with patch("builtins.open", side_effect=counting_open):
+        save_messages(msgs, channel_alias="test_ch", data_dir=str(tmp_path))
+
+    assert len(append_opens) == 2
+
+
+def test_save_messages_skips_existing_and_in_batch_duplicates(tmp_path):
+    save_message({"message_id": 1, "date": "2026-02-11T09:00:00+00:00", "text": "original"},
+                 channel_alias="test_ch", data_dir=str(tmp_path))
+    msgs = [
+        {"message_id": 1, "date": "2026-02-11T09:00:00+00:00", "text": "dup of stored"},
+        {"message_id": 2, "date": "2026-02-11T09:05:00+00:00", "text": "new"},
+        {"message_id": 2, "date": "2026-02-11T09:05:00+00:00", "text": "dup in batch"},
+    ]
+
+    stored = save_messages(msgs, channel_alias="test_ch", data_dir=str(tmp_path))
+
+    assert sorted(m["message_id"] for m in stored) == [1, 2]
+    filepath = tmp_path / "test_ch" / "2026-02-11.jsonl"
+    texts = [json.loads(line)["text"] for line in filepath.read_text(encoding="utf-8").strip().split("\n")]
+    assert texts == ["original", "new"]
+
+
+def test_save_messages_returns_only_stored_on_write_failure(tmp_path):
+    msgs = [{"message_id": 1, "date": "2026-02-11T09:00:00+00:00", "text": "fail"}]
+
+    with patch("builtins.open", side_effect=OSError("disk full")):
+        stored = save_messages(msgs, channel_alias="test_ch", data_dir=str(tmp_path))
+
+    assert stored == []
+
+
+def _edit(message_id, text, edit_date):
+    return {
+        "message_id": message_id,
+        "date": "2026-02-11T09:00:00+00:00",
+        "text": text,
+        "has_media": False,
+        "media_type": None,
+        "media_file": None,
+        "edit_date": edit_date,
+        "is_edit": True,
+    }
+
+
+def test_edit_is_appended_to_edit_log_not_swallowed(tmp_path):
+    from src.storage import get_latest_version
+
+    save_message({"message_id": 1, "date": "2026-02-11T09:00:00+00:00", "text": "원본"},
+                 channel_alias="test_ch", data_dir=str(tmp_path))
+    result = save_message(_edit(1, "수정본", "2026-02-11T10:00:00+00:00"),
+                          channel_alias="test_ch", data_dir=str(tmp_path))
+
+    assert result is True
+    day_file = tmp_path / "test_ch" / "2026-02-11.jsonl"
+    assert json.loads(day_file.read_text(encoding="utf-8"))["text"] == "원본"
+    latest = get_latest_version("test_ch", 1, data_dir=str(tmp_path))
+    assert latest["text"] == "수정본"
+    assert latest["edit_date"] == "2026-02-11T10:00:00+00:00"
+
+
+def test_latest_version_tracks_multiple_edits(tmp_path):
+    from src.storage import clear_message_id_index, get_latest_version
+
+    save_message(_edit(1, "v1", "2026-02-11T10:00:00+00:00"), channel_alias="test_ch", data_dir=str(tmp_path))
+    save_message(_edit(2, "other", "2026-02-11T10:30:00+00:00"), channel_alias="test_ch", data_dir=str(tmp_path))
+    save_message(_edit(1, "v2", "2026-02-11T11:00:00+00:00"), channel_alias="test_ch", data_dir=str(tmp_path))
+
+    assert get_latest_version("test_ch", 1, data_dir=str(tmp_path))["text"] == "v2"
+    clear_message_id_index()
+    assert get_latest_version("test_ch", 1, data_dir=str(tmp_path))["text"] == "v2"
+    assert get_latest_version("test_ch", 2, data_dir=str(tmp_path))["text"] == "other"
+    assert get_latest_version("test_ch", 3, data_dir=str(tmp_path)) is None
+
+
+def test_edit_with_unchanged_content_is_skipped_without_reading(tmp_path):
+    save_message(_edit(1, "같은 내용", "2026-02-11T10:00:00+00:00"), channel_alias="test_ch", data_dir=str(tmp_path))
+
+    with patch("src.storage._read_edit_log") as mock_read, \
+         patch("builtins.open", side_effect=AssertionError("no file access expected")):
+        result = save_message(_edit(1, "같은 내용", "2026-02-11T10:05:00+00:00"),
+                              channel_alias="test_ch", data_dir=str(tmp_path))
+
+    assert result is True
+    mock_read.assert_not_called()
+    edit_log = tmp_path / "test_ch" / "_edits.jsonl"
+    assert len(edit_log.read_text(encoding="utf-8").strip().split("\n")) == 1
+
+
+def test_edit_identical_to_original_is_skipped(tmp_path):
+    original = dict(_edit(1, "원본", None), is_edit=False)
+    save_message(original, channel_alias="test_ch", data_dir=str(tmp_path))
+
+    # 반응 수만 바뀐 편집 이벤트: 본문/미디어가 원본과 같다
+    for edit_date in ("2026-02-11T10:00:00+00:00", "2026-02-11T10:05:00+00:00"):
+        assert save_message(_edit(1, "원본", edit_date), channel_alias="test_ch", data_dir=str(tmp_path)) is True
+
+    assert not (tmp_path / "test_ch" / "_edits.jsonl").exists()
+
+    save_message(_edit(1, "수정본", "2026-02-11T11:00:00+00:00"), channel_alias="test_ch", data_dir=str(tmp_path))
+    edit_log = tmp_path / "test_ch" / "_edits.jsonl"
+    assert [json.loads(line)["text"] for line in edit_log.read_text(encoding="utf-8").splitlines()] == ["수정본"]
+
+
+def test_latest_version_falls_back_to_original_record(tmp_path):
+    from src.storage import get_latest_version
+
+    save_message({"message_id": 7, "date": "2026-02-11T09:00:00+00:00", "text": "편집 안 됨"},
+                 channel_alias="test_ch", data_dir=str(tmp_path))
+
+    assert get_latest_version("test_ch", 7, data_dir=str(tmp_path))["text"] == "편집 안 됨"
+    assert get_latest_version("test_ch", 8, data_dir=str(tmp_path)) is None
+
+
+def test_save_messages_routes_edits_to_edit_log(tmp_path):
+    from src.storage import get_latest_version
+
+    msgs = [
+        {"message_id": 1, "date": "2026-02-11T09:00:00+00:00", "text": "원본", "is_edit": False},
+        _edit(1, "수정본", "2026-02-11T10:00:00+00:00"),
+    ]
+
+    stored = save_messages(msgs, channel_alias="test_ch", data_dir=str(tmp_path))
+
+    assert len(stored) == 2
+    assert get_latest_version("test_ch", 1, data_dir=str(tmp_path))["text"] == "수정본"
+
+
+def _day_msgs(ids, date="2026-02-10T09:00:00+00:00"):
+    return [{"message_id": i, "date": date, "text": f"msg {i}"} for i in ids]
+
+
+def test_compact_day_file_writes_gzip_frames_and_removes_plain_file(tmp_path):
+    save_messages(_day_msgs(range(25)), "test_ch", data_dir=str(tmp_path))
+
+    assert compact_day_file("test_ch", "2026-02-10", data_dir=str(tmp_path), frame_lines=10) == 25
+
+    plain = tmp_path / "test_ch" / "2026-02-10.jsonl"
+    compressed = tmp_path / "test_ch" / "2026-02-10.jsonl.gz"
+    assert not plain.exists()
+    raw = compressed.read_bytes()
+    assert raw.count(b"\x1f\x8b\x08") == 3
+    assert [m["message_id"] for m in read_records(str(compressed))] == list(range(25))
+
+
+def test_late_messages_for_compacted_day_go_to_delta_and_dedup(tmp_path):
+    save_messages(_day_msgs([1, 2]), "test_ch", data_dir=str(tmp_path))
+    compact_day_file("test_ch", "2026-02-10", data_dir=str(tmp_path))
+    clear_message_id_index()
+
+    stored = save_messages(_day_msgs([2, 3]), "test_ch", data_dir=str(tmp_path))
+    assert [m["message_id"] for m in stored] == [2, 3]
+
+    delta = tmp_path / "test_ch" / "2026-02-10.jsonl"
+    assert [json.loads(line)["message_id"] for line in delta.read_text(encoding="utf-8").splitlines()] == [3]
+    assert [m["message_id"] for m in read_day_records("test_ch", "2026-02-10", str(tmp_path))] == [1, 2, 3]
+
+    assert compact_day_file("test_ch", "2026-02-10", data_dir=str(tmp_path)) == 1
+    assert not delta.exists()
+    assert [m["message_id"] for m in read_day_records("test_ch", "2026-02-10", str(tmp_path))] == [1, 2, 3]
+
+
+def test_iter_day_files_yields_compressed_before_delta(tmp_path):
+    save_messages(_day_msgs([1]), "test_ch", data_dir=str(tmp_path))
+    compact_day_file("test_ch", "2026-02-10", data_dir=str(tmp_path))
+    save_messages(_day_msgs([2]) + _day_msgs([3], date="2026-02-11T09:00:00+00:00"), "test_ch",
+                  data_dir=str(tmp_path))
+
+    names = [os.path.basename(path) for _, _, path in iter_day_files(str(tmp_path))]
+    assert names == ["2026-02-10.jsonl.gz", "2026-02-10.jsonl", "2026-02-11.jsonl"]
+
+
+def test_read_records_stops_at_truncated_frame(tmp_path):
+    save_messages(_day_msgs(range(20)), "test_ch", data_dir=str(tmp_path))
+    compact_day_file("test_ch", "2026-02-10", data_dir=str(tmp_path), frame_lines=10)
+    compressed = tmp_path / "test_ch" / "2026-02-10.jsonl.gz"
+    raw = compressed.read_bytes()
+    compressed.write_bytes(raw[:-8])
+
+    ids = [m["message_id"] for m in read_records(str(compressed))]
+    assert ids[:10] == list(range(10))
+
+
+def test_find_message_searches_days_newest_first(tmp_path):
+    data_dir = str(tmp_path)
+    save_messages([
+        {"message_id": 1, "date": "2026-02-09T09:00:00+00:00", "text": "첫날"},
+        {"message_id": 5, "date": "2026-02-10T09:00:00+00:00", "text": "둘째날"},
+    ], "test_ch", data_dir=data_dir)
+    compact_day_file("test_ch", "2026-02-09", data_dir)
+
+    assert find_message("test_ch", 1, data_dir=data_dir)["text"] == "첫날"
+    assert find_message("test_ch", 5, data_dir=data_dir, date_str="2026-02-10")["text"] == "둘째날"
+    assert find_message("test_ch", 5, data_dir=data_dir, date_str="2026-02-09") is None
+    assert find_message("test_ch", 99, data_dir=data_dir) is None
+    assert find_message("other", 1, data_dir=data_dir) is None
+
+
+def test_latest_messages_spans_compressed_and_delta_files(tmp_path):
+    data_dir = str(tmp_path)
+    save_messages([{"message_id": i, "date": "2026-02-09T09:00:00+00:00", "text": "x"} for i in (1, 2, 3)],
+                  "test_ch", data_dir=data_dir)
+    compact_day_file("test_ch", "2026-02-09", data_dir)
+    save_messages([{"message_id": 4, "date": "2026-02-09T09:00:00+00:00", "text": "늦게"}], "test_ch", data_dir=data_dir)
+    save_messages([{"message_id": 10, "date": "2026-02-10T09:00:00+00:00", "text": "y"}], "test_ch", data_dir=data_dir)
+
+    assert [m["message_id"] for m in latest_messages("test_ch", 3, data_dir=data_dir)] == [10, 4, 3]
+    assert len(latest_messages("test_ch", 50, data_dir=data_dir)) == 5
+
+
+def test_get_edit_versions_reads_every_edit(tmp_path):
+    data_dir = str(tmp_path)
+    for text in ("v1", "v2", "v3"):
+        save_edit({"message_id": 7, "date": "2026-02-11T09:00:00+00:00", "text": text, "is_edit": True},
+                  "test_ch", data_dir=data_dir)
+
+    assert [v["text"] for v in get_edit_versions("test_ch", 7, data_dir=data_dir)] == ["v1", "v2", "v3"]
+    assert get_edit_versions("test_ch", 8, data_dir=data_dir) == []
+
+
+def test_rebuild_offset_indexes_covers_day_files_and_edit_logs(tmp_path):
+    data_dir = str(tmp_path)
+    save_messages([
+        {"message_id": 1, "date": "2026-02-11T09:00:00+00:00", "text": "a"},
+        {"message_id": 1, "date": "2026-02-11T09:00:00+00:00", "text": "b", "is_edit": True},
+    ], "test_ch", data_dir=data_dir)
+
+    assert rebuild_offset_indexes(data_dir) == {"files": 2, "entries": 2}
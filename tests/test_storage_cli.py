@@ -0,0 +1,47 @@
+import json
+from pathlib import Path
+from uuid import uuid4
+
+from src.storage import save_messages
+from src.storage_cli import main
+
+
+def test_storage_cli_import_sqlite(capsys):
+    base = Path("tests") / ".tmp" / f"storage_cli_{uuid4().hex}"
+    data_dir = base / "data"
+    msg = {"message_id": 1, "channel_id": -1001, "date": "2026-02-11T09:00:00+00:00", "text": "hello"}
+    save_messages([msg], "test_ch", data_dir=str(data_dir))
+
+    assert main(["--workspace", str(base), "import-sqlite", "--db-path", "data/messages.db"]) == 0
+
+    output = json.loads(capsys.readouterr().out)
+    assert output["messages"] == 1
+    assert output["files"] == 1
+    assert Path(output["db_path"]).exists()
+
+
+def test_storage_cli_compact(capsys):
+    base = Path("tests") / ".tmp" / f"storage_cli_{uuid4().hex}"
+    msg = {"message_id": 1, "channel_id": -1001, "date": "2020-01-01T09:00:00+00:00", "text": "hello"}
+    save_messages([msg], "test_ch", data_dir=str(base / "data"))
+
+    assert main(["--workspace", str(base), "compact"]) == 0
+
+    output = json.loads(capsys.readouterr().out)
+    assert output["files"] == 1
+    assert (base / "data" / "test_ch" / "2020-01-01.jsonl.gz").exists()
+    assert not (base / "data" / "test_ch" / "2020-01-01.jsonl").exists()
+
+
+def test_storage_cli_reindex(capsys):
+    base = Path("tests") / ".tmp" / f"storage_cli_{uuid4().hex}"
+    msg = {"message_id": 1, "channel_id": -1001, "date": "2026-02-11T09:00:00+00:00", "text": "hello"}
+    save_messages([msg], "test_ch", data_dir=str(base / "data"))
+    (base / "data" / "test_ch" / "2026-02-11.jsonl.idx").unlink()
+
+    assert main(["--workspace", str(base), "reindex"]) == 0
+
+    output = json.loads(capsys.readouterr().out)
+    assert output["files"] == 1
+    assert output["entries"] == 1
+    assert (base / "data" / "test_ch" / "2026-02-11.jsonl.idx").exists()
@@ -0,0 +1,132 @@
+import asyncio
+import json
+from unittest.mock import patch
+
+import pytest
+
+from src.storage import save_messages
+from src.write_queue import WriteBehindQueue
+
+
+def _msg(message_id, date="2026-02-11T09:00:00+00:00"):
+    return {"message_id": message_id, "date": date, "text": f"msg {message_id}"}
+
+
+def _read_ids(path):
+    return [json.loads(line)["message_id"] for line in path.read_text(encoding="utf-8").strip().split("\n")]
+
+
+@pytest.mark.asyncio
+async def test_close_flushes_all_pending_messages(tmp_path):
+    queue = WriteBehindQueue(data_dir=str(tmp_path), max_latency_ms=10_000)
+    queue.start()
+
+    for i in range(5):
+        await queue.put(_msg(i), "ch_a")
+    await queue.put(_msg(100), "ch_b")
+    await queue.close()
+
+    assert _read_ids(tmp_path / "ch_a" / "2026-02-11.jsonl") == [0, 1, 2, 3, 4]
+    assert _read_ids(tmp_path / "ch_b" / "2026-02-11.jsonl") == [100]
+    assert queue.metrics["written"] == 6
+    assert queue.depth == 0
+
+
+@pytest.mark.asyncio
+async def test_drains_in_batches(tmp_path):
+    queue = WriteBehindQueue(data_dir=str(tmp_path), batch_size=10, max_latency_ms=10_000)
+
+    for i in range(25):
+        await queue.put(_msg(i), "ch_a")
+
+    with patch("src.write_queue.save_messages", wraps=save_messages) as mock_save:
+        queue.start()
+        await queue.close()
+
+    assert [len(call.args[0]) for call in mock_save.call_args_list] == [10, 10, 5]
+    assert queue.metrics["flushes"] == 3
+
+
+@pytest.mark.asyncio
+async def test_flushes_within_max_latency(tmp_path):
+    queue = WriteBehindQueue(data_dir=str(tmp_path), max_latency_ms=20)
+    queue.start()
+
+    await queue.put(_msg(1), "ch_a")
+    await asyncio.sleep(0.2)
+
+    assert queue.metrics["written"] == 1
+    assert (tmp_path / "ch_a" / "2026-02-11.jsonl").exists()
+    await queue.close()
+
+
+@pytest.mark.asyncio
+async def test_full_queue_applies_backpressure(tmp_path):
+    queue = WriteBehindQueue(data_dir=str(tmp_path), maxsize=2, max_latency_ms=0)
+
+    await queue.put(_msg(1), "ch_a")
+    await queue.put(_msg(2), "ch_a")
+    blocked = asyncio.create_task(queue.put(_msg(3), "ch_a"))
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+
+    queue.start()
+    await blocked
+    await queue.close()
+
+    assert queue.metrics["blocked_puts"] == 1
+    assert queue.metrics["blocked_sec"] > 0
+    assert queue.metrics["max_depth"] == 2
+    assert _read_ids(tmp_path / "ch_a" / "2026-02-11.jsonl") == [1, 2, 3]
+
+
+@pytest.mark.asyncio
+async def test_write_failure_is_counted_and_queue_keeps_running(tmp_path):
+    queue = WriteBehindQueue(data_dir=str(tmp_path), max_latency_ms=0)
+    queue.start()
+
+    with patch("src.write_queue.save_messages", side_effect=OSError("disk full")):
+        await queue.put(_msg(1), "ch_a")
+        await asyncio.sleep(0.05)
+    await queue.put(_msg(2), "ch_a")
+    await queue.close()
+
+    assert queue.metrics["failed"] == 1
+    assert queue.metrics["written"] == 1
+
+
+@pytest.mark.asyncio
+async def test_writes_through_configured_storage(tmp_path):
+    from src.sqlite_storage import SQLiteStorage
+
+    storage = SQLiteStorage(str(tmp_path / "messages.db"))
+    queue = WriteBehindQueue(data_dir=str(tmp_path), max_latency_ms=10_000, storage=storage)
+    queue.start()
+
+    for i in range(3):
+        await queue.put(_msg(i), "ch_a")
+    await queue.close()
+
+    try:
+        assert sorted(m["message_id"] for m in storage.query(channel_alias="ch_a")) == [0, 1, 2]
+        assert not (tmp_path / "ch_a").exists()
+        assert queue.metrics["written"] == 3
+    finally:
+        storage.close()
+
+
+@pytest.mark.asyncio
+async def test_on_written_reports_each_channel_flush(tmp_path):
+    calls = []
+    queue = WriteBehindQueue(
+        data_dir=str(tmp_path), max_latency_ms=10_000,
+        on_written=lambda alias, msgs, stored: calls.append((alias, len(msgs), len(stored))),
+    )
+    queue.start()
+
+    await queue.put(_msg(1), "ch_a")
+    await queue.put(_msg(2), "ch_b")
+    await queue.put(_msg(3), "ch_a")
+    await queue.close()
+
+    assert sorted(calls) == [("ch_a", 2, 2), ("ch_b", 1, 1)]